@@ -0,0 +1,55 @@
+"""Process-wide registry of configured Gemini models.
+
+Streamlit runs ``main()`` once per browser session, so anything built in a
+handler's ``__init__`` is paid for every candidate. ``genai.configure`` also
+drops the SDK's cached service clients, which throws away the open transport
+each time it is called. The registry configures the SDK once per process and
+hands out shared ``GenerativeModel`` instances; sessions only keep their own
+chat state.
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import google.generativeai as genai
+
+from config.settings import GOOGLE_API_KEY, GEMINI_MODEL, GEMINI_TRANSPORT
+
+_lock = threading.Lock()
+_configured = False
+_models: Dict[Tuple[str, Tuple], genai.GenerativeModel] = {}
+
+
+def _configure_once() -> None:
+    """Configure the SDK exactly once so its transport is reused across sessions"""
+    global _configured
+    if not _configured:
+        genai.configure(api_key=GOOGLE_API_KEY, transport=GEMINI_TRANSPORT)
+        _configured = True
+
+
+def get_model(model_name: str = GEMINI_MODEL,
+              generation_config: Optional[Dict[str, Any]] = None) -> genai.GenerativeModel:
+    """Return the shared model for a name/config pair, building it on first use"""
+    key = (model_name, tuple(sorted((generation_config or {}).items())))
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            _configure_once()
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config
+            )
+            _models[key] = model
+        return model
+
+
+def reset_registry() -> None:
+    """Drop all shared models, e.g. after rotating the API key"""
+    global _configured
+    with _lock:
+        _models.clear()
+        _configured = False
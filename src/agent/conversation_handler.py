@@ -1,23 +1,286 @@
-from dotenv import load_dotenv
-import os
-import google.generativeai as genai
-from typing import List, Tuple, Dict, Any
+import time
+import uuid
+from collections import deque
+from typing import List, Tuple, Dict, Any, Iterator, Optional
+from pydantic import ValidationError
+from agent.llm_backend import LLMBackend, LLMResponse, get_backend
+from agent.rate_limiter import estimate_tokens
+from agent.resilience import CircuitOpenError, call_deadline, resilient_call, resilient_stream
+from agent.schemas import (
+    BatchEvaluation, Evaluation, QuestionSet, TechnicalQuestion,
+    fallback_evaluation, iter_json_array_items, strip_code_fence
+)
+from config.settings import (
+    STATELESS_PROMPTS, CHAT_HISTORY_WINDOW, ROLLING_SUMMARY, CALL_LOG_SIZE,
+    QUESTION_CACHE_ENABLED, QUESTION_BANK_ENABLED, EVALUATION_CACHE_ENABLED, QUESTION_DIFFICULTY_MIX
+)
+from utils.evaluation_cache import EvaluationCache, get_evaluation_cache
+from utils.metrics import metrics, record_fallback, track_llm_call
+from utils.question_bank import QuestionBank, get_question_bank, record_selection
+from utils.question_cache import QuestionCache, get_question_cache
+from utils.question_dedup import is_near_duplicate, record_generated
+
+# Shown instead of an evaluation while the LLM circuit breaker is open
+UNAVAILABLE_EVALUATION = (
+    "Automatic evaluation is temporarily unavailable. Your answer has been saved "
+    "and will be reviewed by our team."
+)
 
 class ConversationHandler:
-    def __init__(self):
-        # Load environment variables and configure Gemini AI
-        load_dotenv()
-        GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-        genai.configure(api_key=GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
-        self.chat = self.model.start_chat(history=[])
+    def __init__(self, backend: Optional[LLMBackend] = None, stateless: bool = STATELESS_PROMPTS,
+                 history_window: int = CHAT_HISTORY_WINDOW, rolling_summary: bool = ROLLING_SUMMARY,
+                 question_cache: Optional[QuestionCache] = None, question_bank: Optional[QuestionBank] = None,
+                 evaluation_cache: Optional[EvaluationCache] = None, evaluation_scope: Optional[str] = None):
+        # Borrow the process-wide backend; only the conversation state is per session
+        self.backend = backend or get_backend()
+        self.stateless = stateless
+        self.history_window = history_window
+        self.rolling_summary = rolling_summary
+        self.history: List[Dict[str, str]] = []
+        self.summary = ""
+        self.call_log: deque = deque(maxlen=CALL_LOG_SIZE)
+        # Full transcript replayed on every call when not stateless
+        self.chat_history: List[Dict[str, str]] = []
+        if question_cache is None and QUESTION_CACHE_ENABLED:
+            question_cache = get_question_cache()
+        self.question_cache = question_cache
+        if question_bank is None and QUESTION_BANK_ENABLED:
+            question_bank = get_question_bank()
+        self.question_bank = question_bank
+        if evaluation_cache is None and EVALUATION_CACHE_ENABLED:
+            evaluation_cache = get_evaluation_cache()
+        self.evaluation_cache = evaluation_cache
+        # Cached evaluations are only reused within this handler's session
+        self.evaluation_scope = evaluation_scope or uuid.uuid4().hex
+
+    def evaluation_worker(self) -> "ConversationHandler":
+        """Stateless handler for this session's work on another thread (evaluations, speculative questions)
+
+        It shares the backend, caches, evaluation scope and call log, but not the
+        chat history, so background work never races the script thread.
+        """
+        worker = ConversationHandler(backend=self.backend, stateless=True, question_cache=self.question_cache,
+                                     question_bank=self.question_bank, evaluation_cache=self.evaluation_cache,
+                                     evaluation_scope=self.evaluation_scope)
+        worker.call_log = self.call_log
+        return worker
+
+    def _send(self, call_type: str, prompt: str, response_schema: Optional[type] = None) -> LLMResponse:
+        """Send a prompt, either standalone (stateless) or after the chat transcript"""
+        start = time.time()
+        with track_llm_call(call_type) as call:
+            history = None if self.stateless else list(self.chat_history)
+            deadline = call_deadline(call_type)
+            response = resilient_call(call_type, lambda: self.backend.generate(
+                prompt, history=history, response_schema=response_schema),
+                deadline, tokens=estimate_tokens(prompt, history))
+            call.set_tokens(response.prompt_tokens, response.response_tokens)
+        if not self.stateless:
+            self._append_chat(prompt, response.text)
+        self._record_call(call_type, response, time.time() - start)
+        return response
+
+    def _send_stream(self, call_type: str, prompt: str, response_schema: Optional[type] = None) -> Iterator[str]:
+        """Send a prompt and yield the reply text chunk by chunk"""
+        start = time.time()
+        ttft = None
+        text = ""
+        with track_llm_call(call_type) as call:
+            history = None if self.stateless else list(self.chat_history)
+            deadline = call_deadline(call_type)
+            response = resilient_stream(call_type, lambda: self.backend.stream(
+                prompt, history=history, response_schema=response_schema),
+                deadline, tokens=estimate_tokens(prompt, history))
+            for chunk in response:
+                if ttft is None:
+                    ttft = call.ttft = time.time() - start
+                text += chunk
+                yield chunk
+            call.set_tokens(response.prompt_tokens, response.response_tokens)
+        if not self.stateless:
+            self._append_chat(prompt, text)
+        self._record_call(call_type, response, time.time() - start, ttft)
+
+    def _append_chat(self, prompt: str, reply: str) -> None:
+        self.chat_history.append({'role': 'user', 'text': prompt})
+        self.chat_history.append({'role': 'model', 'text': reply})
+
+    def _record_call(self, call_type: str, response: Any, latency: float,
+                     ttft: Optional[float] = None) -> None:
+        """Keep prompt/response token counts so prompt growth is visible per call"""
+        self.call_log.append({
+            'call_type': call_type,
+            'prompt_tokens': response.prompt_tokens,
+            'response_tokens': response.response_tokens,
+            'latency': latency,
+            # Time to first token; equals latency for non-streaming calls
+            'ttft': latency if ttft is None else ttft
+        })
+
+    def get_prompt_token_metrics(self) -> Dict[str, List[int]]:
+        """Prompt tokens per call, grouped by call type in call order"""
+        metrics: Dict[str, List[int]] = {}
+        for entry in self.call_log:
+            metrics.setdefault(entry['call_type'], []).append(entry['prompt_tokens'])
+        return metrics
+
+    def get_latency_metrics(self) -> Dict[str, Dict[str, List[float]]]:
+        """Time to first token and total latency per call, grouped by call type"""
+        metrics: Dict[str, Dict[str, List[float]]] = {}
+        for entry in self.call_log:
+            timings = metrics.setdefault(entry['call_type'], {'ttft': [], 'latency': []})
+            timings['ttft'].append(entry['ttft'])
+            timings['latency'].append(entry['latency'])
+        return metrics
+
+    def _plan_questions(self, skills: List[str]) -> List[Optional[str]]:
+        """One slot per difficulty in the mix, filled from the question bank where possible"""
+        if not self.question_bank:
+            return [None] * len(QUESTION_DIFFICULTY_MIX)
+        try:
+            slots = self.question_bank.select(skills)
+        except Exception as e:
+            print(f"Error reading question bank: {str(e)}")
+            return [None] * len(QUESTION_DIFFICULTY_MIX)
+        record_selection(sum(1 for q in slots if q is not None), len(slots))
+        return [q.display_text() if q is not None else None for q in slots]
+
+    def _cached_questions(self, skills: List[str]) -> Optional[List[str]]:
+        if not self.question_cache:
+            return None
+        try:
+            return self.question_cache.get(skills)
+        except Exception as e:
+            print(f"Error reading question cache: {str(e)}")
+            return None
+
+    def _cache_questions(self, skills: List[str], questions: List[str]) -> None:
+        if not self.question_cache:
+            return
+        try:
+            self.question_cache.put(skills, questions)
+        except Exception as e:
+            print(f"Error writing question cache: {str(e)}")
 
     def generate_technical_questions(self, skills: List[str]) -> List[str]:
-        """Generate technical questions based on provided skills"""
+        """Questions for the skills: from the question bank, then the cache, then the LLM for the gaps"""
+        planned = self._plan_questions(skills)
+        if all(planned):
+            return planned
+
+        cached = self._cached_questions(skills)
+        if cached:
+            return cached
+
+        missing = [d for d, q in zip(QUESTION_DIFFICULTY_MIX, planned) if q is None]
+        generated, complete = self._generate_questions(skills, missing, exclude=[q for q in planned if q])
+        fill = iter(generated)
+        questions = [q if q is not None else next(fill) for q in planned]
+        # Only cache full sets, never ones padded with fallback questions
+        if complete:
+            self._cache_questions(skills, questions)
+        return questions
+
+    def _request_questions(self, skills: List[str], difficulties: List[str],
+                           exclude: Optional[List[str]] = None) -> List[TechnicalQuestion]:
+        """Ask the model for one question per difficulty; raises on failure"""
+        response = self._send('generate_questions', self._question_prompt(skills, difficulties, exclude), QuestionSet)
+        if not response.text:
+            return []
+        return QuestionSet.model_validate_json(strip_code_fence(response.text)).questions[:len(difficulties)]
+
+    def _generate_questions(self, skills: List[str], difficulties: Optional[List[str]] = None,
+                            exclude: Optional[List[str]] = None) -> Tuple[List[str], bool]:
+        """Ask the model for questions; the flag is False when fallbacks were used"""
+        difficulties = list(difficulties or QUESTION_DIFFICULTY_MIX)
         try:
-            # Create a focused prompt for question generation
-            prompt = f"""
-            Generate 5 technical interview questions for a candidate with expertise in: {', '.join(skills)}
+            questions = [q.display_text() for q in self._request_questions(skills, difficulties, exclude)]
+        except Exception as e:
+            print(f"Error generating questions: {str(e)}")
+            questions = []
+        questions = self._screen_generated(questions, exclude or [])
+
+        # Ensure we have one question per requested difficulty
+        complete = len(questions) >= len(difficulties)
+        if not complete:
+            questions.extend(self._get_fallback_questions(skills, len(difficulties) - len(questions),
+                                                          (exclude or []) + questions))
+        return questions, complete
+
+    def generate_technical_questions_stream(self, skills: List[str]) -> Iterator[str]:
+        """Yield each question as soon as it is available: bank questions at once, generated ones as they stream"""
+        planned = self._plan_questions(skills)
+        if all(planned):
+            yield from planned
+            return
+
+        cached = self._cached_questions(skills)
+        if cached:
+            yield from cached
+            return
+
+        missing = [d for d, q in zip(QUESTION_DIFFICULTY_MIX, planned) if q is None]
+        generated = self._stream_generated_questions(skills, missing, [q for q in planned if q])
+        questions: List[str] = []
+        complete = True
+        for question in planned:
+            if question is None:
+                question = next(generated, None)
+                if question is None:
+                    # Pad with fallback questions, never caching the padded set
+                    complete = False
+                    question = self._get_fallback_questions(skills, 1, [q for q in planned if q] + questions)[0]
+            questions.append(question)
+            yield question
+
+        if complete:
+            self._cache_questions(skills, questions)
+
+    def _stream_generated_questions(self, skills: List[str], difficulties: List[str],
+                                    exclude: List[str]) -> Iterator[str]:
+        count = 0
+        yielded: List[str] = []
+        try:
+            # Each question object is validated as soon as it has fully streamed in
+            stream = self._send_stream('generate_questions',
+                                       self._question_prompt(skills, difficulties, exclude), QuestionSet)
+            for item in iter_json_array_items(stream):
+                try:
+                    question = TechnicalQuestion.model_validate_json(item).display_text()
+                except ValidationError as e:
+                    print(f"Skipping malformed question: {str(e)}")
+                    continue
+                if count < len(difficulties) and self._screen_generated([question], exclude + yielded):
+                    count += 1
+                    yielded.append(question)
+                    yield question
+        except Exception as e:
+            print(f"Error generating questions: {str(e)}")
+
+    def _screen_generated(self, questions: List[str], asked: List[str]) -> List[str]:
+        """Index generated questions, dropping those that reword one the candidate already has"""
+        kept: List[str] = []
+        for question in questions:
+            try:
+                record_generated(question)
+                if is_near_duplicate(question, asked + kept):
+                    metrics.inc("talentscout_question_repeats_dropped_total",
+                                "Generated questions dropped as rewordings of one already asked")
+                    continue
+            except Exception as e:
+                print(f"Error checking question for duplicates: {str(e)}")
+            kept.append(question)
+        return kept
+
+    def _question_prompt(self, skills: List[str], difficulties: Optional[List[str]] = None,
+                         exclude: Optional[List[str]] = None) -> str:
+        difficulties = list(difficulties or QUESTION_DIFFICULTY_MIX)
+        # The candidate already gets these questions from the question bank
+        avoid = "".join(f"\n               - {q}" for q in exclude or [])
+        avoid = f"\n            5. Do not repeat or rephrase these questions:{avoid}" if avoid else ""
+        # Create a focused prompt for question generation
+        return f"""
+            Generate {len(difficulties)} technical interview questions for a candidate with expertise in: {', '.join(skills)}
             
             Requirements:
             1. Each question should be specific to the candidate's skills
@@ -27,47 +290,22 @@ class ConversationHandler:
                - Technical concepts
                - Best practices
             3. Questions should be challenging but answerable
-            4. Format each question with difficulty level in square brackets
-            
-            Example format:
-            [Difficulty: Medium] Question about skill...
-            [Difficulty: Hard] Technical scenario question...
+            4. Difficulties, in order: {', '.join(difficulties)}; give each question the skill it tests{avoid}
             
-            Please generate questions now.
+            Reply with JSON: {{"questions": [{{"question": "...", "difficulty": "Medium", "skill": "..."}}]}}
             """
 
-            # Get response from AI
-            response = self.chat.send_message(prompt)
-            
-            if not response.text:
-                return self._get_fallback_questions(skills)
-
-            # Process and clean the response
-            questions = []
-            for line in response.text.split('\n'):
-                line = line.strip()
-                if line and any(line.startswith(str(i)) for i in range(1, 6)):
-                    # Remove numbering and clean up
-                    question = line.split('.', 1)[1].strip()
-                    # Remove any existing ** markers
-                    question = question.replace('**', '')
-                    # Check if difficulty is already in square brackets, if not add it
-                    if not question.startswith('['):
-                        question = '' + question
-                    questions.append(question)
-
-            # Ensure we have exactly 5 questions
-            if len(questions) < 5:
-                questions.extend(self._get_fallback_questions(skills)[:5 - len(questions)])
-            
-            return questions[:5]
-
-        except Exception as e:
-            print(f"Error generating questions: {str(e)}")
-            return self._get_fallback_questions(skills)
-
-    def _get_fallback_questions(self, skills: List[str]) -> List[str]:
-        """Provide fallback questions if AI generation fails"""
+    def _get_fallback_questions(self, skills: List[str], count: int = len(QUESTION_DIFFICULTY_MIX),
+                                exclude: Optional[List[str]] = None) -> List[str]:
+        """Provide fallback questions if AI generation fails: reviewed bank questions first"""
+        record_fallback('generate_questions')
+        exclude = list(exclude or [])
+        questions: List[str] = []
+        if self.question_bank:
+            try:
+                questions = [q.display_text() for q in self.question_bank.fallback(skills, count, exclude)]
+            except Exception as e:
+                print(f"Error reading question bank: {str(e)}")
         general_questions = [
             f" Explain how you would implement a scalable system using {skills[0] if skills else 'your preferred technology'}.",
             " Describe a challenging technical problem you've solved recently and your approach to solving it.",
@@ -75,43 +313,200 @@ class ConversationHandler:
             "Explain your approach to debugging complex issues in a production environment.",
             "How do you handle performance optimization in your applications?"
         ]
-        return general_questions
+        questions += [q for q in general_questions if q not in exclude and q not in questions]
+        return questions[:count]
 
-    def evaluate_answer(self, question: str, answer: str) -> str:
+    def evaluate_answer(self, question: str, answer: str) -> Evaluation:
         """Evaluate the candidate's answer"""
         try:
+            return self._evaluate(question, answer)
+        except CircuitOpenError:
+            record_fallback('evaluate_answer')
+            return fallback_evaluation(UNAVAILABLE_EVALUATION)
+        except Exception as e:
+            record_fallback('evaluate_answer')
+            return fallback_evaluation(f"Evaluation error: Please provide more details in your answer. {str(e)}")
+
+    def _evaluate(self, question: str, answer: str) -> Evaluation:
+        """Evaluate an answer, letting API and validation errors propagate to the caller"""
+        cached = self._cached_evaluation(question, answer)
+        if cached is not None:
+            return cached
+        response = self._send('evaluate_answer', self._evaluation_prompt(question, answer, structured=True),
+                              Evaluation)
+        if not response.text:
+            return fallback_evaluation("Unable to evaluate answer. Please try again.")
+        evaluation = Evaluation.model_validate_json(strip_code_fence(response.text))
+        self._cache_evaluation(question, answer, evaluation)
+        return evaluation
+
+    def _cached_evaluation(self, question: str, answer: str) -> Optional[Evaluation]:
+        if self.evaluation_cache is None:
+            return None
+        try:
+            return self.evaluation_cache.get(self.evaluation_scope, question, answer)
+        except Exception as e:
+            print(f"Error reading evaluation cache: {str(e)}")
+            return None
+
+    def _cache_evaluation(self, question: str, answer: str, evaluation: Evaluation) -> None:
+        if self.evaluation_cache is None:
+            return
+        try:
+            self.evaluation_cache.put(self.evaluation_scope, question, answer, evaluation)
+        except Exception as e:
+            print(f"Error writing evaluation cache: {str(e)}")
+
+    def evaluate_answer_stream(self, question: str, answer: str) -> Iterator[str]:
+        """Yield the evaluation as free text, chunk by chunk as the model produces it"""
+        # A cached evaluation is shown at once; free-text evaluations are not cached
+        cached = self._cached_evaluation(question, answer)
+        if cached is not None:
+            yield cached.to_text()
+            return
+        received = False
+        try:
+            for chunk in self._send_stream('evaluate_answer', self._evaluation_prompt(question, answer)):
+                received = True
+                yield chunk
+            if not received:
+                yield "Unable to evaluate answer. Please try again."
+        except CircuitOpenError:
+            record_fallback('evaluate_answer')
+            yield UNAVAILABLE_EVALUATION
+        except Exception as e:
+            record_fallback('evaluate_answer')
+            yield f"Evaluation error: Please provide more details in your answer. {str(e)}"
+
+    def _evaluation_prompt(self, question: str, answer: str, structured: bool = False) -> str:
+        if structured:
+            layout = """Reply with JSON: {"strengths": ["..."], "areas_for_improvement": ["..."],
+        "overall_assessment": "...", "score": 7}, where score is from 0 to 10."""
+        else:
+            layout = """Format your evaluation with:
+        - Strengths
+        - Areas for improvement (if any)
+        - Overall assessment"""
+        return f"""
+        Evaluate the following technical interview response:
+
+        Question: {question}
+        
+        Candidate's Answer: {answer}
+        
+        Please provide a constructive evaluation considering:
+        1. Technical accuracy
+        2. Completeness of the answer
+        3. Problem-solving approach
+        4. Communication clarity
+        
+        {layout}
+        
+        Keep the tone professional and constructive.
+        """
+
+    def evaluate_answers_batch(self, pairs: List[Tuple[str, str]]) -> List[Evaluation]:
+        """Evaluate all (question, answer) pairs with one request
+
+        Returns one evaluation per pair. Pairs with a cached evaluation are left
+        out of the request; pairs missing from the batched reply are evaluated
+        individually.
+        """
+        if not pairs:
+            return []
+
+        evaluations: List[Optional[Evaluation]] = [self._cached_evaluation(q, a) for q, a in pairs]
+        # Only answers without a cached evaluation go into the request
+        missing = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+        if not missing:
+            return evaluations
+        try:
+            answers = "\n\n".join(
+                f"Question {n}: {pairs[i][0]}\nCandidate's Answer {n}: {pairs[i][1]}"
+                for n, i in enumerate(missing, 1)
+            )
             prompt = f"""
-            Evaluate the following technical interview response:
+            Evaluate each of the following technical interview responses.
 
-            Question: {question}
-            
-            Candidate's Answer: {answer}
-            
-            Please provide a constructive evaluation considering:
-            1. Technical accuracy
-            2. Completeness of the answer
-            3. Problem-solving approach
-            4. Communication clarity
-            
-            Format your evaluation with:
-            - Strengths
-            - Areas for improvement (if any)
-            - Overall assessment
-            
-            Keep the tone professional and constructive.
-            """
+            {answers}
+
+            For every answer consider technical accuracy, completeness,
+            problem-solving approach and communication clarity, and score it
+            from 0 to 10. Keep the tone professional and constructive.
 
-            response = self.chat.send_message(prompt)
-            return response.text if response.text else "Unable to evaluate answer. Please try again."
+            Reply with JSON containing one evaluation per question:
+            {{"evaluations": [{{"question_number": 1, "strengths": ["..."], "areas_for_improvement": ["..."], "overall_assessment": "...", "score": 7}}]}}
+            """
 
+            response = self._send('evaluate_batch', prompt, BatchEvaluation)
+            batch = BatchEvaluation.model_validate_json(strip_code_fence(response.text))
+            for item in batch.evaluations:
+                if 1 <= item.question_number <= len(missing):
+                    i = missing[item.question_number - 1]
+                    evaluations[i] = Evaluation(**item.model_dump(exclude={'question_number'}))
+                    self._cache_evaluation(*pairs[i], evaluations[i])
         except Exception as e:
-            return f"Evaluation error: Please provide more details in your answer. {str(e)}"
+            print(f"Error evaluating answers in batch: {str(e)}")
+
+        return [
+            evaluation if evaluation is not None else self.evaluate_answer(question, answer)
+            for evaluation, (question, answer) in zip(evaluations, pairs)
+        ]
 
     def handle_message(self, session_id: str, message: str) -> Tuple[str, Dict[str, Any]]:
         """Handle general conversation messages"""
         try:
             # Process message based on context
-            response = self.chat.send_message(message)
+            if not self.stateless:
+                response = self._send('handle_message', message)
+                return response.text, {"status": "success"}
+
+            response = self._send('handle_message', self._build_windowed_prompt(message))
+            self.history.append({'role': 'user', 'text': message})
+            self.history.append({'role': 'assistant', 'text': response.text})
+            self._trim_history()
             return response.text, {"status": "success"}
         except Exception as e:
-            return f"I apologize, but I encountered an error: {str(e)}. Please try again.", {"status": "error"}
\ No newline at end of file
+            return f"I apologize, but I encountered an error: {str(e)}. Please try again.", {"status": "error"}
+
+    def _build_windowed_prompt(self, message: str) -> str:
+        """Build a chat prompt from the rolling summary and the recent history window"""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        if self.history:
+            recent = "\n".join(f"{turn['role'].title()}: {turn['text']}" for turn in self.history)
+            parts.append(f"Recent messages:\n{recent}")
+        parts.append(f"User: {message}")
+        return "\n\n".join(parts)
+
+    def _trim_history(self) -> None:
+        """Keep at most history_window messages, folding older ones into the summary"""
+        overflow = len(self.history) - self.history_window
+        if overflow <= 0:
+            return
+
+        dropped, self.history = self.history[:overflow], self.history[overflow:]
+        if self.rolling_summary:
+            self.summary = self._summarize(dropped) or self.summary
+
+    def _summarize(self, turns: List[Dict[str, str]]) -> Optional[str]:
+        """Fold dropped messages into the rolling summary"""
+        transcript = "\n".join(f"{turn['role'].title()}: {turn['text']}" for turn in turns)
+        prompt = f"""
+        Update the running summary of an interview conversation.
+
+        Current summary:
+        {self.summary or '(none)'}
+
+        New messages:
+        {transcript}
+
+        Reply with the updated summary in at most five sentences.
+        """
+        try:
+            response = self._send('summarize', prompt)
+            return response.text
+        except Exception as e:
+            print(f"Error summarizing conversation: {str(e)}")
+            return None
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Background answer evaluation.
+
+"Submit & Continue" used to block on ``evaluate_answer`` for every question.
+Evaluations are now handed to a process-wide pool and the interview moves on
+immediately. Each session gets an ``EvaluationQueue`` that runs its own
+evaluations one after another, in submission order, and keeps their futures
+so the completion page can collect them. The number of evaluations in flight
+across the process is bounded; once the bound is reached, ``submit`` waits
+briefly for a slot and then raises ``EvaluationQueueFull``, instead of
+letting the backlog grow without limit or blocking the page.
+
+Evaluations run on a stateless copy of the session's handler (see
+``ConversationHandler.evaluation_worker``), so pool threads never touch the
+chat history the script thread is using. While the LLM circuit breaker is
+open an evaluation resolves to the same "temporarily unavailable" fallback
+as a synchronous one. ``submit`` takes an ``on_done`` callback, called on
+the worker thread with the outcome, so the caller can persist results even
+if the candidate never comes back to the page.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional, Tuple
+
+from agent.conversation_handler import UNAVAILABLE_EVALUATION
+from agent.resilience import CircuitOpenError
+from agent.schemas import fallback_evaluation
+from config.settings import EVALUATION_WORKERS, EVALUATION_QUEUE_SIZE, EVALUATION_SUBMIT_TIMEOUT
+from utils.metrics import record_fallback
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(EVALUATION_QUEUE_SIZE)
+
+
+class EvaluationQueueFull(RuntimeError):
+    """Every evaluation slot stayed taken for the whole submit timeout"""
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Process-wide pool shared by every session's evaluations"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EVALUATION_WORKERS,
+                                           thread_name_prefix="answer-evaluation")
+        return _executor
+
+
+def outcome(future: Future) -> Tuple[str, Any]:
+    """("pending", None), ("done", evaluation) or ("error", exception)"""
+    if not future.done():
+        return "pending", None
+    if future.cancelled():
+        return "error", RuntimeError("Evaluation was cancelled")
+    if future.exception() is not None:
+        return "error", future.exception()
+    return "done", future.result()
+
+
+def _evaluate(worker, question: str, answer: str):
+    try:
+        return worker._evaluate(question, answer)
+    except CircuitOpenError:
+        record_fallback('evaluate_answer')
+        return fallback_evaluation(UNAVAILABLE_EVALUATION)
+
+
+class EvaluationQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._tail: Optional[Future] = None
+
+    def submit(self, handler, question: str, answer: str,
+               timeout: Optional[float] = EVALUATION_SUBMIT_TIMEOUT,
+               on_done: Optional[Callable[[str, Any], None]] = None) -> int:
+        """Queue an evaluation behind this session's earlier ones; returns its id"""
+        if not _slots.acquire(timeout=timeout):
+            raise EvaluationQueueFull("The evaluator is busy right now")
+        worker = handler.evaluation_worker()
+        result: Future = Future()
+        if on_done is not None:
+            result.add_done_callback(lambda future: on_done(*outcome(future)))
+
+        def run():
+            try:
+                if result.set_running_or_notify_cancel():
+                    try:
+                        result.set_result(_evaluate(worker, question, answer))
+                    except Exception as e:
+                        result.set_exception(e)
+            finally:
+                _slots.release()
+
+        with self._lock:
+            previous, self._tail = self._tail, result
+            self._futures.append(result)
+            evaluation_id = len(self._futures) - 1
+
+        if previous is None:
+            _get_executor().submit(run)
+        else:
+            # Runs immediately if the previous evaluation has already finished
+            previous.add_done_callback(lambda _: _get_executor().submit(run))
+        return evaluation_id
+
+    def result(self, evaluation_id: int) -> Tuple[str, Any]:
+        """("pending", None), ("done", evaluation) or ("error", exception)"""
+        return outcome(self._futures[evaluation_id])
+
+    def pending(self) -> int:
+        """Number of evaluations not finished yet"""
+        return sum(1 for future in self._futures if not future.done())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for all queued evaluations; True if none are pending afterwards"""
+        done, not_done = wait(list(self._futures), timeout=timeout)
+        return not not_done
@@ -1,22 +1,14 @@
-from dotenv import load_dotenv
-import os
-import google.generativeai as genai
-from typing import Dict, List, Optional
-
-# Load environment variables
-load_dotenv()
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-GEMINI_MODEL = "gemini-1.5-pro"
-TEMPERATURE = 0.7
-TOP_P = 0.9
-TOP_K = 40
-MAX_OUTPUT_TOKENS = 2048
+import time
+from typing import Dict, Iterator, List, Optional
+from agent.llm_backend import LLMBackend, get_backend
+from agent.rate_limiter import estimate_tokens
+from agent.resilience import call_deadline, resilient_call, resilient_stream
+from utils.metrics import track_llm_call
+from config.settings import TEMPERATURE, TOP_P, TOP_K, MAX_OUTPUT_TOKENS
 
 class GeminiAgent:
-    def __init__(self):
-        genai.configure(api_key=GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel(
-            model_name=GEMINI_MODEL,
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        self.backend = backend or get_backend(
             generation_config={
                 "temperature": TEMPERATURE,
                 "top_p": TOP_P,
@@ -24,7 +16,21 @@ class GeminiAgent:
                 "max_output_tokens": MAX_OUTPUT_TOKENS,
             }
         )
-        self.chat = self.model.start_chat(history=[])
+        self.history: List[Dict[str, str]] = []
+
+    def _send(self, prompt: str, call_type: str = 'agent_response') -> str:
+        with track_llm_call(call_type) as call:
+            history = list(self.history)
+            deadline = call_deadline(call_type)
+            response = resilient_call(call_type, lambda: self.backend.generate(prompt, history=history),
+                                      deadline, tokens=estimate_tokens(prompt, history))
+            call.set_tokens(response.prompt_tokens, response.response_tokens)
+        self._append_history(prompt, response.text)
+        return response.text
+
+    def _append_history(self, prompt: str, reply: str) -> None:
+        self.history.append({"role": "user", "text": prompt})
+        self.history.append({"role": "model", "text": reply})
         
     def get_response(self, message: str, context: Optional[Dict] = None) -> str:
         try:
@@ -33,17 +39,41 @@ class GeminiAgent:
             else:
                 prompt = message
                 
-            response = self.chat.send_message(prompt)
-            return response.text
+            return self._send(prompt)
             
         except Exception as e:
             return f"I apologize, but I encountered an error: {str(e)}. Please try again."
     
+    def get_response_stream(self, message: str, context: Optional[Dict] = None) -> Iterator[str]:
+        """Yield the response text chunk by chunk as the model produces it"""
+        try:
+            if context:
+                prompt = self._build_contextual_prompt(message, context)
+            else:
+                prompt = message
+
+            reply = ""
+            start = time.perf_counter()
+            with track_llm_call('agent_response') as call:
+                history = list(self.history)
+                deadline = call_deadline('agent_response')
+                stream = resilient_stream('agent_response', lambda: self.backend.stream(prompt, history=history),
+                                          deadline, tokens=estimate_tokens(prompt, history))
+                for chunk in stream:
+                    if call.ttft is None:
+                        call.ttft = time.perf_counter() - start
+                    reply += chunk
+                    yield chunk
+                call.set_tokens(stream.prompt_tokens, stream.response_tokens)
+            self._append_history(prompt, reply)
+
+        except Exception as e:
+            yield f"I apologize, but I encountered an error: {str(e)}. Please try again."
+
     def generate_technical_questions(self, tech_stack: List[str]) -> List[str]:
         prompt = self._build_tech_question_prompt(tech_stack)
         try:
-            response = self.chat.send_message(prompt)
-            questions = self._parse_questions(response.text)
+            questions = self._parse_questions(self._send(prompt, 'agent_questions'))
             return questions
         except Exception as e:
             return [f"Error generating questions: {str(e)}"]
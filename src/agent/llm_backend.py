@@ -0,0 +1,304 @@
+"""LLM backends used by the conversation handlers.
+
+Handlers talk to an ``LLMBackend`` instead of ``google.generativeai`` directly,
+so the app can run against the live Gemini API or, for load tests and CI, an
+offline ``StubBackend`` with configurable latency, error rate and canned
+output. The backend is chosen with ``LLM_BACKEND`` in ``config/settings.py``.
+
+Prompts are plain strings. A conversation that should see earlier turns
+passes them as ``history``: a list of ``{"role": "user" | "model", "text": ...}``.
+Calls that want JSON pass a pydantic model (see ``agent/schemas.py``) as
+``response_schema`` and get a reply in that shape.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
+
+from agent.client_registry import get_model
+from agent.schemas import BatchEvaluation, Evaluation, QuestionSet
+from config.settings import (
+    LLM_BACKEND, GEMINI_MODEL, STUB_LATENCY, STUB_ERROR_RATE, STUB_SEED, STUB_RESPONSES_FILE
+)
+
+History = Optional[List[Dict[str, str]]]
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+
+
+class LLMStream:
+    """Iterator over reply chunks; token counts are filled in once it is exhausted"""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self._chunks: Iterator[str] = iter(())
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        return next(self._chunks)
+
+
+class LLMBackend(Protocol):
+    def generate(self, prompt: str, history: History = None,
+                 response_schema: Optional[type] = None) -> LLMResponse: ...
+
+    async def generate_async(self, prompt: str, history: History = None,
+                             response_schema: Optional[type] = None) -> LLMResponse: ...
+
+    def stream(self, prompt: str, history: History = None,
+               response_schema: Optional[type] = None) -> LLMStream: ...
+
+    def count_tokens(self, prompt: str) -> int: ...
+
+
+class GeminiBackend:
+    def __init__(self, model_name: str = GEMINI_MODEL, generation_config: Optional[Dict[str, Any]] = None):
+        # Shared per process through the client registry
+        self.model = get_model(model_name, generation_config)
+
+    def _contents(self, prompt: str, history: History) -> Any:
+        if not history:
+            return prompt
+        contents = [{"role": turn["role"], "parts": [turn["text"]]} for turn in history]
+        contents.append({"role": "user", "parts": [prompt]})
+        return contents
+
+    def _config(self, response_schema: Optional[type]) -> Optional[Dict[str, Any]]:
+        """Per-call generation config; merged with the model's own config by the SDK"""
+        if response_schema is None:
+            return None
+        return {"response_mime_type": "application/json", "response_schema": response_schema}
+
+    def _usage(self, response: Any) -> Tuple[int, int]:
+        usage = getattr(response, 'usage_metadata', None)
+        return (getattr(usage, 'prompt_token_count', 0) or 0,
+                getattr(usage, 'candidates_token_count', 0) or 0)
+
+    def generate(self, prompt: str, history: History = None,
+                 response_schema: Optional[type] = None) -> LLMResponse:
+        response = self.model.generate_content(self._contents(prompt, history),
+                                               generation_config=self._config(response_schema))
+        return LLMResponse(response.text, *self._usage(response))
+
+    async def generate_async(self, prompt: str, history: History = None,
+                             response_schema: Optional[type] = None) -> LLMResponse:
+        response = await self.model.generate_content_async(self._contents(prompt, history),
+                                                           generation_config=self._config(response_schema))
+        return LLMResponse(response.text, *self._usage(response))
+
+    def stream(self, prompt: str, history: History = None,
+               response_schema: Optional[type] = None) -> LLMStream:
+        response = self.model.generate_content(self._contents(prompt, history),
+                                               generation_config=self._config(response_schema), stream=True)
+        result = LLMStream()
+
+        def chunks() -> Iterator[str]:
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks carrying only finish metadata have no text parts
+                    continue
+                if text:
+                    yield text
+            result.prompt_tokens, result.response_tokens = self._usage(response)
+
+        result._chunks = chunks()
+        return result
+
+    def count_tokens(self, prompt: str) -> int:
+        return self.model.count_tokens(prompt).total_tokens
+
+
+class StubBackendError(RuntimeError):
+    """Injected failure raised by StubBackend at its configured error rate"""
+
+
+# Canned replies keyed by a regex matched against the prompt, in order. Templates
+# may use {n} (a number derived from the prompt) and {skills}.
+DEFAULT_STUB_RESPONSES: List[Tuple[str, str]] = [
+    (r"Generate \d+(-\d+)? technical interview questions",
+     "1. [Difficulty: Easy] What are the core features of {skills}?\n"
+     "2. [Difficulty: Medium] How would you structure a medium-sized project using {skills}?\n"
+     "3. [Difficulty: Medium] Describe how you would debug a performance problem in {skills} code.\n"
+     "4. [Difficulty: Hard] Design a scalable service built on {skills} handling {n}k requests per second.\n"
+     "5. [Difficulty: Hard] What trade-offs would you weigh when testing a large {skills} codebase?"),
+    (r"Evaluate the following technical interview response",
+     "Strengths:\n* Clear explanation of the main idea\n* Relevant practical example\n"
+     "Areas for improvement:\n* Discuss edge cases and failure modes\n"
+     "Overall assessment:\nA solid answer that covers the fundamentals ({n}/10)."),
+    (r"running summary", "The candidate and assistant discussed the interview so far."),
+    (r".*", "Thanks for your message. Let's continue with the interview."),
+]
+
+
+def parse_latency(spec: str):
+    """Parse "fixed:1.0", "uniform:0.5:2", "normal:1:0.3" or "lognormal:median:sigma" (seconds)"""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(rng.gauss(values[0], values[1]), 0.0)
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StubBackend:
+    def __init__(self, latency: str = STUB_LATENCY, error_rate: float = STUB_ERROR_RATE,
+                 seed: int = STUB_SEED, responses: Optional[List[Tuple[str, str]]] = None,
+                 chunk_size: int = 16):
+        self._sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.responses = [(re.compile(pattern, re.DOTALL), template)
+                          for pattern, template in (responses or DEFAULT_STUB_RESPONSES)]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> Tuple[float, bool]:
+        """Sample a latency and whether this call fails"""
+        with self._lock:
+            return self._sample_latency(self._rng), self._rng.random() < self.error_rate
+
+    def _reply(self, prompt: str) -> str:
+        """Deterministic reply for a prompt: same prompt, same text"""
+        n = int(hashlib.sha256(prompt.encode()).hexdigest()[:8], 16) % 90 + 10
+        match = re.search(r"expertise in: (.+)", prompt)
+        skills = match.group(1).strip() if match else "your stack"
+        for pattern, template in self.responses:
+            if pattern.search(prompt):
+                return template.format(n=n, skills=skills)
+        return ""
+
+    def _structured_reply(self, prompt: str, response_schema: type) -> str:
+        """Deterministic JSON reply in the shape of the requested schema"""
+        n = int(hashlib.sha256(prompt.encode()).hexdigest()[:8], 16) % 90 + 10
+        evaluation = {
+            "strengths": ["Clear explanation of the main idea", "Relevant practical example"],
+            "areas_for_improvement": ["Discuss edge cases and failure modes"],
+            "overall_assessment": "A solid answer that covers the fundamentals.",
+            "score": n % 11,
+        }
+        if response_schema is QuestionSet:
+            match = re.search(r"expertise in: (.+)", prompt)
+            skills = [s.strip() for s in match.group(1).split(",")] if match else ["your stack"]
+            templates = [
+                ("Easy", "What are the core features of {skill}?"),
+                ("Medium", "How would you structure a medium-sized project using {skill}?"),
+                ("Medium", "Describe how you would debug a performance problem in {skill} code."),
+                ("Hard", "Design a scalable service built on {skill} handling {n}k requests per second."),
+                ("Hard", "What trade-offs would you weigh when testing a large {skill} codebase?"),
+            ]
+            # Honor the requested difficulties when the prompt lists them
+            wanted = re.search(r"Difficulties, in order: ([^;\n]+)", prompt)
+            if wanted:
+                by_difficulty: Dict[str, List[str]] = {}
+                for difficulty, question in templates:
+                    by_difficulty.setdefault(difficulty, []).append(question)
+                templates = [(d.strip(), by_difficulty[d.strip()][i % len(by_difficulty[d.strip()])])
+                             for i, d in enumerate(wanted.group(1).split(","))]
+            return json.dumps({"questions": [
+                {"question": question.format(skill=skills[i % len(skills)], n=n),
+                 "difficulty": difficulty, "skill": skills[i % len(skills)]}
+                for i, (difficulty, question) in enumerate(templates)
+            ]})
+        if response_schema is BatchEvaluation:
+            count = len(re.findall(r"^\s*Question \d+:", prompt, re.MULTILINE))
+            return json.dumps({"evaluations": [dict(evaluation, question_number=i) for i in range(1, count + 1)]})
+        if response_schema is Evaluation:
+            return json.dumps(evaluation)
+        raise ValueError(f"Stub backend has no reply for schema {response_schema.__name__}")
+
+    def _text(self, prompt: str, response_schema: Optional[type]) -> str:
+        return self._structured_reply(prompt, response_schema) if response_schema else self._reply(prompt)
+
+    def generate(self, prompt: str, history: History = None,
+                 response_schema: Optional[type] = None) -> LLMResponse:
+        latency, fail = self._draw()
+        time.sleep(latency)
+        if fail:
+            raise StubBackendError("Injected stub backend failure")
+        text = self._text(prompt, response_schema)
+        return LLMResponse(text, self.count_tokens(prompt, history), self.count_tokens(text))
+
+    async def generate_async(self, prompt: str, history: History = None,
+                             response_schema: Optional[type] = None) -> LLMResponse:
+        latency, fail = self._draw()
+        await asyncio.sleep(latency)
+        if fail:
+            raise StubBackendError("Injected stub backend failure")
+        text = self._text(prompt, response_schema)
+        return LLMResponse(text, self.count_tokens(prompt, history), self.count_tokens(text))
+
+    def stream(self, prompt: str, history: History = None,
+               response_schema: Optional[type] = None) -> LLMStream:
+        latency, fail = self._draw()
+        text = self._text(prompt, response_schema)
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        result = LLMStream()
+
+        def chunks() -> Iterator[str]:
+            # First chunk arrives after a third of the latency, the rest spread evenly
+            time.sleep(latency / 3)
+            if fail:
+                raise StubBackendError("Injected stub backend failure")
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(latency * 2 / 3 / max(len(pieces) - 1, 1))
+                yield piece
+            result.prompt_tokens = self.count_tokens(prompt, history)
+            result.response_tokens = self.count_tokens(text)
+
+        result._chunks = chunks()
+        return result
+
+    def count_tokens(self, prompt: str, history: History = None) -> int:
+        # Roughly four characters per token, like Gemini's English text
+        total = len(prompt) + sum(len(turn["text"]) for turn in history or [])
+        return max(total // 4, 1)
+
+
+_backends: Dict[Tuple, LLMBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def _load_stub_responses() -> Optional[List[Tuple[str, str]]]:
+    if not STUB_RESPONSES_FILE:
+        return None
+    with open(STUB_RESPONSES_FILE) as f:
+        return [tuple(item) for item in json.load(f)]
+
+
+def get_backend(generation_config: Optional[Dict[str, Any]] = None,
+                name: str = LLM_BACKEND) -> LLMBackend:
+    """Process-wide backend selected by LLM_BACKEND ("gemini" or "stub")"""
+    key = (name, tuple(sorted((generation_config or {}).items())))
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if name == "stub":
+                backend = StubBackend(responses=_load_stub_responses())
+            elif name == "gemini":
+                backend = GeminiBackend(generation_config=generation_config)
+            else:
+                raise ValueError(f"Unknown LLM backend: {name}")
+            _backends[key] = backend
+        return backend
@@ -0,0 +1,179 @@
+"""Process-wide client-side rate limiter for LLM calls.
+
+All sessions share one quota, so every handler call first takes a permit from
+two token buckets: one sized in requests per minute and one in tokens per
+minute. The token cost is estimated from the prompt before the call and
+corrected with the real usage afterwards.
+
+Callers that cannot be served yet wait in a priority queue. Interactive work
+(evaluating an answer the candidate just submitted, streaming chat) is served
+before background work (speculative question generation, cache warming,
+batch re-scoring); within a priority, callers are served first come, first
+served. Code running background work marks it with::
+
+    with request_priority(Priority.BACKGROUND):
+        handler.generate_technical_questions(skills)
+
+Background work that a candidate may end up waiting for runs under a
+``PromotablePriority`` instead; ``limiter.promote`` moves its queued and
+future requests ahead to interactive priority.
+
+``resilient_call`` and ``resilient_stream`` take the permits, one per
+request they send, including retries and hedged duplicates.
+"""
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Union
+
+from config.settings import (
+    RATE_LIMIT_RPM, RATE_LIMIT_TPM, RATE_LIMIT_BURST_SECONDS, RATE_LIMIT_RESPONSE_TOKENS
+)
+from utils.metrics import metrics
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RateLimitTimeout(TimeoutError):
+    """No permit became available before the caller's deadline"""
+
+
+class PromotablePriority:
+    """Background priority that can be raised to interactive once someone waits on the work"""
+
+    def __init__(self, priority: Priority = Priority.BACKGROUND):
+        self.priority = priority
+
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: Union[Priority, PromotablePriority]) -> Iterator[None]:
+    """Run the enclosed LLM calls at the given priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    value = _priority.get()
+    return value.priority if isinstance(value, PromotablePriority) else value
+
+
+class _Bucket:
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (after a refill)"""
+        return max(amount - self.level, 0) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: float = RATE_LIMIT_RPM, tokens_per_minute: float = RATE_LIMIT_TPM,
+                 burst_seconds: float = RATE_LIMIT_BURST_SECONDS):
+        self.enabled = requests_per_minute > 0 and tokens_per_minute > 0
+        self._requests = _Bucket(requests_per_minute or 1, burst_seconds)
+        self._tokens = _Bucket(tokens_per_minute or 1, burst_seconds)
+        self._condition = threading.Condition()
+        # [priority, sequence, promotable holder or None], as lists so promote() can update them
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+
+    def acquire(self, tokens: int, priority: Optional[Priority] = None, timeout: Optional[float] = None) -> int:
+        """Wait for one request and ``tokens`` tokens; returns the tokens charged"""
+        if not self.enabled:
+            return 0
+        holder = _priority.get() if priority is None else None
+        if not isinstance(holder, PromotablePriority):
+            holder = None
+        priority = current_priority() if priority is None else priority
+        # A single huge prompt must not wait forever for a bucket it can never fit in
+        tokens = min(tokens, int(self._tokens.capacity))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        entry = [int(priority), next(self._sequence), holder]
+        start = time.monotonic()
+
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            self._publish_depth()
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._requests.refill(now)
+                    self._tokens.refill(now)
+                    wait = None
+                    if self._waiters[0] is entry:
+                        wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+                        if wait == 0:
+                            self._requests.level -= 1
+                            self._tokens.level -= tokens
+                            break
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise RateLimitTimeout("Timed out waiting for the LLM rate limiter")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._publish_depth()
+                self._condition.notify_all()
+
+        metrics.observe("talentscout_llm_rate_limit_wait_seconds", "Time spent queued in the LLM rate limiter",
+                        time.monotonic() - start, priority=Priority(entry[0]).name.lower())
+        return tokens
+
+    def promote(self, holder: PromotablePriority) -> None:
+        """Serve the holder's waiting and later requests at interactive priority"""
+        with self._condition:
+            holder.priority = Priority.INTERACTIVE
+            for entry in self._waiters:
+                if entry[2] is holder:
+                    entry[0] = int(Priority.INTERACTIVE)
+            heapq.heapify(self._waiters)
+            self._condition.notify_all()
+
+    def reconcile(self, charged: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a call is known"""
+        if not self.enabled or not actual:
+            return
+        with self._condition:
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + charged - actual)
+            self._condition.notify_all()
+
+    def _publish_depth(self) -> None:
+        metrics.set("talentscout_llm_rate_limit_queue_depth", "Callers waiting in the LLM rate limiter",
+                    len(self._waiters))
+
+
+limiter = RateLimiter()
+
+
+def estimate_tokens(prompt: str, history: Optional[List[Dict[str, str]]] = None) -> int:
+    """Rough pre-call cost: about four characters per token plus the expected reply"""
+    chars = len(prompt) + sum(len(turn["text"]) for turn in history or [])
+    return chars // 4 + RATE_LIMIT_RESPONSE_TOKENS
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(deadline - time.monotonic(), 0)
+
@@ -0,0 +1,300 @@
+"""Deadlines, retries, hedging and a circuit breaker for LLM calls.
+
+Every handler call goes through ``resilient_call`` or ``resilient_stream``:
+
+* each call type has a total deadline (``LLM_DEADLINES``) shared by all of its
+  attempts, so a slow API can no longer hang the interview page. Callers
+  that also wait for a rate-limit permit compute the deadline once with
+  ``call_deadline`` and pass it, with the estimated token cost, to
+  ``resilient_call``/``resilient_stream``. Each request takes its permit
+  before it is sent and timed, and a permit timeout (``RateLimitTimeout``)
+  is never counted against the circuit breaker;
+* transient failures are retried with jittered exponential backoff;
+* call types listed in ``LLM_HEDGE_CALL_TYPES`` get a duplicate request once
+  the first one has been in flight for ``LLM_HEDGE_DELAY`` seconds, if a
+  permit is free right away, and the first successful reply wins;
+* a process-wide circuit breaker opens after ``CIRCUIT_FAILURE_THRESHOLD``
+  consecutive transient failures. While it is open calls fail immediately
+  with ``CircuitOpenError`` and handlers serve fallback content, instead of
+  every session waiting out its own deadline. After ``CIRCUIT_COOLDOWN``
+  seconds a single trial call is let through.
+
+Backend calls run on a shared thread pool so the caller can stop waiting at
+the deadline; the abandoned request finishes (or times out) in the background.
+"""
+import queue
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional, TypeVar
+
+from agent.llm_backend import LLMStream, StubBackendError
+from agent.rate_limiter import RateLimitTimeout, limiter
+from config.settings import (
+    LLM_DEADLINES, LLM_DEFAULT_DEADLINE, LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY,
+    LLM_HEDGE_CALL_TYPES, LLM_HEDGE_DELAY, LLM_CALL_WORKERS, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN
+)
+from utils.metrics import metrics, record_retry
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    TRANSIENT_API_ERRORS = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        google_exceptions.TooManyRequests,
+    )
+except ImportError:
+    TRANSIENT_API_ERRORS = ()
+
+T = TypeVar("T")
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The call type's deadline passed before a reply arrived"""
+
+
+class CircuitOpenError(RuntimeError):
+    """The circuit breaker is open; serve fallback content instead"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Errors worth retrying and counting against the circuit breaker"""
+    return isinstance(error, (LLMDeadlineExceeded, StubBackendError, ConnectionError) + TRANSIENT_API_ERRORS)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self._set_state("closed")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state("open")
+
+    def release_trial(self) -> None:
+        """Let another trial through when one was abandoned without an outcome"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            print(f"LLM circuit breaker {self.state} -> {state}")
+        self.state = state
+        metrics.set("talentscout_llm_circuit_open", "1 while the LLM circuit breaker is open",
+                    1 if state == "open" else 0)
+
+
+breaker = CircuitBreaker()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=LLM_CALL_WORKERS, thread_name_prefix="llm-call")
+        return _executor
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _permit(tokens: Optional[int], deadline: float, block: bool = True) -> int:
+    """Take a rate-limit permit for one request before it is sent; 0 when the call is not metered
+
+    Raises ``RateLimitTimeout`` when none is free by the deadline (at once when not ``block``).
+    """
+    if tokens is None:
+        return 0
+    return limiter.acquire(tokens, timeout=max(deadline - time.monotonic(), 0) if block else 0)
+
+
+def _reconcile_when_done(future: Future, charged: int) -> None:
+    """Correct the token estimate with the reply's usage, even for a losing hedge"""
+    def reconcile(done: Future) -> None:
+        if not done.cancelled() and done.exception() is None:
+            response = done.result()
+            limiter.reconcile(charged, response.prompt_tokens + response.response_tokens)
+    future.add_done_callback(reconcile)
+
+
+def _attempt(call_type: str, fn: Callable[[], T], deadline: float, tokens: Optional[int] = None) -> T:
+    """One attempt, hedged with a duplicate request for configured call types
+
+    The permit is taken before the attempt is timed, so queueing in the rate
+    limiter is never mistaken for a slow service.
+    """
+    charged = _permit(tokens, deadline)
+    sent = threading.Event()
+
+    def send() -> T:
+        sent.set()
+        return fn()
+
+    futures = [_get_executor().submit(send)]
+    _reconcile_when_done(futures[0], charged)
+    if call_type in LLM_HEDGE_CALL_TYPES:
+        done, _ = wait(futures, timeout=min(LLM_HEDGE_DELAY, max(deadline - time.monotonic(), 0)))
+        # Hedge only a request that is actually in flight, and only with a permit that is free now
+        if not done and sent.is_set() and time.monotonic() < deadline:
+            try:
+                hedge_charged = _permit(tokens, deadline, block=False)
+            except RateLimitTimeout:
+                metrics.inc("talentscout_llm_hedges_skipped_total", "Hedges not sent because no permit was free",
+                            call_type=call_type)
+            else:
+                metrics.inc("talentscout_llm_hedged_requests_total", "Duplicate requests sent for slow calls",
+                            call_type=call_type)
+                futures.append(_get_executor().submit(fn))
+                _reconcile_when_done(futures[-1], hedge_charged)
+
+    error: Optional[BaseException] = None
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    if error is not None and not pending:
+        raise error
+    raise LLMDeadlineExceeded(f"{call_type} exceeded its {LLM_DEADLINES.get(call_type, LLM_DEFAULT_DEADLINE)}s deadline")
+
+
+def call_deadline(call_type: str) -> float:
+    """Absolute ``time.monotonic()`` deadline for a call of this type starting now"""
+    return time.monotonic() + LLM_DEADLINES.get(call_type, LLM_DEFAULT_DEADLINE)
+
+
+def resilient_call(call_type: str, fn: Callable[[], T], deadline: Optional[float] = None,
+                   tokens: Optional[int] = None) -> T:
+    """Run a blocking backend call with deadline, retries, hedging and the breaker
+
+    With ``tokens`` (the estimated cost) every request, retry or hedge, takes a
+    rate-limit permit first.
+    """
+    deadline = call_deadline(call_type) if deadline is None else deadline
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError("LLM service is unavailable; serving fallback content")
+        try:
+            result = _attempt(call_type, fn, deadline, tokens)
+        except RateLimitTimeout:
+            breaker.release_trial()  # never reached the service
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()  # the service answered, just not usefully
+                raise
+            breaker.record_failure()
+            delay = _backoff(attempt)
+            if attempt >= LLM_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                raise
+            attempt += 1
+            record_retry(call_type)
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+def resilient_stream(call_type: str, fn: Callable[[], LLMStream], deadline: Optional[float] = None,
+                     tokens: Optional[int] = None) -> LLMStream:
+    """Stream a reply with the call type's deadline; retries only before the first chunk"""
+    deadline = call_deadline(call_type) if deadline is None else deadline
+    result = LLMStream()
+
+    def produce(stream_fn: Callable[[], LLMStream], chunks: "queue.Queue", charged: int) -> None:
+        try:
+            stream = stream_fn()
+            for chunk in stream:
+                chunks.put(("chunk", chunk))
+            limiter.reconcile(charged, stream.prompt_tokens + stream.response_tokens)
+            chunks.put(("end", stream))
+        except Exception as e:
+            chunks.put(("error", e))
+
+    def consume() -> Iterator[str]:
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError("LLM service is unavailable; serving fallback content")
+            try:
+                charged = _permit(tokens, deadline)
+            except RateLimitTimeout:
+                breaker.release_trial()  # never reached the service
+                raise
+            chunks: "queue.Queue" = queue.Queue()
+            _get_executor().submit(produce, fn, chunks, charged)
+            started = False
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    kind, value = "error", LLMDeadlineExceeded(f"{call_type} exceeded its deadline")
+                if kind == "chunk":
+                    started = True
+                    try:
+                        yield value
+                    except GeneratorExit:
+                        # Consumer stopped reading; no verdict on the service
+                        breaker.release_trial()
+                        raise
+                elif kind == "end":
+                    breaker.record_success()
+                    result.prompt_tokens, result.response_tokens = value.prompt_tokens, value.response_tokens
+                    return
+                else:
+                    break
+
+            if not is_transient(value):
+                breaker.record_success()
+                raise value
+            breaker.record_failure()
+            delay = _backoff(attempt)
+            if started or attempt >= LLM_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                raise value
+            attempt += 1
+            record_retry(call_type)
+            time.sleep(delay)
+
+    result._chunks = consume()
+    return result
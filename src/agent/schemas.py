@@ -0,0 +1,103 @@
+"""Structured output schemas for question generation and answer evaluation.
+
+The models are passed to the backend as the response schema, so Gemini
+replies with JSON in exactly this shape, and they validate the reply once
+when it arrives. Fields have no defaults because Gemini's schema format does
+not accept them; optional values are nullable instead.
+"""
+from typing import Iterable, Iterator, List, Literal, Optional
+
+from pydantic import BaseModel
+
+Difficulty = Literal["Easy", "Medium", "Hard"]
+
+
+class TechnicalQuestion(BaseModel):
+    question: str
+    difficulty: Difficulty
+    skill: str
+
+    def display_text(self) -> str:
+        """The question as shown to the candidate and stored in the question cache"""
+        return f"[Difficulty: {self.difficulty}] {self.question}"
+
+
+class QuestionSet(BaseModel):
+    questions: List[TechnicalQuestion]
+
+
+class Evaluation(BaseModel):
+    strengths: List[str]
+    areas_for_improvement: List[str]
+    overall_assessment: str
+    score: Optional[int]  # 0-10; None for fallback evaluations
+
+    def to_text(self) -> str:
+        """Plain-text rendering used in the PDF summary and the evaluation stream"""
+        lines = []
+        if self.strengths:
+            lines.append("Strengths:")
+            lines += [f"* {point}" for point in self.strengths]
+        if self.areas_for_improvement:
+            lines.append("Areas for improvement:")
+            lines += [f"* {point}" for point in self.areas_for_improvement]
+        lines.append("Overall assessment:")
+        lines.append(self.overall_assessment)
+        if self.score is not None:
+            lines.append(f"Score: {self.score}/10")
+        return "\n".join(lines)
+
+
+class BatchEvaluationItem(Evaluation):
+    question_number: int
+
+
+class BatchEvaluation(BaseModel):
+    evaluations: List[BatchEvaluationItem]
+
+
+def fallback_evaluation(message: str) -> Evaluation:
+    """Evaluation carrying only an explanatory message"""
+    return Evaluation(strengths=[], areas_for_improvement=[], overall_assessment=message, score=None)
+
+
+def strip_code_fence(text: str) -> str:
+    """Drop a Markdown code fence around a JSON reply"""
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
+
+
+def iter_json_array_items(chunks: Iterable[str]) -> Iterator[str]:
+    """Yield each object of the first array in a streamed JSON reply as soon as it is complete
+
+    Lets ``{"questions": [{...}, {...}]}`` be consumed one question at a time
+    while the reply is still streaming.
+    """
+    depth = 0
+    in_string = escaped = False
+    item: List[str] = []
+    for chunk in chunks:
+        for char in chunk:
+            if item:
+                item.append(char)
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "{[":
+                depth += 1
+                if char == "{" and depth == 3 and not item:
+                    item.append(char)
+            elif char in "}]":
+                depth -= 1
+                if depth == 2 and item:
+                    yield "".join(item)
+                    item = []
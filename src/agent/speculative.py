@@ -0,0 +1,107 @@
+"""Speculative technical question generation.
+
+Question generation is the slowest step of the interview and used to start only
+after the tech-stack form was submitted. ``SpeculativeQuestions`` starts it in
+the background from a guessed skill set (e.g. skills mentioned in the desired
+position or resume), and the interview stage adopts the result only when the
+candidate's final skill set canonicalizes to the same key. Anything else is
+cancelled if it has not started yet, or discarded when it finishes. The
+work runs on a stateless copy of the session's handler at background
+priority; when the candidate ends up waiting on it, ``adopt`` promotes it to
+interactive priority (or, if it has not started, leaves it to the caller to
+generate at interactive priority). Once the final skill set is known
+(``close``, or ``adopt``), late guesses such as one from a resume whose
+extraction finished after the tech-stack form start nothing.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from agent.rate_limiter import PromotablePriority, limiter, request_priority
+from config.settings import SPECULATIVE_WORKERS, SPECULATIVE_ADOPT_TIMEOUT
+from utils.question_cache import skill_set_key
+from utils.skill_taxonomy import get_skill_taxonomy
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Process-wide pool shared by every session's speculative work"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS,
+                                           thread_name_prefix="speculative-questions")
+        return _executor
+
+
+def guess_skills(text: str) -> List[str]:
+    """Taxonomy skills mentioned in free text such as a position title or resume"""
+    taxonomy = get_skill_taxonomy()
+    return [taxonomy.name(skill_id) for skill_id in taxonomy.find_in_text(text)]
+
+
+def _generate_in_background(handler, skills: List[str], priority: PromotablePriority) -> List[str]:
+    """Generate questions behind any interactive calls waiting on the rate limiter, until promoted"""
+    with request_priority(priority):
+        return handler.generate_technical_questions(skills)
+
+
+class SpeculativeQuestions:
+    def __init__(self):
+        self.key: Optional[str] = None
+        self.future: Optional[Future] = None
+        self.priority: Optional[PromotablePriority] = None
+        self.closed = False
+        # start() may also be called from the resume ingestion thread
+        self._lock = threading.Lock()
+
+    def start(self, handler, skills: List[str]) -> None:
+        """Start generating questions for a guessed skill set"""
+        key = skill_set_key(skills)
+        with self._lock:
+            if self.closed or not key or key == self.key:
+                return
+            self._cancel()
+            self.key = key
+            self.priority = PromotablePriority()
+            # A stateless copy: the script thread keeps using the session's handler meanwhile
+            self.future = _get_executor().submit(_generate_in_background, handler.evaluation_worker(),
+                                                 list(skills), self.priority)
+
+    def adopt(self, skills: List[str], timeout: float = SPECULATIVE_ADOPT_TIMEOUT) -> Optional[List[str]]:
+        """Return the speculative questions if they were generated for these skills"""
+        with self._lock:
+            self.closed = True
+            if self.future is None or skill_set_key(skills) != self.key:
+                self._cancel()
+                return None
+            future, priority = self.future, self.priority
+            self.key, self.future, self.priority = None, None, None
+
+        # The candidate is waiting now: work that has not started is better done at
+        # interactive priority by the caller, and work in progress is moved ahead
+        if future.cancel():
+            return None
+        limiter.promote(priority)
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            print(f"Discarding speculative questions: {str(e)}")
+            return None
+
+    def close(self) -> None:
+        """Keep the current guess but ignore any later ``start``; the final skill set is known"""
+        with self._lock:
+            self.closed = True
+
+    def cancel(self) -> None:
+        """Cancel pending work; a generation already running is simply discarded"""
+        with self._lock:
+            self._cancel()
+
+    def _cancel(self) -> None:
+        if self.future is not None:
+            self.future.cancel()
+        self.key, self.future, self.priority = None, None, None
@@ -1,12 +1,29 @@
 import streamlit as st
+import re
 import uuid
 from agent.conversation_handler import ConversationHandler
 import time
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from io import BytesIO
+from typing import Optional
+from agent.schemas import Evaluation
+from agent.speculative import SpeculativeQuestions, guess_skills
+from agent.evaluation_queue import EvaluationQueue, EvaluationQueueFull
+from config.settings import (
+    EVALUATION_MODE, EVALUATION_SUBMIT_TIMEOUT, STREAM_RESPONSES, SESSION_STORE_ENABLED, PDF_WAIT_TIMEOUT, RESUME_MAX_BYTES
+)
+from utils.metrics import start_exporters
+from utils.pdf_report import delete_session_pdfs, get_pdf_cache, payload_key, summary_payload
+from utils.render_cache import content_hash, render_cache
+from utils.blob_store import get_resume_store
+from utils.resume_ingest import IngestedResume, abandon_ingestion, get_resume_ingestor, release_session_resume
+from utils.session_manager import SessionManager
+from utils.session_store import SessionStore
+from utils.skill_taxonomy import get_skill_taxonomy
+
+# Interview state saved to the session store so a candidate can resume after a restart
+PERSISTED_KEYS = [
+    'current_stage', 'personal_info', 'tech_stack', 'tech_questions',
+    'tech_questions_initialized', 'current_question', 'responses', 'pdf_keys'
+]
 
 
 @st.cache_resource
@@ -203,6 +220,28 @@ def get_custom_css():
     """
 
 
+@st.cache_resource
+def start_metrics_exporters():
+    """Start the metrics endpoint/file flusher once per process"""
+    start_exporters()
+    return True
+
+def delete_session_files(session):
+    """Give back a deleted session's resume reference and delete its summary PDFs"""
+    release_session_resume(session)
+    delete_session_pdfs(session)
+
+@st.cache_resource
+def get_session_manager():
+    """Process-wide session manager, backed by the SQLite store when enabled"""
+    store = None
+    if SESSION_STORE_ENABLED:
+        store = SessionStore()
+        store.start()
+    manager = SessionManager(store=store, on_delete=delete_session_files)
+    manager.start_sweeper()
+    return manager
+
 def set_custom_css():
     st.markdown(get_custom_css(), unsafe_allow_html=True)
 
@@ -241,12 +280,16 @@ def handle_technical_interview(skills: list):
     # Initialize technical interview session if not already done
     if 'tech_questions_initialized' not in st.session_state:
         try:
-            # Generate questions based on skills
-            questions = st.session_state.conversation_handler.generate_technical_questions(skills)
+            # Adopt questions generated speculatively for the same skills, otherwise generate now
+            questions = None
+            if 'speculative_questions' in st.session_state:
+                questions = st.session_state.speculative_questions.adopt(skills)
+            if not questions:
+                questions = stream_technical_questions(skills)
             if not questions or len(questions) == 0:
                 st.error("Failed to generate technical questions. Please try again.")
                 if st.button("Restart Interview"):
-                    st.session_state.clear()
+                    start_new_interview()
                     st.rerun()
                 return
             
@@ -259,7 +302,7 @@ def handle_technical_interview(skills: list):
         except Exception as e:
             st.error(f"Error initializing technical interview: {str(e)}")
             if st.button("Restart Interview"):
-                st.session_state.clear()
+                start_new_interview()
                 st.rerun()
             return
 
@@ -276,7 +319,7 @@ def handle_technical_interview(skills: list):
     if not hasattr(st.session_state, 'tech_questions') or not st.session_state.tech_questions:
         st.error("No technical questions available. Please restart the interview.")
         if st.button("Restart Interview"):
-            st.session_state.clear()
+            start_new_interview()
             st.rerun()
         return
 
@@ -327,17 +370,26 @@ def handle_technical_interview(skills: list):
                 disabled=not answer
             )
 
-        if submit_button and answer:
+        if submit_button and answer and EVALUATION_MODE in ('background', 'batch'):
+            # Queue the evaluation (or keep the answer for the batch) and move on
+            try:
+                submit_answer_for_evaluation(current_question, answer)
+            except EvaluationQueueFull:
+                st.error("The evaluator is busy right now. Please submit your answer again in a moment.")
+                return
+            except Exception as e:
+                st.error(f"Error submitting answer: {str(e)}")
+                return
+            advance_interview(current_q, total_q)
+
+        elif submit_button and answer:
             with st.spinner(""):  # Empty spinner to prevent double spinners
                 st.markdown("""
                     <div class="loading-spinner"></div>
                     <p class="processing-text" style="text-align: center;">AI is analyzing your response...</p>
                 """, unsafe_allow_html=True)
                 try:
-                    response = st.session_state.conversation_handler.evaluate_answer(
-                        current_question,
-                        answer
-                    )
+                    evaluation = stream_evaluation(current_question, answer)
                     
                     # Store response
                     if 'responses' not in st.session_state:
@@ -346,24 +398,12 @@ def handle_technical_interview(skills: list):
                     st.session_state.responses.append({
                         'question': current_question,
                         'answer': answer,
-                        'evaluation': response
+                        **evaluation
                     })
-                    
-                    # Show evaluation feedback
-                    st.markdown("""
-                        <div style="margin-top: 1rem; padding: 1rem; background-color: #f8f9fa; border-radius: 10px;">
-                            <h4 style="color: #1976d2;">Evaluation Feedback:</h4>
-                    """, unsafe_allow_html=True)
-                    st.write(response)
-                    st.markdown("</div>", unsafe_allow_html=True)
+                    response_card_html(st.session_state.responses[-1])
                     
                     # Progress to next question or complete
-                    if current_q + 1 < total_q:
-                        st.session_state.current_question += 1
-                        st.rerun()
-                    else:
-                        st.session_state.current_stage = 'completed'
-                        st.rerun()
+                    advance_interview(current_q, total_q)
                         
                 except Exception as e:
                     st.error(f"Error evaluating answer: {str(e)}")
@@ -372,9 +412,154 @@ def handle_technical_interview(skills: list):
     except IndexError:
         st.error("An error occurred accessing the current question. Resetting interview...")
         if st.button("Reset Interview"):
-            st.session_state.clear()
+            start_new_interview()
             st.rerun()
 
+def stream_technical_questions(skills: list) -> list:
+    """Generate questions, showing each one as soon as it has been generated"""
+    handler = st.session_state.conversation_handler
+    if not STREAM_RESPONSES:
+        return handler.generate_technical_questions(skills)
+
+    st.markdown("""
+        <p class="processing-text" style="text-align: center;">Analyzing your skills and generating relevant questions...</p>
+    """, unsafe_allow_html=True)
+    placeholder = st.empty()
+    questions = []
+    for question in handler.generate_technical_questions_stream(skills):
+        questions.append(question)
+        placeholder.markdown("\n".join(f"{i}. {q}" for i, q in enumerate(questions, 1)))
+    return questions
+
+def stream_evaluation(question: str, answer: str) -> dict:
+    """Evaluate an answer, rendering the feedback progressively as it arrives
+
+    Returns the response fields to store: the evaluation text and, when the
+    evaluation arrived as structured JSON, its parsed form.
+    """
+    handler = st.session_state.conversation_handler
+    st.markdown("""
+        <div style="margin-top: 1rem; padding: 1rem; background-color: #f8f9fa; border-radius: 10px;">
+            <h4 style="color: #1976d2;">Evaluation Feedback:</h4>
+    """, unsafe_allow_html=True)
+    placeholder = st.empty()
+    if STREAM_RESPONSES:
+        # Streamed as free text so it can be shown while it arrives
+        response = ""
+        for chunk in handler.evaluate_answer_stream(question, answer):
+            response += chunk
+            placeholder.markdown(response)
+        result = {'evaluation': response}
+    else:
+        result = evaluation_fields(handler.evaluate_answer(question, answer))
+        placeholder.write(result['evaluation'])
+    st.markdown("</div>", unsafe_allow_html=True)
+    return result
+
+def evaluation_fields(evaluation: Evaluation) -> dict:
+    """Response fields for a structured evaluation"""
+    return {'evaluation': evaluation.to_text(), 'evaluation_data': evaluation.model_dump()}
+
+def advance_interview(current_q: int, total_q: int):
+    """Move to the next question, or to the completion page after the last one"""
+    if current_q + 1 < total_q:
+        st.session_state.current_question += 1
+    else:
+        st.session_state.current_stage = 'completed'
+    st.rerun()
+
+def submit_answer_for_evaluation(question: str, answer: str):
+    """Store the answer and queue its evaluation in the background"""
+    if 'responses' not in st.session_state:
+        st.session_state.responses = []
+
+    if EVALUATION_MODE == 'batch':
+        # Evaluated together with the other answers on the completion page
+        st.session_state.responses.append({
+            'question': question,
+            'answer': answer,
+            'evaluation': None
+        })
+        return
+
+    evaluation_id = queue_evaluation(len(st.session_state.responses), question, answer)
+    st.session_state.responses.append({
+        'question': question,
+        'answer': answer,
+        'evaluation': None,
+        'evaluation_id': evaluation_id
+    })
+
+def queue_evaluation(index: int, question: str, answer: str,
+                     timeout: Optional[float] = EVALUATION_SUBMIT_TIMEOUT) -> int:
+    """Queue the evaluation of response ``index``; the worker also writes the result to the stored session"""
+    if 'evaluation_queue' not in st.session_state:
+        st.session_state.evaluation_queue = EvaluationQueue()
+    manager = get_session_manager()
+    session_id = st.session_state.session_id
+
+    def on_done(status, value):
+        fields = outcome_fields(status, value)
+
+        def fill(session):
+            responses = session.get('responses') or []
+            if index < len(responses) and responses[index].get('question') == question \
+                    and responses[index].get('evaluation') is None:
+                updated = list(responses)
+                updated[index] = {**responses[index], **fields}
+                session['responses'] = updated
+        try:
+            manager.modify_session(session_id, fill)
+        except Exception as e:
+            print(f"Error saving evaluation: {str(e)}")
+
+    return st.session_state.evaluation_queue.submit(
+        st.session_state.conversation_handler, question, answer, timeout=timeout, on_done=on_done
+    )
+
+def outcome_fields(status: str, value) -> Optional[dict]:
+    """Response fields for a finished background evaluation, None while it is pending"""
+    if status == 'pending':
+        return None
+    if status == 'error':
+        return {'evaluation': f"Evaluation failed: {str(value)}", 'evaluation_failed': True}
+    return evaluation_fields(value)
+
+def collect_evaluations() -> int:
+    """Fill in finished background evaluations; returns how many are still pending"""
+    if EVALUATION_MODE == 'batch':
+        unevaluated = [r for r in st.session_state.responses if r.get('evaluation') is None]
+        if unevaluated:
+            with st.spinner("AI is evaluating your responses..."):
+                evaluations = st.session_state.conversation_handler.evaluate_answers_batch(
+                    [(r['question'], r['answer']) for r in unevaluated]
+                )
+            for resp, evaluation in zip(unevaluated, evaluations):
+                resp.update(evaluation_fields(evaluation))
+                response_card_html(resp)
+        return 0
+
+    queue = st.session_state.get('evaluation_queue')
+    pending = 0
+    for index, resp in enumerate(st.session_state.responses):
+        if resp.get('evaluation') is not None or queue is None:
+            continue
+        if 'evaluation_id' not in resp:
+            # Restored while the evaluator was busy; try to queue it again
+            try:
+                resp['evaluation_id'] = queue_evaluation(index, resp['question'], resp['answer'], timeout=0)
+            except EvaluationQueueFull:
+                pending += 1
+                continue
+        fields = outcome_fields(*queue.result(resp['evaluation_id']))
+        if fields is None:
+            pending += 1
+            continue
+        resp.update(fields)
+        if not resp.get('evaluation_failed'):
+            response_card_html(resp)
+    return pending
+
 def handle_completion():
     """Handle the completion stage with results summary and PDF download"""
     st.markdown("""
@@ -385,168 +570,78 @@ def handle_completion():
     """, unsafe_allow_html=True)
 
     if hasattr(st.session_state, 'responses') and st.session_state.responses:
-        # Display responses
+        pending = collect_evaluations()
+        if pending:
+            st.info(f"{pending} evaluation(s) are still being prepared.")
+            if st.button("Refresh Evaluations"):
+                st.rerun()
+
+        # Display responses; evaluated ones come pre-rendered from the render cache
         for i, resp in enumerate(st.session_state.responses, 1):
             with st.expander(f"Question {i}", expanded=True):
-                st.markdown(f"""
-                    <div class="question-card">
-                        <p style="font-size: 1.1rem; font-weight: 500;">{resp['question']}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-                st.markdown(f"""
-                    <div class="question-card">
-                        <p><strong>Your Answer:</strong></p>
-                        <p>{resp['answer']}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-                st.markdown(f"""
-                    <div class="question-card">
-                        <p><strong>AI Evaluation:</strong></p>
-                        {format_ai_response_html(resp['evaluation'])}
-                    </div>
-                """, unsafe_allow_html=True)
+                if resp['evaluation'] is None:
+                    st.markdown(question_answer_html(resp) + """
+        <div class="question-card">
+            <p><strong>AI Evaluation:</strong></p>
+            <p class="processing-text">⏳ Evaluation in progress...</p>
+        </div>
+    """, unsafe_allow_html=True)
+                elif resp.get('evaluation_failed'):
+                    st.markdown(question_answer_html(resp), unsafe_allow_html=True)
+                    st.error(resp['evaluation'])
+                else:
+                    st.markdown(response_card_html(resp), unsafe_allow_html=True)
         
         # Generate and offer PDF download
         col1, col2 = st.columns([1, 2])
         with col1:
-            if st.button("Generate PDF Summary", type="primary"):
-                with st.spinner("Generating your comprehensive interview summary..."):
-                    try:
-                        # Create a dictionary with only the necessary data
-                        summary_data = {
-                            'personal_info': dict(st.session_state.personal_info) if hasattr(st.session_state, 'personal_info') else {},
-                            'tech_stack': list(st.session_state.tech_stack) if hasattr(st.session_state, 'tech_stack') else [],
-                            'responses': [
-                                {
-                                    'question': r['question'],
-                                    'answer': r['answer'],
-                                    'evaluation': r['evaluation']
-                                } for r in st.session_state.responses
-                            ]
-                        }
-                        pdf_buffer = generate_interview_summary(summary_data)
-                        if pdf_buffer:
-                            st.session_state.pdf_buffer = pdf_buffer
-                            st.session_state.pdf_generated = True
-                            st.rerun()
-                    except Exception as e:
-                        st.error(f"Error generating PDF summary: {str(e)}")
-        
+            if st.button("Generate PDF Summary", type="primary", disabled=pending > 0):
+                try:
+                    payload = summary_payload(
+                        st.session_state.get('personal_info') or {},
+                        st.session_state.get('tech_stack') or [],
+                        st.session_state.responses
+                    )
+                    # Other sessions may share the file; this one holds one reference per key
+                    pdf_keys = st.session_state.setdefault('pdf_keys', [])
+                    hold = payload_key(payload) not in pdf_keys
+                    st.session_state.pdf_key = get_pdf_cache().submit(payload, hold=hold)
+                    if hold:
+                        pdf_keys.append(st.session_state.pdf_key)
+                        save_session()
+                except Exception as e:
+                    st.error(f"Error generating PDF summary: {str(e)}")
+
         with col2:
-            if hasattr(st.session_state, 'pdf_generated') and st.session_state.pdf_generated:
-                st.download_button(
-                    label="📥 Download Interview Summary",
-                    data=st.session_state.pdf_buffer.getvalue(),
-                    file_name="interview_summary.pdf",
-                    mime="application/pdf",
-                    key="download_pdf"
-                )
+            if st.session_state.get('pdf_key'):
+                show_pdf_download(st.session_state.pdf_key)
     else:
         st.warning("No interview responses found. Please complete the interview first.")
         if st.button("Start New Interview"):
-            st.session_state.clear()
+            start_new_interview()
             st.rerun()
 
-@st.cache_data
-def generate_interview_summary(data: dict):
-    """Generate a PDF summary of the interview with proper error handling"""
-    try:
-        # Initialize PDF buffer
-        buffer = BytesIO()
-        
-        # Set up the document with margins
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Initialize story and styles
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Add title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1
-        )
-        story.append(Paragraph("Technical Interview Summary", title_style))
-        
-        # Add personal information section
-        if data.get('personal_info'):
-            section_style = ParagraphStyle(
-                'CustomSection',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceBefore=20,
-                spaceAfter=12
+def show_pdf_download(pdf_key: str):
+    """Offer the summary PDF once the worker pool has built it"""
+    with st.spinner("Generating your comprehensive interview summary..."):
+        status, value = get_pdf_cache().result(pdf_key, timeout=PDF_WAIT_TIMEOUT)
+    if status == 'pending':
+        st.info("Your PDF summary is still being prepared.")
+        if st.button("Refresh PDF"):
+            st.rerun()
+    elif status == 'error':
+        st.error(f"Error generating PDF: {str(value)}")
+        del st.session_state.pdf_key
+    else:
+        # Streamed from the on-disk cache rather than held in session state
+        with open(value, 'rb') as pdf_file:
+            st.download_button(
+                label="📥 Download Interview Summary",
+                data=pdf_file,
+                file_name="interview_summary.pdf",
+                mime="application/pdf",
+                key="download_pdf"
             )
-            story.append(Paragraph("Personal Information", section_style))
-            
-            info = data['personal_info']
-            table_data = [
-                ["Full Name", info.get('full_name', 'N/A')],
-                ["Email", info.get('email', 'N/A')],
-                ["Phone", info.get('phone', 'N/A')],
-                ["Experience", info.get('experience', 'N/A')],
-                ["Position", info.get('desired_position', 'N/A')],
-                ["Location", info.get('location', 'N/A')]
-            ]
-            
-            table = Table(table_data, colWidths=[150, 300])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(table)
-            story.append(Spacer(1, 20))
-        
-        # Add technical skills section
-        if data.get('tech_stack'):
-            story.append(Paragraph("Technical Skills", styles['Heading2']))
-            skills_text = ", ".join(data['tech_stack'])
-            story.append(Paragraph(skills_text, styles['Normal']))
-            story.append(Spacer(1, 20))
-
-        # Add interview responses section
-        if data.get('responses'):
-            story.append(Paragraph("Interview Questions and Evaluations", styles['Heading2']))
-
-            for i, resp in enumerate(data['responses'], 1):
-                # Question
-                story.append(Paragraph(f"Question {i}:", styles['Heading3']))
-                story.append(Paragraph(resp['question'], styles['Normal']))
-                story.append(Spacer(1, 10))
-
-                # Answer
-                story.append(Paragraph("Your Answer:", styles['Heading4']))
-                story.append(Paragraph(resp['answer'], styles['Normal']))
-                story.append(Spacer(1, 10))
-
-                # Evaluation
-                story.append(Paragraph("AI Evaluation:", styles['Heading4']))
-                story.append(Paragraph(resp['evaluation'], styles['Normal']))
-                story.append(Spacer(1, 20))
-
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
-
-    except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
-        return None
 
 def preprocess_ai_response(response: str) -> dict:
     """Cache AI response preprocessing"""
@@ -610,9 +705,38 @@ def preprocess_ai_response(response: str) -> dict:
             'overall_assessment': response  # Return original response as overall assessment
         }
 
-def format_ai_response_html(response: str) -> str:
-    """Format AI response for HTML display"""
-    sections = preprocess_ai_response(response)
+def question_answer_html(resp: dict) -> str:
+    """Question and answer cards of one response"""
+    return f"""
+        <div class="question-card">
+            <p style="font-size: 1.1rem; font-weight: 500;">{resp['question']}</p>
+        </div>
+        <div class="question-card">
+            <p><strong>Your Answer:</strong></p>
+            <p>{resp['answer']}</p>
+        </div>
+    """
+
+def response_card_html(resp: dict) -> str:
+    """Full HTML of an evaluated response, rendered once per content hash"""
+    if not resp.get('render_key'):
+        resp['render_key'] = content_hash(
+            resp['question'], resp['answer'], resp['evaluation'], resp.get('evaluation_data')
+        )
+    return render_cache.get_or_render(resp['render_key'], lambda: question_answer_html(resp) + f"""
+        <div class="question-card">
+            <p><strong>AI Evaluation:</strong></p>
+            {format_ai_response_html(resp['evaluation'], resp.get('evaluation_data'))}
+        </div>
+    """)
+
+def format_ai_response_html(response: str, data: Optional[dict] = None) -> str:
+    """Format AI response for HTML display
+
+    Uses the structured evaluation when there is one; free-text evaluations
+    (streamed, or saved before structured output) are parsed from the text.
+    """
+    sections = data or preprocess_ai_response(response)
 
     html = '<div class="ai-evaluation">'
 
@@ -638,6 +762,11 @@ def format_ai_response_html(response: str) -> str:
         html += f'<p>{sections["overall_assessment"]}</p>'
         html += '</div>'
 
+    if sections.get('score') is not None:
+        html += '<div class="evaluation-section">'
+        html += f'<h4 style="color: #1976d2;">Score: {sections["score"]}/10</h4>'
+        html += '</div>'
+
     html += '</div>'
     return html
 
@@ -709,6 +838,9 @@ def create_personal_info_form():
 
         if submit_button:
             # Check if all required fields are filled
+            if resume is not None and resume.size > RESUME_MAX_BYTES:
+                st.error(f"Resume must be smaller than {RESUME_MAX_BYTES // (1024 * 1024)} MB.")
+                return None, False
             if all([full_name, email, phone, experience, position, location, resume]):
                 return {
                     "full_name": full_name,
@@ -732,90 +864,17 @@ def create_tech_stack_form():
             
         """, unsafe_allow_html=True)
 
-        # Programming Languages - Split into 2 columns, 4 skills each
-        languages = []
-        st.markdown("### Programming Languages")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.checkbox("Python"): languages.append("Python")
-            if st.checkbox("JavaScript"): languages.append("JavaScript")
-            if st.checkbox("Java"): languages.append("Java")
-            if st.checkbox("C++"): languages.append("C++")
-
-        with col2:
-            if st.checkbox("C#"): languages.append("C#")
-            if st.checkbox("Ruby"): languages.append("Ruby")
-            if st.checkbox("PHP"): languages.append("PHP")
-            if st.checkbox("Swift"): languages.append("Swift")
-
-        # Frontend - Split into 2 columns, 4 skills each
-        frontend = []
-        st.markdown("### Frontend Technologies")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.checkbox("React"): frontend.append("React")
-            if st.checkbox("Angular"): frontend.append("Angular")
-            if st.checkbox("Vue.js"): frontend.append("Vue.js")
-            if st.checkbox("Svelte"): frontend.append("Svelte")
-
-        with col2:
-            if st.checkbox("HTML5"): frontend.append("HTML5")
-            if st.checkbox("CSS3"): frontend.append("CSS3")
-            if st.checkbox("SASS/SCSS"): frontend.append("SASS/SCSS")
-            if st.checkbox("Webpack"): frontend.append("Webpack")
-
-        # Backend - Split into 2 columns, 4 skills each
-        backend = []
-        st.markdown("### Backend Technologies")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.checkbox("Node.js"): backend.append("Node.js")
-            if st.checkbox("Django"): backend.append("Django")
-            if st.checkbox("Flask"): backend.append("Flask")
-            if st.checkbox("Spring Boot"): backend.append("Spring Boot")
-
-        with col2:
-            if st.checkbox("Laravel"): backend.append("Laravel")
-            if st.checkbox("Express.js"): backend.append("Express.js")
-            if st.checkbox("FastAPI"): backend.append("FastAPI")
-            if st.checkbox("Ruby on Rails"): backend.append("Ruby on Rails")
-
-        # Databases - Split into 2 columns, 4 skills each
-        databases = []
-        st.markdown("### Databases")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.checkbox("PostgreSQL"): databases.append("PostgreSQL")
-            if st.checkbox("MySQL"): databases.append("MySQL")
-            if st.checkbox("MongoDB"): databases.append("MongoDB")
-            if st.checkbox("Redis"): databases.append("Redis")
-
-        with col2:
-            if st.checkbox("SQLite"): databases.append("SQLite")
-            if st.checkbox("Oracle"): databases.append("Oracle")
-            if st.checkbox("Microsoft SQL Server"): databases.append("Microsoft SQL Server")
-            if st.checkbox("Cassandra"): databases.append("Cassandra")
-
-        # Cloud & DevOps - Split into 2 columns, 4 skills each
-        cloud_devops = []
-        st.markdown("### Cloud & DevOps")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.checkbox("AWS"): cloud_devops.append("AWS")
-            if st.checkbox("Azure"): cloud_devops.append("Azure")
-            if st.checkbox("Google Cloud"): cloud_devops.append("Google Cloud")
-            if st.checkbox("Docker"): cloud_devops.append("Docker")
-
-        with col2:
-            if st.checkbox("Kubernetes"): cloud_devops.append("Kubernetes")
-            if st.checkbox("Jenkins"): cloud_devops.append("Jenkins")
-            if st.checkbox("Git"): cloud_devops.append("Git")
-            if st.checkbox("GitHub Actions"): cloud_devops.append("GitHub Actions")
+        # Each category is split into 2 columns, 4 skills each
+        taxonomy = get_skill_taxonomy()
+        all_skills = []
+        for category, options in taxonomy.form_options().items():
+            st.markdown(f"### {category}")
+            columns = st.columns(2)
+            half = (len(options) + 1) // 2
+            for i, skill in enumerate(options):
+                with columns[0 if i < half else 1]:
+                    if st.checkbox(skill):
+                        all_skills.append(skill)
 
         # Other Skills
         other_skills = st.text_area(
@@ -830,13 +889,13 @@ def create_tech_stack_form():
         )
 
         if submit_button:
-            all_skills = languages + frontend + backend + databases + cloud_devops
             if other_skills:
-                additional_skills = [skill.strip() for skill in other_skills.split(',') if skill.strip()]
-                all_skills.extend(additional_skills)
+                all_skills.extend(re.split(r'[,;\n]', other_skills))
 
+            # "nodejs" typed next to a ticked "Node.js" is one skill
+            all_skills = taxonomy.display_names(all_skills)
             if all_skills:
-                return list(set(all_skills)), True  # Remove duplicates
+                return all_skills, True
             else:
                 st.error("Please select at least one skill.")
                 return None, False
@@ -863,10 +922,138 @@ def manage_session_state():
             'current_question': 0
         })
 
+def start_speculative_generation(info: dict):
+    """Start generating questions for the skills mentioned in the candidate's details"""
+    if 'speculative_questions' not in st.session_state:
+        st.session_state.speculative_questions = SpeculativeQuestions()
+    speculative = st.session_state.speculative_questions
+    handler = st.session_state.conversation_handler
+
+    def start(text: str):
+        skills = guess_skills(text)
+        if skills:
+            speculative.start(handler, skills)
+
+    position = info.get('desired_position', '')
+    start(position)
+    if 'resume_job' in st.session_state:
+        # Refine the guess with the resume once its text is extracted (on the ingestion thread)
+        def on_resume(job):
+            # Too late once the tech-stack form is submitted or the questions were adopted
+            if speculative.closed:
+                return
+            if not job.cancelled() and job.exception() is None:
+                start(" ".join([position, job.result().text]))
+        st.session_state.resume_job.add_done_callback(on_resume)
+
+def start_resume_ingestion(info: dict) -> dict:
+    """Hand the uploaded resume to the ingestion stage; the session keeps only its name"""
+    info = dict(info)
+    upload = info.pop('resume', None)
+    if upload is not None:
+        info['resume_name'] = upload.name
+        abandon_resume_job()  # superseded by this upload
+        st.session_state.resume_job = get_resume_ingestor().submit(upload)
+    return info
+
+def collect_resume():
+    """Store the extracted resume text and digest once ingestion has finished"""
+    job = st.session_state.get('resume_job')
+    if job is None or not job.done():
+        return
+    del st.session_state.resume_job
+    try:
+        resume: IngestedResume = job.result()
+    except Exception as e:
+        print(f"Error ingesting resume: {str(e)}")
+        return
+    info = st.session_state.get('personal_info')
+    # Every ingestion took a reference; the session keeps only the newest one
+    superseded = info.get('resume_digest') if info else resume.digest
+    if info:
+        info.update({
+            'resume_text': resume.text,
+            'resume_digest': resume.digest,
+        })
+    if superseded:
+        get_resume_store().release(superseded)
+
+def restore_session(session_id: str) -> bool:
+    """Load a saved interview into st.session_state; returns False for a new session"""
+    manager = get_session_manager()
+    try:
+        data = manager.get_session_data(session_id)
+        if data is None:
+            manager.create_session(session_id)
+            return False
+    except Exception as e:
+        print(f"Error restoring session: {str(e)}")
+        return False
+
+    for key in PERSISTED_KEYS:
+        if key in data:
+            st.session_state[key] = data[key]
+
+    # Background evaluations queued by the previous process are lost; queue them again
+    if EVALUATION_MODE == 'background':
+        for index, resp in enumerate(st.session_state.get('responses', [])):
+            if resp.get('evaluation') is None:
+                if 'evaluation_queue' not in st.session_state:
+                    st.session_state.evaluation_queue = EvaluationQueue()
+                try:
+                    resp['evaluation_id'] = queue_evaluation(index, resp['question'], resp['answer'])
+                except EvaluationQueueFull:
+                    pass  # queued again by collect_evaluations
+    return True
+
+def persisted_response(resp: dict, stored: Optional[dict], queue: Optional[EvaluationQueue]) -> dict:
+    """A response as saved: without its queue id, and with a finished background evaluation filled in"""
+    saved = {k: v for k, v in resp.items() if k != 'evaluation_id'}
+    if saved.get('evaluation') is None and queue is not None and 'evaluation_id' in resp:
+        saved.update(outcome_fields(*queue.result(resp['evaluation_id'])) or {})
+    # Written by the evaluation worker since this run last collected results
+    if saved.get('evaluation') is None and stored and stored.get('question') == resp.get('question'):
+        saved.update({k: stored[k] for k in ('evaluation', 'evaluation_data', 'evaluation_failed') if k in stored})
+    return saved
+
+def save_session():
+    """Queue the persisted part of st.session_state for write-behind"""
+    data = {key: st.session_state[key] for key in PERSISTED_KEYS if key in st.session_state}
+    queue = st.session_state.get('evaluation_queue')
+
+    def save(session):
+        # Under the session lock, so a worker's result is either seen here or written after
+        stored = session.get('responses') or []
+        data['responses'] = [
+            persisted_response(resp, stored[i] if i < len(stored) else None, queue)
+            for i, resp in enumerate(data.get('responses', []))
+        ]
+        session.update(data)
+
+    try:
+        get_session_manager().modify_session(st.session_state.session_id, save)
+    except Exception as e:
+        print(f"Error saving session: {str(e)}")
+
+def abandon_resume_job():
+    """Drop a pending resume ingestion without leaking the blob reference it takes"""
+    job = st.session_state.get('resume_job')
+    if job is not None:
+        del st.session_state.resume_job
+        abandon_ingestion(job)
+
+def start_new_interview():
+    """Clear the interview and drop the session id, so the next run starts a fresh session"""
+    abandon_resume_job()
+    st.session_state.clear()
+    if 'session' in st.query_params:
+        del st.query_params['session']
+
 def safe_state_reset():
     """Safely reset application state"""
     keep_keys = ['initialized', 'session_id']
     preserved_values = {k: st.session_state[k] for k in keep_keys if k in st.session_state}
+    abandon_resume_job()
     st.session_state.clear()
     st.session_state.update(preserved_values)
     st.session_state.current_stage = 'greeting'
@@ -884,13 +1071,19 @@ def track_interview_progress():
         st.session_state.metrics = {
             'start_time': time.time(),
             'questions_answered': 0,
-            'total_time_spent': 0
+            'total_time_spent': 0,
+            'prompt_tokens': {},
+            'latency': {}
         }
     
     if hasattr(st.session_state, 'responses'):
         st.session_state.metrics['questions_answered'] = len(st.session_state.responses)
         st.session_state.metrics['total_time_spent'] = time.time() - st.session_state.metrics['start_time']
 
+    if hasattr(st.session_state, 'conversation_handler'):
+        st.session_state.metrics['prompt_tokens'] = st.session_state.conversation_handler.get_prompt_token_metrics()
+        st.session_state.metrics['latency'] = st.session_state.conversation_handler.get_latency_metrics()
+
 
 def main():
     st.set_page_config(
@@ -901,14 +1094,22 @@ def main():
     )
 
     set_custom_css()
+    start_metrics_exporters()
 
     # Initialize session state
     if 'initialized' not in st.session_state:
         st.session_state.clear()  # Clear any existing state
         st.session_state.initialized = True
         st.session_state.current_stage = 'greeting'
-        st.session_state.session_id = str(uuid.uuid4())
         st.session_state.conversation_handler = ConversationHandler()
+        # The session id lives in the URL, so reloading or reopening it resumes the interview
+        session_id = st.query_params.get('session') or str(uuid.uuid4())
+        st.query_params['session'] = session_id
+        st.session_state.session_id = session_id
+        restore_session(session_id)
+
+    # Count script runs per session (reported by benchmarks/load_test.py)
+    st.session_state.script_runs = st.session_state.get('script_runs', 0) + 1
 
     # Header with Logo and Title
     st.markdown("""
@@ -943,7 +1144,8 @@ def main():
     if st.session_state.current_stage == 'greeting':
         info, submitted = handle_greeting()
         if submitted and info:
-            st.session_state.personal_info = info
+            st.session_state.personal_info = start_resume_ingestion(info)
+            start_speculative_generation(st.session_state.personal_info)
             st.session_state.current_stage = 'tech_stack'
             st.rerun()
 
@@ -957,6 +1159,8 @@ def main():
         skills, submitted = handle_tech_stack(st.session_state.personal_info['full_name'])
         if submitted and skills:
             st.session_state.tech_stack = skills
+            if 'speculative_questions' in st.session_state:
+                st.session_state.speculative_questions.close()
             st.session_state.current_stage = 'tech_questions'
             st.rerun()
 
@@ -966,5 +1170,9 @@ def main():
     elif st.session_state.current_stage == 'completed':
         handle_completion()
 
+    collect_resume()
+    track_interview_progress()
+    save_session()
+
 if __name__ == "__main__":
     main()
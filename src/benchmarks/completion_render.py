@@ -0,0 +1,109 @@
+"""Micro-benchmark of the completion page's per-rerun rendering work.
+
+Measures the time one rerun spends producing evaluation HTML as the number of
+responses grows:
+
+* ``before``: what every rerun used to do, building the question/answer cards
+  and parsing and rendering each free-text evaluation from scratch;
+* ``after``: looking up each response's pre-rendered card in the render cache
+  (the cache is filled once, when the evaluation arrives).
+
+Only the rendering work is timed, not Streamlit's own element handling::
+
+    cd src
+    python -m benchmarks.completion_render --responses 5 20 50 100 --output render.json
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from agent.llm_backend import StubBackend
+from agent.schemas import Evaluation
+from app import format_ai_response_html, response_card_html
+
+
+def make_responses(count: int) -> List[Dict]:
+    """Evaluated responses shaped like the ones stored in st.session_state"""
+    backend = StubBackend(latency="fixed:0")
+    responses = []
+    for i in range(count):
+        question = f"[Difficulty: Medium] Describe how you would debug a performance problem in service {i}."
+        answer = f"I would start by profiling request {i} end to end. " * 10
+        evaluation = Evaluation.model_validate_json(backend.generate(
+            f"Evaluate answer {i}", response_schema=Evaluation).text)
+        responses.append({
+            'question': question,
+            'answer': answer,
+            'evaluation': evaluation.to_text(),
+            'evaluation_data': evaluation.model_dump(),
+        })
+    return responses
+
+
+def render_before(responses: List[Dict]) -> List[str]:
+    """The former completion-page loop: three blocks per response, parsed every rerun"""
+    blocks = []
+    for resp in responses:
+        blocks.append(f"""
+            <div class="question-card">
+                <p style="font-size: 1.1rem; font-weight: 500;">{resp['question']}</p>
+            </div>
+        """)
+        blocks.append(f"""
+            <div class="question-card">
+                <p><strong>Your Answer:</strong></p>
+                <p>{resp['answer']}</p>
+            </div>
+        """)
+        blocks.append(f"""
+            <div class="question-card">
+                <p><strong>AI Evaluation:</strong></p>
+                {format_ai_response_html(resp['evaluation'])}
+            </div>
+        """)
+    return blocks
+
+
+def render_after(responses: List[Dict]) -> List[str]:
+    return [response_card_html(resp) for resp in responses]
+
+
+def time_rerun(render, responses: List[Dict], reruns: int) -> float:
+    """Mean milliseconds per rerun"""
+    start = time.perf_counter()
+    for _ in range(reruns):
+        render(responses)
+    return (time.perf_counter() - start) / reruns * 1000
+
+
+def run_benchmark(counts: List[int], reruns: int) -> Dict:
+    results = {}
+    for count in counts:
+        responses = make_responses(count)
+        # Evaluations are rendered into the cache as they arrive, before any rerun
+        render_after(responses)
+        results[str(count)] = {
+            'before_ms': time_rerun(render_before, responses, reruns),
+            'after_ms': time_rerun(render_after, responses, reruns),
+        }
+    return {'reruns': reruns, 'ms_per_rerun': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark completion-page evaluation rendering")
+    parser.add_argument("--responses", type=int, nargs="+", default=[5, 10, 20, 50, 100])
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.responses, args.reruns)
+    for count, timings in results['ms_per_rerun'].items():
+        print(f"{count:>4} responses  before: {timings['before_ms']:.3f} ms  after: {timings['after_ms']:.3f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
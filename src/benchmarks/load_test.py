@@ -0,0 +1,290 @@
+"""Concurrent-candidate load test for the Streamlit interview flow.
+
+Drives simulated candidates through greeting -> tech_stack -> tech_questions
+-> completed against the stub LLM backend, and reports throughput, per-stage
+latency percentiles, script runs per candidate and peak RSS. Two drivers:
+
+* ``apptest`` runs the real script with Streamlit's AppTest. AppTest mocks a
+  process-global runtime, so concurrent candidates run in separate worker
+  processes (like replicas sharing the on-disk caches).
+* ``headless`` runs many candidates as threads in one process, calling the
+  same handler, speculation and evaluation-queue code the stage handlers use,
+  so they contend for the shared backend and pools like sessions on one
+  server. It does not render pages, so it reports no script runs.
+
+The question cache, session store, PDF cache and resume store of a run live
+in ``--data-dir`` (a fresh temporary directory by default), never in the
+working directory. Results are written as JSON so runs can be compared::
+
+    cd src
+    python -m benchmarks.load_test --candidates 100 --concurrency 25 --output load.json
+    python -m benchmarks.load_test --candidates 100 --concurrency 25 --baseline load.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+STAGES = ['greeting', 'tech_stack', 'tech_questions', 'completed']
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def find_button(at, label: str):
+    for button in at.button:
+        if button.label == label:
+            return button
+    return None
+
+
+def run_candidate(candidate_id: int, skills: List[str], timeout: float) -> Dict:
+    """Take one simulated candidate through the whole interview with AppTest"""
+    from streamlit.testing.v1 import AppTest
+
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    # Greeting: render the form and submit personal information
+    start = time.perf_counter()
+    at.run()
+    info = {
+        "name": f"Candidate {candidate_id}",
+        "email": f"candidate{candidate_id}@example.com",
+        "phone": "+15551234567",
+        "experience": "3",
+        "position": f"{skills[0]} Developer",
+        "location": "Remote",
+    }
+    if hasattr(at, 'file_uploader') and len(at.file_uploader):
+        for key, value in info.items():
+            at.text_input(key=key).input(value)
+        at.file_uploader[0].set_value(("resume.pdf", b"%PDF-1.4 resume", "application/pdf"))
+        find_button(at, "Submit Information").click()
+        at.run()
+    else:
+        # Older AppTest versions cannot upload files, so seed the submitted details
+        at.session_state["personal_info"] = {
+            "full_name": info["name"], "email": info["email"], "phone": info["phone"],
+            "experience": info["experience"], "desired_position": info["position"],
+            "location": info["location"], "resume_name": None
+        }
+        at.session_state["current_stage"] = "tech_stack"
+        at.run()
+    timings['greeting'].append(time.perf_counter() - start)
+
+    # Tech stack: tick the candidate's skills and wait for the first question
+    start = time.perf_counter()
+    for checkbox in at.checkbox:
+        if checkbox.label in skills:
+            checkbox.check()
+    find_button(at, "Submit Technical Skills").click()
+    at.run()
+    timings['tech_stack'].append(time.perf_counter() - start)
+
+    # Interview: answer every question
+    while at.session_state["current_stage"] == 'tech_questions':
+        start = time.perf_counter()
+        at.text_area[0].input(f"Answer from candidate {candidate_id} " * 20)
+        at.run()
+        find_button(at, "Submit & Continue").click()
+        at.run()
+        timings['tech_questions'].append(time.perf_counter() - start)
+
+    # Completion: wait until every evaluation is shown
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    refresh = find_button(at, "Refresh Evaluations")
+    while refresh is not None and time.monotonic() < deadline:
+        time.sleep(0.1)
+        refresh.click()
+        at.run()
+        refresh = find_button(at, "Refresh Evaluations")
+    timings['completed'].append(time.perf_counter() - start)
+
+    return {
+        'timings': timings,
+        'script_runs': at.session_state["script_runs"],
+        'errors': [e.value for e in at.exception] + [e.value for e in at.error],
+        'completed': refresh is None and at.session_state["current_stage"] == 'completed'
+    }
+
+
+def run_headless_candidate(candidate_id: int, skills: List[str], timeout: float) -> Dict:
+    """Take one simulated candidate through the stage logic without rendering"""
+    from agent.conversation_handler import ConversationHandler
+    from agent.evaluation_queue import EvaluationQueue
+    from agent.speculative import SpeculativeQuestions, guess_skills
+    from config.settings import EVALUATION_MODE
+
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    errors: List[str] = []
+
+    start = time.perf_counter()
+    handler = ConversationHandler()
+    speculative = SpeculativeQuestions()
+    speculative.start(handler, guess_skills(f"{skills[0]} Developer"))
+    timings['greeting'].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    questions = speculative.adopt(skills) or handler.generate_technical_questions(skills)
+    timings['tech_stack'].append(time.perf_counter() - start)
+
+    queue = EvaluationQueue()
+    answers = []
+    for question in questions:
+        start = time.perf_counter()
+        answer = f"Answer from candidate {candidate_id} " * 20
+        if EVALUATION_MODE == 'background':
+            # A candidate would be asked to retry when the evaluator is busy; the driver just waits
+            queue.submit(handler, question, answer, timeout=None)
+        elif EVALUATION_MODE == 'batch':
+            answers.append((question, answer))
+        else:
+            handler.evaluate_answer(question, answer)
+        timings['tech_questions'].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    completed = True
+    if EVALUATION_MODE == 'batch':
+        handler.evaluate_answers_batch(answers)
+    elif EVALUATION_MODE == 'background':
+        completed = queue.wait(timeout)
+        for i in range(len(questions)):
+            status, value = queue.result(i)
+            if status == 'error':
+                errors.append(str(value))
+    timings['completed'].append(time.perf_counter() - start)
+
+    return {'timings': timings, 'script_runs': None, 'errors': errors, 'completed': completed}
+
+
+def _run_in_worker(args) -> Dict:
+    """ProcessPoolExecutor entry point for the AppTest driver"""
+    candidate_id, skills, timeout = args
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    return run_candidate(candidate_id, skills, timeout)
+
+
+def run_load_test(candidates: int, concurrency: int, timeout: float, seed: int, driver: str) -> Dict:
+    rng = random.Random(seed)
+    from config import settings
+    from utils.evaluation_cache import cache_stats as evaluation_cache_stats
+    from utils.question_bank import bank_stats
+    from utils.skill_taxonomy import get_skill_taxonomy
+    options = [skill for group in get_skill_taxonomy().form_options().values() for skill in group]
+    # A few popular combinations plus a long tail, like real hiring drives
+    popular = [rng.sample(options, 3) for _ in range(5)]
+    plans = [(i, rng.choice(popular) if rng.random() < 0.7 else rng.sample(options, rng.randint(1, 5)), timeout)
+             for i in range(candidates)]
+
+    start = time.perf_counter()
+    if driver == 'apptest':
+        # AppTest replaces __main__ in the worker, so refer to the worker by module path
+        from benchmarks.load_test import _run_in_worker as worker
+        with ProcessPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(worker, plans))
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda args: run_headless_candidate(*args), plans))
+    elapsed = time.perf_counter() - start
+
+    stages = {}
+    for stage in STAGES:
+        values = [t for r in results for t in r['timings'][stage]]
+        stages[stage] = {
+            'count': len(values),
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+        }
+    runs = [r['script_runs'] for r in results if r['script_runs'] is not None]
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {
+        'driver': driver,
+        'candidates': candidates,
+        'concurrency': concurrency,
+        'elapsed_seconds': elapsed,
+        'completed': sum(1 for r in results if r['completed']),
+        'throughput_per_minute': sum(1 for r in results if r['completed']) / elapsed * 60,
+        'stages': stages,
+        'script_runs': {'mean': sum(runs) / len(runs), 'max': max(runs)} if runs else None,
+        # Largest single process; for the apptest driver that is one worker
+        'peak_rss_mb': peak_rss / 1024,
+        # Cache metrics live in this process only with the headless driver
+        'question_bank': bank_stats() if driver == 'headless' else None,
+        'evaluation_cache': evaluation_cache_stats() if driver == 'headless' else None,
+        'errors': [e for r in results for e in r['errors']][:20],
+        # Effective values, defaults included
+        'settings': {key: getattr(settings, key) for key in (
+            'LLM_BACKEND', 'STUB_LATENCY', 'STUB_ERROR_RATE', 'EVALUATION_MODE', 'STREAM_RESPONSES',
+            'QUESTION_BANK_ENABLED', 'EVALUATION_CACHE_ENABLED', 'SESSION_STORE_PATH'
+        )},
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """Print the change of the headline numbers against a saved run"""
+    def change(new: float, old: float) -> str:
+        return f"{new:.3f} ({(new - old) / old * 100:+.1f}%)" if old else f"{new:.3f}"
+
+    print(f"throughput/min: {change(results['throughput_per_minute'], baseline['throughput_per_minute'])}")
+    for stage in STAGES:
+        for pct in ('p50', 'p95', 'p99'):
+            print(f"{stage} {pct}: {change(results['stages'][stage][pct], baseline['stages'][stage][pct])}")
+    print(f"peak RSS MB: {change(results['peak_rss_mb'], baseline['peak_rss_mb'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the interview flow with simulated candidates")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--driver", choices=["apptest", "headless"], default="apptest")
+    parser.add_argument("--latency", default="lognormal:1.5:0.5", help="stub latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-run timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous results file")
+    parser.add_argument("--data-dir", help="directory for the run's on-disk stores (default: a new temp dir)")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure the stub before importing the app
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["STUB_LATENCY"] = args.latency
+    os.environ["STUB_ERROR_RATE"] = str(args.error_rate)
+    # Every on-disk store goes to the run's own directory, so synthetic interviews never
+    # reach the real session store (and from there the recruiter export)
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="talentscout-load-")
+    os.environ["QUESTION_CACHE_PATH"] = os.path.join(data_dir, "questions.sqlite3")
+    os.environ["SESSION_STORE_PATH"] = os.path.join(data_dir, "sessions.sqlite3")
+    os.environ["PDF_CACHE_DIR"] = os.path.join(data_dir, "pdf_cache")
+    os.environ["RESUME_STORE_DIR"] = os.path.join(data_dir, "resume_store")
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+
+    results = run_load_test(args.candidates, args.concurrency, args.timeout, args.seed, args.driver)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
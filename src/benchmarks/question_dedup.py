@@ -0,0 +1,169 @@
+"""Benchmark of the MinHash/LSH near-duplicate question index.
+
+Builds a stream of synthetic questions, most of them new and the rest
+rewordings of an earlier one (a word dropped, swapped or added, case and
+punctuation changed), adds them all to a ``NearDuplicateIndex`` and reports:
+
+* insert and query throughput (microseconds per question);
+* a brute-force query over all signatures for comparison;
+* recall: rewordings whose exact shingle Jaccard similarity with their
+  original reaches the threshold and that are found as near duplicates;
+* precision: reported near duplicates whose exact similarity reaches the
+  threshold (fresh questions can be near duplicates too, since they share
+  templates);
+* memory of the index arrays and peak RSS::
+
+    cd src
+    python -m benchmarks.question_dedup --questions 200000 --output dedup.json
+"""
+import argparse
+import json
+import random
+import resource
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from utils.question_dedup import SHINGLE_SIZE, NearDuplicateIndex, normalize_question
+
+OPENINGS = ["How would you", "Explain how you would", "Describe how to", "What is the best way to", "Walk me through how to"]
+VERBS = ["design", "debug", "profile", "secure", "scale", "test", "migrate", "monitor", "refactor", "deploy",
+         "cache", "document", "partition", "benchmark", "harden", "version", "index", "shard", "replicate", "audit"]
+ADJECTIVES = ["slow", "legacy", "distributed", "high-traffic", "multi-tenant", "stateful", "real-time", "flaky",
+              "memory-hungry", "public", "internal", "event-driven", "batch", "mobile", "read-heavy", "write-heavy"]
+NOUNS = ["API", "service", "data pipeline", "job queue", "search feature", "checkout flow", "dashboard",
+         "reporting module", "login system", "file upload path", "notification system", "recommendation engine",
+         "billing service", "chat backend", "image resizer", "audit log", "feature flag system", "rate limiter"]
+SKILLS = ["Python", "Django", "Flask", "FastAPI", "Java", "Spring Boot", "Go", "Rust", "Node.js", "React",
+          "PostgreSQL", "MongoDB", "Redis", "Kafka", "Kubernetes", "Docker", "AWS", "Azure", "GraphQL", "C#"]
+CONDITIONS = ["traffic doubles overnight", "a dependency becomes unreliable", "the team has no test coverage",
+              "latency budgets are tight", "data must stay in one region", "the schema changes weekly",
+              "users report intermittent errors", "costs need to drop by half", "you inherit it without docs",
+              "two teams share the codebase", "the release deadline is close", "compliance requires audits"]
+FILLERS = ["in practice", "step by step", "in detail", "briefly", "from scratch", "today"]
+
+
+def fresh_question(rng: random.Random) -> str:
+    return (f"{rng.choice(OPENINGS)} {rng.choice(VERBS)} a {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} "
+            f"built with {rng.choice(SKILLS)} when {rng.choice(CONDITIONS)} and {rng.choice(CONDITIONS)}?")
+
+
+def reword(question: str, rng: random.Random) -> str:
+    words = question.rstrip("?").split()
+    kind = rng.random()
+    if kind < 0.25:
+        del words[rng.randrange(len(words))]
+    elif kind < 0.5:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    elif kind < 0.75:
+        words.insert(rng.randrange(len(words)), rng.choice(FILLERS))
+    text = " ".join(words) + rng.choice(["?", " ?", ".", ""])
+    return text.upper() if rng.random() < 0.1 else text
+
+
+def shingles(text: str) -> set:
+    data = normalize_question(text).encode().ljust(SHINGLE_SIZE)
+    return {data[i:i + SHINGLE_SIZE] for i in range(len(data) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a: str, b: str) -> float:
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def build_stream(count: int, duplicate_rate: float, seed: int) -> Tuple[List[str], List[int]]:
+    """Questions plus, for each, the position of the question it rewords (-1 for fresh ones)"""
+    rng = random.Random(seed)
+    questions: List[str] = []
+    origins: List[int] = []
+    for i in range(count):
+        if i and rng.random() < duplicate_rate:
+            origin = rng.randrange(i)
+            while origins[origin] >= 0:
+                origin = origins[origin]
+            questions.append(reword(questions[origin], rng))
+            origins.append(origin)
+        else:
+            questions.append(fresh_question(rng))
+            origins.append(-1)
+    return questions, origins
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the near-duplicate question index")
+    parser.add_argument("--questions", type=int, default=200000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-items", type=int, help="index capacity (default: setting)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    questions, origins = build_stream(args.questions, args.duplicate_rate, args.seed)
+    index = NearDuplicateIndex(**({'max_items': args.max_items} if args.max_items else {}))
+
+    start = time.perf_counter()
+    ids = [index.add(question)[0] for question in questions]
+    insert_us = (time.perf_counter() - start) / len(questions) * 1e6
+
+    rng = random.Random(args.seed + 1)
+    # Rewordings of indexed questions, and fresh questions, as queries
+    live = range(max(len(questions) - index.max_items, 0), len(questions))
+    originals = [i for i in rng.sample(live, min(args.queries, len(live))) if origins[i] < 0]
+    rewordings = [(reword(questions[i], rng), i) for i in originals]
+    fresh = [fresh_question(rng) for _ in range(args.queries)]
+    fresh = [q for q in fresh if q not in set(questions)]
+
+    start = time.perf_counter()
+    found = [index.query(question) for question, _ in rewordings]
+    query_us = (time.perf_counter() - start) / len(rewordings) * 1e6
+    # A reported match is false when the exact similarity is below the threshold
+    reported = [(question, match) for question, match in zip([q for q, _ in rewordings], found) if match]
+    reported += [(question, index.query(question)) for question in fresh]
+    reported = [(question, match) for question, match in reported if match is not None]
+    false_positives = sum(jaccard(question, questions[match[0]]) < index.threshold for question, match in reported)
+
+    # Recall against the exact similarity, counting a hit on any question of the original's cluster
+    positives = hits = 0
+    for (question, original), match in zip(rewordings, found):
+        if jaccard(question, questions[original]) < index.threshold:
+            continue
+        positives += 1
+        hits += match is not None and index.cluster(match[0]) == index.cluster(ids[original])
+
+    # Brute force: compare against every stored signature
+    signatures = index._signatures[:len(index)]
+    start = time.perf_counter()
+    for question, _ in rewordings[:200]:
+        signature = index.hasher.signature(question)
+        scores = np.count_nonzero(signatures == signature, axis=1)
+        int(scores.argmax())
+    brute_us = (time.perf_counter() - start) / min(len(rewordings), 200) * 1e6
+
+    stats = index.stats()
+    results: Dict = {
+        'questions': len(questions),
+        'insert_us': insert_us,
+        'query_us': query_us,
+        'brute_force_query_us': brute_us,
+        'recall': hits / positives if positives else None,
+        'positives': positives,
+        'precision': 1 - false_positives / len(reported) if reported else None,
+        'matches_reported': len(reported),
+        'index': stats,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    print(f"{len(questions)} questions, {stats['near_duplicates']} added as near duplicates")
+    print(f"insert: {insert_us:.1f} us/question; query: {query_us:.1f} us; brute force: {brute_us:.1f} us")
+    print(f"recall: {results['recall']:.1%} of {positives}; precision: {results['precision']:.1%} of {len(reported)}")
+    print(f"index memory: {stats['memory_mb']:.1f} MB; peak RSS: {results['peak_rss_mb']:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Multi-threaded benchmark of SessionManager lock striping.
+
+Runs a mix of reads, updates and read-modify-write operations from many
+threads against a SessionManager with a single lock (``--shards 1`` is the
+old one-global-lock layout) and with lock striping, and reports operations
+per second for each thread count::
+
+    cd src
+    python -m benchmarks.session_store --threads 1 2 4 8 16 --shards 1 16 --output sessions.json
+
+On a GIL build threads take turns executing bytecode anyway, and each
+operation holds its lock only briefly, so striping shows no meaningful gain:
+on a 1-CPU machine one stripe measured 506k ops/s with 1 thread and 465k with
+4, and 16 stripes 463k and 467k, differences within run-to-run noise. Any
+benefit is expected only on a free-threaded build with several cores, which
+has not been measured.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from typing import Dict, List
+
+from utils.session_manager import SessionManager
+
+
+def run_workload(manager: SessionManager, session_ids: List[str], threads: int,
+                 ops_per_thread: int, seed: int) -> float:
+    """Run the operation mix from ``threads`` threads; returns operations per second"""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(worker_id: int) -> None:
+        rng = random.Random(seed + worker_id)
+        barrier.wait()
+        for i in range(ops_per_thread):
+            session_id = rng.choice(session_ids)
+            roll = rng.random()
+            if roll < 0.6:
+                manager.get_session_data(session_id)
+            elif roll < 0.9:
+                manager.update_session(session_id, {'current_stage': 'tech_questions', 'step': i})
+            else:
+                manager.modify_session(session_id, lambda s: s['responses'].append({'answer': i}))
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * ops_per_thread / (time.perf_counter() - start)
+
+
+def run_benchmark(thread_counts: List[int], shard_counts: List[int], sessions: int,
+                  ops_per_thread: int, seed: int) -> Dict:
+    results: Dict[str, Dict[str, float]] = {}
+    session_ids = [f"session-{i}" for i in range(sessions)]
+    for shards in shard_counts:
+        manager = SessionManager(max_sessions=sessions * 2, shards=shards)
+        for session_id in session_ids:
+            manager.create_session(session_id)
+        results[str(shards)] = {
+            str(threads): run_workload(manager, session_ids, threads, ops_per_thread, seed)
+            for threads in thread_counts
+        }
+    return {'sessions': sessions, 'ops_per_thread': ops_per_thread, 'ops_per_second': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SessionManager under concurrent access")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--ops", type=int, default=20000, help="operations per thread")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.threads, args.shards, args.sessions, args.ops, args.seed)
+    for shards, by_threads in results['ops_per_second'].items():
+        row = "  ".join(f"{threads}t: {ops:,.0f}/s" for threads, ops in by_threads.items())
+        print(f"shards={shards:>3}  {row}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
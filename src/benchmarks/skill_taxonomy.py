@@ -0,0 +1,169 @@
+"""Benchmark of skill normalization over messy candidate input.
+
+Generates a large list of skill terms the way candidates type them (random
+case, stray spaces and punctuation, alias spellings, one- or two-letter typos,
+plus terms outside the taxonomy) and reports, for each lookup strategy,
+microseconds per term and how many terms map to the intended skill:
+
+* ``alias-dict``: the old approach, a lowercase alias dict with no fuzziness;
+* ``taxonomy-cold``: ``SkillTaxonomy.canonical_id`` with the fuzzy memo cache
+  cleared before every term (exact alias map, then the deletion index);
+* ``taxonomy-warm``: the same with the memo cache, as in a running process.
+
+It also times ``find_in_text`` on resume-sized text against the old
+per-skill regex scan::
+
+    cd src
+    python -m benchmarks.skill_taxonomy --terms 100000 --output taxonomy.json
+"""
+import argparse
+import json
+import random
+import re
+import string
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+
+# The alias map used before the taxonomy, for comparison
+OLD_ALIASES = {
+    "js": "javascript", "node": "node.js", "nodejs": "node.js", "vue": "vue.js", "vuejs": "vue.js",
+    "express": "express.js", "expressjs": "express.js", "reactjs": "react", "react.js": "react",
+    "postgres": "postgresql", "mssql": "microsoft sql server", "sql server": "microsoft sql server",
+    "gcp": "google cloud", "k8s": "kubernetes", "golang": "go", "py": "python", "sass": "sass/scss",
+    "scss": "sass/scss", "html": "html5", "css": "css3", "rails": "ruby on rails", "spring": "spring boot",
+}
+
+
+def messy_terms(taxonomy: SkillTaxonomy, data: Dict, count: int, seed: int) -> List[Tuple[str, Optional[str]]]:
+    """(term, intended skill id) pairs; None marks a term outside the taxonomy"""
+    rng = random.Random(seed)
+    spellings = []
+    for category in data["categories"]:
+        for skill in category["skills"]:
+            for alias in [skill["name"], skill["id"]] + skill.get("aliases", []) + skill.get("term_aliases", []):
+                spellings.append((alias, skill["id"]))
+
+    def typo(term: str) -> str:
+        i = rng.randrange(len(term))
+        kind = rng.random()
+        if kind < 0.33:
+            return term[:i] + term[i + 1:]
+        if kind < 0.66 and i + 1 < len(term):
+            return term[:i] + term[i + 1] + term[i] + term[i + 2:]
+        return term[:i] + rng.choice(string.ascii_lowercase) + term[i + 1:]
+
+    terms = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            junk = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+            terms.append((junk, None))
+            continue
+        term, skill_id = rng.choice(spellings)
+        roll = rng.random()
+        if roll < 0.3:
+            term = term.upper() if rng.random() < 0.5 else term.title()
+        elif roll < 0.5:
+            term = f"  {term.replace(' ', '  ')} "
+        elif roll < 0.65:
+            term = term.replace(".", rng.choice(["", " ", "-"]))
+        elif roll < 0.85 and len(term) >= 8:
+            term = typo(term)
+        terms.append((term, skill_id))
+    return terms
+
+
+def old_lookup(term: str) -> str:
+    name = " ".join(term.lower().split())
+    return OLD_ALIASES.get(name, name)
+
+
+def measure(lookup: Callable[[str], Optional[str]], terms: List[Tuple[str, Optional[str]]],
+            before_each: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    correct = 0
+    elapsed = 0.0
+    for term, expected in terms:
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        result = lookup(term)
+        elapsed += time.perf_counter() - start
+        if expected is None:
+            # Unknown terms must not be mistaken for a taxonomy skill
+            correct += result is None or result == " ".join(term.lower().split())
+        else:
+            correct += result == expected
+    return {'us_per_term': elapsed / len(terms) * 1e6, 'accuracy': correct / len(terms)}
+
+
+def old_guess_skills(text: str, known_skills: List[str]) -> List[str]:
+    found = []
+    lowered = text.lower()
+    for skill in known_skills:
+        pattern = r'(?<![\w.+#])' + re.escape(skill.lower()) + r'(?![\w+#])'
+        if re.search(pattern, lowered):
+            found.append(skill)
+    return found
+
+
+def measure_text_scan(taxonomy: SkillTaxonomy, seed: int, repeats: int = 200) -> Dict[str, float]:
+    """Scan a resume-sized text (~3,000 words) with both approaches"""
+    rng = random.Random(seed)
+    filler = "designed built maintained services for customers across teams with tests and reviews".split()
+    mentions = ["Python", "Django", "Node.js", "ReactJS", "Ruby on Rails", "k8s", "AWS", "PostgreSQL", "C#"]
+    words = [rng.choice(mentions) if rng.random() < 0.02 else rng.choice(filler) for _ in range(3000)]
+    text = " ".join(words)
+    known = [skill for names in taxonomy.form_options().values() for skill in names]
+
+    results = {}
+    for label, scan in (("regex-per-skill", lambda: old_guess_skills(text, known)),
+                        ("taxonomy-scan", lambda: taxonomy.find_in_text(text))):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            scan()
+        results[label] = (time.perf_counter() - start) / repeats * 1e6
+    return {'words': len(words), 'us_per_text': results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark skill normalization")
+    parser.add_argument("--terms", type=int, default=100000, help="messy terms to normalize")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    from config.settings import SKILL_TAXONOMY_PATH
+    with open(SKILL_TAXONOMY_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+
+    start = time.perf_counter()
+    taxonomy = SkillTaxonomy(data)
+    compile_ms = (time.perf_counter() - start) * 1000
+    terms = messy_terms(taxonomy, data, args.terms, args.seed)
+
+    taxonomy_lookup = get_skill_taxonomy().canonical_id
+    results = {
+        'terms': len(terms),
+        'compile_ms': compile_ms,
+        'alias-dict': measure(old_lookup, terms),
+        'taxonomy-cold': measure(taxonomy.canonical_id, terms, before_each=taxonomy._fuzzy.cache_clear),
+        'taxonomy-warm': measure(taxonomy_lookup, terms),
+        'text_scan': measure_text_scan(taxonomy, args.seed),
+    }
+
+    print(f"Compiled taxonomy in {compile_ms:.2f} ms; {len(terms)} messy terms")
+    for label in ('alias-dict', 'taxonomy-cold', 'taxonomy-warm'):
+        row = results[label]
+        print(f"{label:>14}: {row['us_per_term']:8.2f} us/term, {row['accuracy']:.1%} correct")
+    scan = results['text_scan']
+    for label, micros in scan['us_per_text'].items():
+        print(f"{label:>16}: {micros / 1000:8.2f} ms per {scan['words']}-word text")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
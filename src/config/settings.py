@@ -7,14 +7,141 @@ load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 # Model Configuration
-GEMINI_MODEL = "gemini-1.5-"
+GEMINI_MODEL = "gemini-1.5-pro"
 TEMPERATURE = 0.7
 TOP_P = 0.9
 TOP_K = 40
 MAX_OUTPUT_TOKENS = 2048
 
+# Transport shared by every session in the process ("grpc" keeps one
+# long-lived HTTP/2 channel open; "rest" reuses a pooled HTTP session)
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "grpc")
+
+# LLM Backend
+# "gemini" calls the live API; "stub" is an offline backend for load tests and CI
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+STUB_LATENCY = os.getenv("STUB_LATENCY", "lognormal:1.5:0.5")  # fixed/uniform/normal/lognormal, seconds
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+STUB_SEED = int(os.getenv("STUB_SEED", "0"))
+STUB_RESPONSES_FILE = os.getenv("STUB_RESPONSES_FILE")  # JSON list of [pattern, template] pairs
+
+# LLM Call Resilience
+# Total time budget per call type, shared by all retries and hedged requests
+LLM_DEADLINES = {
+    "generate_questions": 45,
+    "evaluate_answer": 30,
+    "evaluate_batch": 90,
+    "handle_message": 30,
+    "summarize": 20,
+}
+LLM_DEFAULT_DEADLINE = 30
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = 0.5  # seconds, doubled per attempt with full jitter
+LLM_RETRY_MAX_DELAY = 8
+# Call types that get a duplicate request when the first is slow
+LLM_HEDGE_CALL_TYPES = ("generate_questions",) if os.getenv("HEDGE_QUESTION_GENERATION", "true").lower() == "true" else ()
+LLM_HEDGE_DELAY = 10
+LLM_CALL_WORKERS = 64
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive transient failures before opening
+CIRCUIT_COOLDOWN = 30  # seconds before a trial call is let through
+
+# Conversation Configuration
+# Stateless mode sends each call type only the context it needs instead of
+# replaying the whole chat history on every request
+STATELESS_PROMPTS = os.getenv("STATELESS_PROMPTS", "true").lower() == "true"
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "6"))  # messages kept verbatim
+ROLLING_SUMMARY = os.getenv("ROLLING_SUMMARY", "false").lower() == "true"
+CALL_LOG_SIZE = 100  # recent LLM calls kept per session for token metrics
+
+# Client-side rate limit shared by every session in the process; 0 disables
+RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", "300"))  # requests per minute
+RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", "1000000"))  # prompt + response tokens per minute
+RATE_LIMIT_BURST_SECONDS = 10  # bucket capacity, in seconds of quota
+RATE_LIMIT_RESPONSE_TOKENS = 512  # reply size assumed before a call; corrected afterwards
+
+# Skill Taxonomy
+# Canonical skills, aliases and form checkboxes; see utils/skill_taxonomy.py
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH", os.path.join(os.path.dirname(__file__), "skills.json"))
+SKILL_FUZZY_MAX_DISTANCE = 2  # edits tolerated when a skill term matches no alias
+SKILL_LOOKUP_CACHE_SIZE = 4096  # memoized term lookups
+
+# Question Cache Configuration
+QUESTION_CACHE_ENABLED = os.getenv("QUESTION_CACHE_ENABLED", "true").lower() == "true"
+QUESTION_CACHE_PATH = os.getenv("QUESTION_CACHE_PATH", "question_cache.sqlite3")
+QUESTION_CACHE_TTL = 7 * 24 * 3600  # 1 week
+QUESTION_CACHE_MAX_ENTRIES = 5000  # distinct skill sets
+QUESTION_CACHE_VARIANTS = 3  # question sets kept per skill set
+
+# Question Bank
+# Reviewed questions served before asking the LLM; see utils/question_bank.py
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", os.path.join(os.path.dirname(__file__), "question_bank.json"))
+QUESTION_DIFFICULTY_MIX = ("Easy", "Medium", "Medium", "Hard", "Hard")  # one question per slot
+
+# Question Deduplication
+# MinHash/LSH index of generated questions; see utils/question_dedup.py
+QUESTION_DEDUP_THRESHOLD = float(os.getenv("QUESTION_DEDUP_THRESHOLD", "0.75"))  # estimated Jaccard similarity
+QUESTION_DEDUP_PERMUTATIONS = int(os.getenv("QUESTION_DEDUP_PERMUTATIONS", "64"))
+QUESTION_DEDUP_BANDS = int(os.getenv("QUESTION_DEDUP_BANDS", "8"))  # must divide the permutations
+QUESTION_DEDUP_MAX_ITEMS = int(os.getenv("QUESTION_DEDUP_MAX_ITEMS", "200000"))  # oldest questions are evicted beyond this
+
+# Speculative Question Generation
+SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", "8"))
+SPECULATIVE_ADOPT_TIMEOUT = 60  # seconds to wait for an in-flight matching generation
+
+# Answer Evaluation
+# "sync" waits for each evaluation; "background" queues it and moves on;
+# "batch" stores raw answers and evaluates them all with one call at the end
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "background")
+EVALUATION_WORKERS = int(os.getenv("EVALUATION_WORKERS", "16"))
+EVALUATION_QUEUE_SIZE = int(os.getenv("EVALUATION_QUEUE_SIZE", "256"))  # in-flight evaluations per process
+EVALUATION_SUBMIT_TIMEOUT = 2  # seconds a submit waits for a free slot before asking the candidate to retry
+
+# Evaluations reused when a session answers the same question again; see utils/evaluation_cache.py
+EVALUATION_CACHE_ENABLED = os.getenv("EVALUATION_CACHE_ENABLED", "true").lower() == "true"
+EVALUATION_CACHE_SIZE = int(os.getenv("EVALUATION_CACHE_SIZE", "10000"))  # (question, answer) pairs per process
+EVALUATION_CACHE_PER_QUESTION = int(os.getenv("EVALUATION_CACHE_PER_QUESTION", "256"))  # answers kept per question
+# Optional: also reuse for near-identical answers, by cosine similarity of hashed character n-gram
+# vectors (needs NumPy). Off by default: a small edit ("can" -> "cannot") can flip an answer's meaning.
+EVALUATION_SIMILARITY_ENABLED = os.getenv("EVALUATION_SIMILARITY_ENABLED", "false").lower() == "true"
+EVALUATION_SIMILARITY_THRESHOLD = float(os.getenv("EVALUATION_SIMILARITY_THRESHOLD", "0.95"))
+
+# Render evaluations and generated questions progressively as tokens arrive
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+
+# Rendered evaluation HTML kept per process, keyed by content hash
+RENDER_CACHE_SIZE = 2048
+
+# Interview summary PDFs, cached on disk by a hash of their content
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "pdf_cache")
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_WAIT_TIMEOUT = 5  # seconds the page waits for a PDF before offering a refresh
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))  # 500 MB
+PDF_CACHE_MAX_AGE = float(os.getenv("PDF_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds since last use
+
+# Resume Ingestion
+# Uploads are stored once per distinct content and sessions keep only the
+# digest and the extracted text
+RESUME_STORE_DIR = os.getenv("RESUME_STORE_DIR", "resume_store")
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))  # 10 MB
+RESUME_TEXT_LIMIT = 20000  # characters of extracted text kept per resume
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", "4"))
+
+# Metrics Export
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # serve Prometheus text on localhost; 0 disables
+METRICS_FILE = os.getenv("METRICS_FILE")  # periodically rewritten Prometheus text file
+METRICS_FLUSH_INTERVAL = 15  # seconds
+
 # Session Configuration
 SESSION_TIMEOUT = 3600  # 1 hour
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))  # least recently used sessions are evicted beyond this
+SESSION_SWEEP_INTERVAL = 60  # seconds between background expiry sweeps
+SESSION_SHARDS = int(os.getenv("SESSION_SHARDS", "16"))  # independently locked session stripes
+SESSION_STORE_ENABLED = os.getenv("SESSION_STORE_ENABLED", "true").lower() == "true"
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.sqlite3")
+SESSION_FLUSH_INTERVAL = 1.0  # seconds between write-behind flushes
+SESSION_FLUSH_BATCH = 200  # flush early once this many sessions are waiting
+INTERVIEW_RETENTION = 30 * 24 * 3600  # completed interviews stay exportable for 30 days
 
 # Candidate Information Schema
 REQUIRED_FIELDS = [
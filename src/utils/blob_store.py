@@ -0,0 +1,166 @@
+"""Content-addressed, reference-counted store for uploaded files.
+
+A blob is named by the SHA-256 of its bytes, computed while the upload is
+streamed to disk, so the same resume uploaded by many sessions (re-applies,
+retries after an error) is stored once under ``<directory>/<ab>/<digest>``.
+An SQLite index next to the blobs keeps a reference count per digest and the
+text extracted from each blob, so extraction runs once per distinct file.
+
+Sessions, summary PDFs and exports refer to a resume by its digest. Every
+``put`` takes a reference; ``release`` drops one and deletes the blob with
+the last. The reference count and the file on disk change together inside
+one ``BEGIN IMMEDIATE`` transaction, so processes sharing the directory
+cannot delete a blob another one has just re-referenced. Blobs are read
+through ``mmap``, so readers share the page cache instead of copying the
+file into each process.
+"""
+import hashlib
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from config.settings import RESUME_STORE_DIR
+from utils.metrics import metrics
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BlobTooLarge(ValueError):
+    """The stream is larger than the allowed maximum"""
+
+
+class BlobStore:
+    def __init__(self, directory: str = RESUME_STORE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    refs INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    text TEXT
+                )
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._index_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Hold the index's write lock across a read-modify-write and the file changes that go with it"""
+        conn = sqlite3.connect(self._index_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, stream: BinaryIO, max_bytes: Optional[int] = None) -> Tuple[str, int]:
+        """Store a stream, hashing it as it is copied; returns (digest, size) and takes a reference"""
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".blob-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise BlobTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                    hasher.update(chunk)
+                    f.write(chunk)
+            digest = hasher.hexdigest()
+            path = self.path(digest)
+            with self._write_transaction() as conn:
+                if os.path.exists(path):
+                    os.unlink(tmp_path)
+                    metrics.inc("talentscout_blob_dedup_total", "Uploads already present in the blob store")
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+                    os.replace(tmp_path, path)
+                conn.execute(
+                    "INSERT INTO blobs (digest, size, refs, created_at) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(digest) DO UPDATE SET refs = refs + 1",
+                    (digest, size, time.time())
+                )
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest, size
+
+    def release(self, digest: str) -> None:
+        """Drop one reference; the blob is deleted with its last reference"""
+        with self._write_transaction() as conn:
+            row = conn.execute("UPDATE blobs SET refs = refs - 1 WHERE digest = ? RETURNING refs",
+                               (digest,)).fetchone()
+            if row is not None and row[0] <= 0:
+                conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                try:
+                    os.unlink(self.path(digest))
+                except FileNotFoundError:
+                    pass
+
+    def refs(self, digest: str) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT refs FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else 0
+
+    @contextmanager
+    def open(self, digest: str) -> Iterator[bytes]:
+        """Read-only memory map of a blob"""
+        with open(self.path(digest), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+    def get_text(self, digest: str) -> Optional[str]:
+        """Text previously extracted from a blob, None if it was never extracted"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT text FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def set_text(self, digest: str, text: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE blobs SET text = ? WHERE digest = ?", (text, digest))
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_resume_store() -> BlobStore:
+    """Process-wide resume blob store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
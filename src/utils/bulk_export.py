@@ -0,0 +1,157 @@
+"""Bulk export of completed interviews as one ZIP of summary PDFs.
+
+Completed interviews are read from the session store one at a time and
+rendered in a process pool. Each worker builds the reportlab styles once, in
+its initializer. Finished PDFs are written into the ZIP as they arrive. At
+most a few PDFs per worker are in flight, so memory stays flat however many
+interviews are exported. PDFs already in the on-disk PDF cache are copied
+from there instead of being rendered again.
+
+Resumes are added from the resume store under ``resumes/<digest>``, once per
+distinct file however many interviews refer to it, and the summary PDFs name
+them by digest.
+
+Answers whose evaluation never finished (e.g. still queued in background
+mode when the interview ended) are exported with a "not evaluated" status,
+and counted in the result's ``not_evaluated``.
+
+    cd src
+    python -m utils.bulk_export --output packet.zip --since-days 7
+"""
+import argparse
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config.settings import PDF_CACHE_DIR
+from utils.blob_store import BlobStore, get_resume_store
+from utils.pdf_report import build_summary_pdf, payload_key, summary_payload, summary_styles
+from utils.session_store import SessionStore
+
+NOT_EVALUATED = "Not evaluated: no evaluation was recorded for this answer."
+
+_worker_styles = None
+
+
+def _init_worker() -> None:
+    """Build the stylesheet once per worker process"""
+    global _worker_styles
+    _worker_styles = summary_styles()
+
+
+def _render(payload: Dict[str, Any]) -> bytes:
+    buffer = BytesIO()
+    build_summary_pdf(payload, buffer, _worker_styles)
+    return buffer.getvalue()
+
+
+def archive_name(session_id: str, data: Dict[str, Any]) -> str:
+    """File name inside the ZIP: candidate name plus a short session id"""
+    name = (data.get('personal_info') or {}).get('full_name') or 'candidate'
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_') or 'candidate'
+    return f"{slug}_{session_id[:8]}.pdf"
+
+
+def export_responses(responses: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Every response, with an explicit status for unevaluated ones; returns them and that count"""
+    exported = [r if r.get('evaluation') is not None else {**r, 'evaluation': NOT_EVALUATED} for r in responses]
+    return exported, sum(1 for r in responses if r.get('evaluation') is None)
+
+
+def resume_archive_name(digest: str, file_name: Optional[str]) -> str:
+    """Resume path inside the ZIP, shared by every interview with the same file"""
+    return f"resumes/{digest}{os.path.splitext(file_name or '')[1].lower()}"
+
+
+def export_interviews(output: str, since: Optional[float] = None, session_ids: Optional[Iterable[str]] = None,
+                      workers: Optional[int] = None, store: Optional[SessionStore] = None,
+                      include_resumes: bool = True, resume_store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """Write a ZIP with one summary PDF per completed interview; returns counts and throughput"""
+    store = store or SessionStore()
+    resume_store = resume_store or (get_resume_store() if include_resumes else None)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    in_flight: Dict[Future, str] = {}
+    stats = {'exported': 0, 'rendered': 0, 'from_cache': 0, 'failed': 0, 'resumes': 0, 'not_evaluated': 0}
+    written_resumes: Set[str] = set()
+
+    def add_resume(info: Dict[str, Any], archive: zipfile.ZipFile) -> None:
+        digest = info.get('resume_digest')
+        if not digest or digest in written_resumes:
+            return
+        written_resumes.add(digest)
+        try:
+            with resume_store.open(digest) as data:
+                archive.writestr(resume_archive_name(digest, info.get('resume_name')), data)
+            stats['resumes'] += 1
+        except OSError as e:
+            print(f"Error adding resume {digest}: {str(e)}")
+
+    def drain(pending: Set[Future], archive: zipfile.ZipFile) -> Set[Future]:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = in_flight.pop(future)
+            try:
+                archive.writestr(name, future.result())
+                stats['rendered'] += 1
+                stats['exported'] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"Error rendering {name}: {str(e)}")
+        return pending
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor, \
+            zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        pending: Set[Future] = set()
+        for session_id, data in store.iter_completed(since, session_ids):
+            responses, not_evaluated = export_responses(data.get('responses') or [])
+            stats['not_evaluated'] += not_evaluated
+            payload = summary_payload(data.get('personal_info') or {}, data.get('tech_stack') or [], responses)
+            name = archive_name(session_id, data)
+            if include_resumes:
+                add_resume(data.get('personal_info') or {}, archive)
+            cached = os.path.join(PDF_CACHE_DIR, f"{payload_key(payload)}.pdf")
+            try:
+                archive.write(cached, name)
+                stats['from_cache'] += 1
+                stats['exported'] += 1
+                continue
+            except FileNotFoundError:
+                pass  # never built, or evicted from the PDF cache
+
+            while len(pending) >= max_in_flight:
+                pending = drain(pending, archive)
+            future = executor.submit(_render, payload)
+            in_flight[future] = name
+            pending.add(future)
+        while pending:
+            pending = drain(pending, archive)
+
+    elapsed = time.perf_counter() - start
+    stats['elapsed_seconds'] = elapsed
+    stats['pdfs_per_second'] = stats['exported'] / elapsed if elapsed else 0.0
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export completed interviews as a ZIP of summary PDFs")
+    parser.add_argument("--output", required=True, help="ZIP file to write")
+    parser.add_argument("--since-days", type=float, help="only interviews completed in the last N days")
+    parser.add_argument("--session", action="append", dest="sessions", help="export only this session id")
+    parser.add_argument("--workers", type=int, help="render processes (default: CPU count)")
+    parser.add_argument("--without-resumes", action="store_true", help="do not add the candidates' resumes")
+    args = parser.parse_args()
+
+    since = time.time() - args.since_days * 86400 if args.since_days else None
+    result = export_interviews(args.output, since, args.sessions, args.workers,
+                               include_resumes=not args.without_resumes)
+    print(f"Exported {result['exported']} PDFs ({result['rendered']} rendered, {result['from_cache']} from cache, "
+          f"{result['failed']} failed) and {result['resumes']} resumes in {result['elapsed_seconds']:.1f}s: "
+          f"{result['pdfs_per_second']:.1f} PDFs/sec")
+    if result['not_evaluated']:
+        print(f"{result['not_evaluated']} answers had no evaluation and are marked as not evaluated")
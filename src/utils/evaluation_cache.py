@@ -0,0 +1,203 @@
+"""Process-wide cache of answer evaluations, scoped per session and question.
+
+Candidates who go back with "Previous" or submit the same answer again
+would otherwise cost a fresh evaluation call every time. Every entry belongs
+to a scope (the session's handler) and a question, so one candidate's answer
+is never served another candidate's evaluation, and an answer is never
+judged against another question's rubric. Evaluations are cached in two
+tiers:
+
+* exact: a hash of the scope and question plus a hash of the normalized
+  answer (Unicode-normalized, case-folded, whitespace collapsed);
+* similar, only with ``EVALUATION_SIMILARITY_ENABLED``: answers of at least
+  ``SIMILARITY_MIN_CHARS`` characters are also stored as hashed character
+  4-gram vectors, and a new answer whose cosine similarity with a stored
+  answer in the same scope and question reaches
+  ``EVALUATION_SIMILARITY_THRESHOLD`` reuses that evaluation. It is off by
+  default: reversed facts or an added "not" barely move the vector, so a
+  wrong answer can score about 0.99 against a right one. This tier needs
+  NumPy and is skipped without it.
+
+Least recently used answers are evicted beyond ``EVALUATION_CACHE_SIZE``
+overall and beyond ``EVALUATION_CACHE_PER_QUESTION`` for one question of a scope, which
+also bounds the vectors compared per lookup. Only validated model
+evaluations are stored, never fallbacks.
+"""
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # exact-match tier only
+    np = None
+
+from agent.schemas import Evaluation
+from config.settings import (
+    EVALUATION_CACHE_SIZE, EVALUATION_CACHE_PER_QUESTION,
+    EVALUATION_SIMILARITY_ENABLED, EVALUATION_SIMILARITY_THRESHOLD
+)
+from utils.metrics import metrics
+
+NGRAM = 4
+VECTOR_BITS = 10  # 1024 hashed dimensions, stored as float16
+# Shorter answers ("I don't know", "yes") are only reused on an exact match
+SIMILARITY_MIN_CHARS = 40
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def normalize_answer(answer: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", answer).casefold().split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def answer_vector(normalized: str) -> "np.ndarray":
+    """Unit vector of hashed character n-gram counts (square-rooted, so repeats weigh less)"""
+    raw = np.frombuffer(normalized.encode().ljust(NGRAM), dtype=np.uint8).astype(np.uint64)
+    count = len(raw) - NGRAM + 1
+    grams = raw[:count].copy()
+    for i in range(1, NGRAM):
+        grams |= raw[i:i + count] << np.uint64(8 * i)
+    buckets = (grams * np.uint64(_HASH_MULTIPLIER)) >> np.uint64(64 - VECTOR_BITS)
+    vector = np.sqrt(np.bincount(buckets.astype(np.intp), minlength=1 << VECTOR_BITS).astype(np.float32))
+    return (vector / np.linalg.norm(vector)).astype(np.float16)
+
+
+class _QuestionAnswers:
+    """Answers cached for one question, least recently used first"""
+
+    def __init__(self):
+        self.answers: "OrderedDict[str, Tuple[Evaluation, Optional[np.ndarray]]]" = OrderedDict()
+        self._matrix: Optional[Tuple[list, "np.ndarray"]] = None
+
+    def changed(self) -> None:
+        self._matrix = None
+
+    def nearest(self, vector: "np.ndarray") -> Tuple[Optional[str], float]:
+        """Key and cosine similarity of the most similar stored answer"""
+        if self._matrix is None:
+            keys = [key for key, (_, stored) in self.answers.items() if stored is not None]
+            if not keys:
+                return None, 0.0
+            self._matrix = (keys, np.stack([self.answers[key][1] for key in keys]).astype(np.float32))
+        keys, matrix = self._matrix
+        scores = matrix @ vector.astype(np.float32)
+        best = int(scores.argmax())
+        return keys[best], float(scores[best])
+
+
+class EvaluationCache:
+    def __init__(self, max_entries: int = EVALUATION_CACHE_SIZE,
+                 per_question: int = EVALUATION_CACHE_PER_QUESTION,
+                 similarity: bool = EVALUATION_SIMILARITY_ENABLED,
+                 threshold: float = EVALUATION_SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.per_question = per_question
+        self.similarity = similarity and np is not None
+        self.threshold = threshold
+        self._questions: Dict[str, _QuestionAnswers] = {}
+        self._order: "OrderedDict[Tuple[str, str], None]" = OrderedDict()  # every entry, LRU first
+        self._lock = threading.Lock()
+
+    def _keys(self, scope: str, question: str, answer: str) -> Tuple[str, str, str]:
+        normalized = normalize_answer(answer)
+        return _digest(scope + "\0" + " ".join(question.split())), _digest(normalized), normalized
+
+    def _vector(self, normalized: str) -> Optional["np.ndarray"]:
+        if self.similarity and len(normalized) >= SIMILARITY_MIN_CHARS:
+            return answer_vector(normalized)
+        return None
+
+    def _touch(self, question_key: str, answer_key: str) -> Evaluation:
+        self._order.move_to_end((question_key, answer_key))
+        answers = self._questions[question_key].answers
+        answers.move_to_end(answer_key)
+        return answers[answer_key][0].model_copy(deep=True)
+
+    def get(self, scope: str, question: str, answer: str) -> Optional[Evaluation]:
+        """Evaluation of the same (or, with the similarity tier, a near-identical) answer in the scope"""
+        question_key, answer_key, normalized = self._keys(scope, question, answer)
+        with self._lock:
+            entry = self._questions.get(question_key)
+            if entry is not None and answer_key in entry.answers:
+                record_lookup("exact")
+                return self._touch(question_key, answer_key)
+            if entry is None:
+                record_lookup("miss")
+                return None
+
+        vector = self._vector(normalized)
+        if vector is not None:
+            with self._lock:
+                entry = self._questions.get(question_key)
+                if entry is not None:
+                    nearest, score = entry.nearest(vector)
+                    if nearest is not None and score >= self.threshold:
+                        record_lookup("similar")
+                        return self._touch(question_key, nearest)
+        record_lookup("miss")
+        return None
+
+    def put(self, scope: str, question: str, answer: str, evaluation: Evaluation) -> None:
+        """Store a validated evaluation of an answer"""
+        question_key, answer_key, normalized = self._keys(scope, question, answer)
+        vector = self._vector(normalized)
+        with self._lock:
+            entry = self._questions.setdefault(question_key, _QuestionAnswers())
+            entry.answers[answer_key] = (evaluation.model_copy(deep=True), vector)
+            entry.answers.move_to_end(answer_key)
+            entry.changed()
+            self._order[(question_key, answer_key)] = None
+            self._order.move_to_end((question_key, answer_key))
+            if len(entry.answers) > self.per_question:
+                self._remove(question_key, next(iter(entry.answers)))
+            while len(self._order) > self.max_entries:
+                self._remove(*next(iter(self._order)))
+            metrics.set("talentscout_evaluation_cache_entries", "Answer evaluations held in the cache",
+                        len(self._order))
+
+    def _remove(self, question_key: str, answer_key: str) -> None:
+        del self._order[(question_key, answer_key)]
+        entry = self._questions[question_key]
+        del entry.answers[answer_key]
+        entry.changed()
+        if not entry.answers:
+            del self._questions[question_key]
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+def record_lookup(result: str) -> None:
+    metrics.inc("talentscout_evaluation_cache_requests_total", "Evaluation cache lookups by outcome",
+                result=result)
+
+
+def cache_stats() -> Dict[str, float]:
+    """Lookups and hit rates of the evaluation cache so far in this process"""
+    counts = {result: metrics.value("talentscout_evaluation_cache_requests_total", result=result)
+              for result in ("exact", "similar", "miss")}
+    total = sum(counts.values())
+    return {
+        'requests': total,
+        'hit_rate': (counts['exact'] + counts['similar']) / total if total else 0.0,
+        'similar_rate': counts['similar'] / total if total else 0.0,
+    }
+
+
+_cache: Optional[EvaluationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache() -> EvaluationCache:
+    """Process-wide evaluation cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EvaluationCache()
+        return _cache
@@ -0,0 +1,214 @@
+"""Process-wide metrics for LLM calls and other hot paths.
+
+Metrics are kept in memory and exposed in the Prometheus text format, either
+on a local HTTP endpoint (``METRICS_PORT``) or by periodically rewriting a file
+(``METRICS_FILE``) that a node exporter textfile collector can pick up.
+
+LLM calls are recorded with ``track_llm_call``::
+
+    with track_llm_call('evaluate_answer') as call:
+        response = backend.generate(prompt)
+        call.set_tokens(response.prompt_tokens, response.response_tokens)
+
+which records latency, token counts and, if the block raises, the exception
+class before re-raising.
+"""
+import bisect
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.settings import METRICS_PORT, METRICS_FILE, METRICS_FLUSH_INTERVAL
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, float("inf"))
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, float("inf"))
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+
+    def _key(self, name: str, kind: str, help_text: str, labels: Dict[str, str]) -> Tuple[str, Labels]:
+        self._meta.setdefault(name, (kind, help_text))
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, help_text: str, amount: float = 1, **labels: str) -> None:
+        with self._lock:
+            key = self._key(name, "counter", help_text, labels)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name: str, help_text: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._gauges[self._key(name, "gauge", help_text, labels)] = value
+
+    def observe(self, name: str, help_text: str, value: float,
+                buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: str) -> None:
+        with self._lock:
+            key = self._key(name, "histogram", help_text, labels)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def value(self, name: str, **labels: str) -> float:
+        """Current value of a counter or gauge, 0 if never recorded"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        def fmt(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text) in sorted(self._meta.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "histogram":
+                    for (metric, labels), histogram in sorted(self._histograms.items()):
+                        if metric != name:
+                            continue
+                        cumulative = 0
+                        for bound, count in zip(histogram.buckets, histogram.counts):
+                            cumulative += count
+                            le = "+Inf" if bound == float("inf") else repr(bound)
+                            lines.append(f"{name}_bucket{fmt(labels, ('le', le))} {cumulative}")
+                        lines.append(f"{name}_sum{fmt(labels)} {histogram.sum}")
+                        lines.append(f"{name}_count{fmt(labels)} {histogram.count}")
+                else:
+                    values = self._counters if kind == "counter" else self._gauges
+                    for (metric, labels), value in sorted(values.items()):
+                        if metric == name:
+                            lines.append(f"{name}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class CallRecord:
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.ttft: Optional[float] = None
+
+    def set_tokens(self, prompt_tokens: int, response_tokens: int) -> None:
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+
+
+@contextmanager
+def track_llm_call(call_type: str) -> Iterator[CallRecord]:
+    """Record latency, tokens and errors for one LLM call"""
+    record = CallRecord()
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        metrics.inc("talentscout_llm_calls_total", "LLM calls by outcome", call_type=call_type, status="error")
+        metrics.inc("talentscout_llm_errors_total", "LLM call failures by exception class",
+                    call_type=call_type, exception=type(e).__name__)
+        raise
+    finally:
+        metrics.observe("talentscout_llm_call_duration_seconds", "LLM call latency",
+                        time.perf_counter() - start, call_type=call_type)
+
+    metrics.inc("talentscout_llm_calls_total", "LLM calls by outcome", call_type=call_type, status="ok")
+    metrics.observe("talentscout_llm_prompt_tokens", "Prompt tokens per LLM call",
+                    record.prompt_tokens, buckets=TOKEN_BUCKETS, call_type=call_type)
+    metrics.inc("talentscout_llm_prompt_tokens_total", "Prompt tokens sent",
+                record.prompt_tokens, call_type=call_type)
+    metrics.inc("talentscout_llm_response_tokens_total", "Response tokens received",
+                record.response_tokens, call_type=call_type)
+    if record.ttft is not None:
+        metrics.observe("talentscout_llm_time_to_first_token_seconds", "Time to first streamed token",
+                        record.ttft, call_type=call_type)
+
+
+def record_retry(call_type: str) -> None:
+    metrics.inc("talentscout_llm_retries_total", "LLM call retries", call_type=call_type)
+
+
+def record_fallback(call_type: str) -> None:
+    metrics.inc("talentscout_llm_fallbacks_total", "Fallback content served instead of an LLM reply",
+                call_type=call_type)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> ThreadingHTTPServer:
+    """Serve /metrics on localhost from a daemon thread"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def write_metrics_file(path: str = METRICS_FILE) -> None:
+    """Atomically replace the metrics file with the current values"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    with os.fdopen(fd, "w") as f:
+        f.write(metrics.render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_flusher(path: str = METRICS_FILE, interval: float = METRICS_FLUSH_INTERVAL) -> threading.Thread:
+    """Rewrite the metrics file every ``interval`` seconds from a daemon thread"""
+    def flush_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                write_metrics_file(path)
+            except OSError as e:
+                print(f"Error writing metrics file: {str(e)}")
+
+    thread = threading.Thread(target=flush_forever, name="metrics-flusher", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporters() -> None:
+    """Start whichever exporters are configured in settings"""
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    if METRICS_FILE:
+        start_metrics_flusher(METRICS_FILE)
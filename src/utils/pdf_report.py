@@ -0,0 +1,330 @@
+"""Interview summary PDFs, built off the script thread and cached on disk.
+
+A summary is identified by the SHA-256 of its canonical JSON payload, so
+the same interview always maps to the same file. ``PDFReportCache`` builds
+missing files on a worker pool and writes them atomically into
+``PDF_CACHE_DIR``. Repeat downloads, reruns, restarts and other replicas that
+share the directory reuse the file instead of running reportlab again.
+
+Files not used for ``PDF_CACHE_MAX_AGE`` seconds are deleted, and the least
+recently used ones go when the directory grows past ``PDF_CACHE_MAX_BYTES``;
+the cache is swept after every build. Two sessions with identical summaries
+share one file, so an SQLite index in the directory counts the sessions
+holding each PDF, like the resume blob store: a session takes a reference
+the first time it submits a key, and ``delete_session_pdfs`` drops its
+references when the session is deleted, removing a file with its last one.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import StyleSheet1, getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from utils.metrics import metrics
+from config.settings import PDF_CACHE_DIR, PDF_WORKERS, PDF_CACHE_MAX_BYTES, PDF_CACHE_MAX_AGE
+
+PERSONAL_INFO_FIELDS = ['full_name', 'email', 'phone', 'experience', 'desired_position', 'location']
+
+# Built once per process; reportlab only reads table styles when laying out
+PERSONAL_INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+
+def summary_payload(personal_info: Dict[str, Any], tech_stack: List[str],
+                    responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Only the data the PDF shows, so unrelated session changes keep the same key"""
+    payload = {
+        'personal_info': {field: str(personal_info[field]) for field in PERSONAL_INFO_FIELDS
+                          if personal_info.get(field)},
+        'tech_stack': list(tech_stack),
+        'responses': [
+            {'question': r['question'], 'answer': r['answer'], 'evaluation': r['evaluation']}
+            for r in responses
+        ],
+    }
+    # The resume is referenced by its digest in the resume store, never embedded
+    if personal_info.get('resume_digest'):
+        payload['resume'] = {'name': personal_info.get('resume_name') or 'resume',
+                             'digest': personal_info['resume_digest']}
+    return payload
+
+
+def payload_key(payload: Dict[str, Any]) -> str:
+    """Stable content address of a summary payload"""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def summary_styles() -> StyleSheet1:
+    """Paragraph styles used by the summary"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=1
+    ))
+    styles.add(ParagraphStyle(
+        'CustomSection',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceBefore=20,
+        spaceAfter=12
+    ))
+    return styles
+
+
+def build_summary_pdf(data: Dict[str, Any], output: BinaryIO, styles: Optional[StyleSheet1] = None) -> None:
+    """Write the interview summary PDF for a payload to a binary file
+
+    Pass ``styles`` from ``summary_styles()`` to reuse one stylesheet across many builds.
+    """
+    styles = styles or summary_styles()
+
+    # Set up the document with margins
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    story = [Paragraph("Technical Interview Summary", styles['CustomTitle'])]
+
+    # Add personal information section
+    if data.get('personal_info'):
+        story.append(Paragraph("Personal Information", styles['CustomSection']))
+
+        info = data['personal_info']
+        table_data = [
+            ["Full Name", info.get('full_name', 'N/A')],
+            ["Email", info.get('email', 'N/A')],
+            ["Phone", info.get('phone', 'N/A')],
+            ["Experience", info.get('experience', 'N/A')],
+            ["Position", info.get('desired_position', 'N/A')],
+            ["Location", info.get('location', 'N/A')]
+        ]
+        if data.get('resume'):
+            table_data.append(["Resume", f"{data['resume']['name']} (sha256 {data['resume']['digest'][:12]})"])
+
+        table = Table(table_data, colWidths=[150, 300])
+        table.setStyle(PERSONAL_INFO_TABLE_STYLE)
+        story.append(table)
+        story.append(Spacer(1, 20))
+
+    # Add technical skills section
+    if data.get('tech_stack'):
+        story.append(Paragraph("Technical Skills", styles['Heading2']))
+        story.append(Paragraph(", ".join(data['tech_stack']), styles['Normal']))
+        story.append(Spacer(1, 20))
+
+    # Add interview responses section
+    if data.get('responses'):
+        story.append(Paragraph("Interview Questions and Evaluations", styles['Heading2']))
+
+        for i, resp in enumerate(data['responses'], 1):
+            story.append(Paragraph(f"Question {i}:", styles['Heading3']))
+            story.append(Paragraph(resp['question'], styles['Normal']))
+            story.append(Spacer(1, 10))
+
+            story.append(Paragraph("Your Answer:", styles['Heading4']))
+            story.append(Paragraph(resp['answer'], styles['Normal']))
+            story.append(Spacer(1, 10))
+
+            story.append(Paragraph("AI Evaluation:", styles['Heading4']))
+            story.append(Paragraph(resp['evaluation'], styles['Normal']))
+            story.append(Spacer(1, 20))
+
+    doc.build(story)
+
+
+class PDFReportCache:
+    def __init__(self, directory: str = PDF_CACHE_DIR, workers: int = PDF_WORKERS,
+                 max_bytes: int = PDF_CACHE_MAX_BYTES, max_age: float = PDF_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-render")
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._styles = summary_styles()
+        self._index_path = os.path.join(directory, "index.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS pdfs (key TEXT PRIMARY KEY, refs INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._index_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Hold the index's write lock across reference changes and the file deletions that go with them"""
+        conn = sqlite3.connect(self._index_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def submit(self, payload: Dict[str, Any], hold: bool = False) -> str:
+        """Start building the payload's PDF unless it exists or is being built; returns its key
+
+        With ``hold`` the caller takes a reference to the PDF, given back with ``release``.
+        """
+        key = payload_key(payload)
+        # The reference is taken before the existence check, so a concurrent release
+        # either sees it and keeps the file or deletes the file before the check
+        with self._write_transaction() as conn:
+            if hold:
+                conn.execute("INSERT INTO pdfs (key, refs) VALUES (?, 1) "
+                             "ON CONFLICT(key) DO UPDATE SET refs = refs + 1", (key,))
+            exists = os.path.exists(self.path_for(key))
+        with self._lock:
+            if key not in self._in_flight and not exists:
+                self._in_flight[key] = self._executor.submit(self._build, key, payload)
+        return key
+
+    def _build(self, key: str, payload: Dict[str, Any]) -> str:
+        path = self.path_for(key)
+        # Build into a temporary file and rename, so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".pdf-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                build_summary_pdf(payload, f, self._styles)
+            os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        try:
+            self.evict()
+        except Exception as e:
+            print(f"Error evicting cached PDFs: {str(e)}")
+        return path
+
+    def evict(self) -> int:
+        """Delete PDFs unused for ``max_age``, then the least recently used beyond ``max_bytes``"""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        with self._write_transaction() as conn:
+            for used_at, size, path in files:
+                if now - used_at < self.max_age and total <= self.max_bytes:
+                    break
+                # An evicted PDF is rebuilt on its next submit; its references go with the file
+                self._remove(path)
+                conn.execute("DELETE FROM pdfs WHERE key = ?", (os.path.basename(path)[:-len(".pdf")],))
+                total -= size
+                removed += 1
+        if removed:
+            metrics.inc("talentscout_pdf_cache_evicted_total", "Cached summary PDFs deleted by age or size",
+                        removed)
+        return removed
+
+    def release(self, key: str) -> None:
+        """Drop one reference; the PDF is deleted with its last reference"""
+        with self._write_transaction() as conn:
+            row = conn.execute("UPDATE pdfs SET refs = refs - 1 WHERE key = ? RETURNING refs",
+                               (key,)).fetchone()
+            if row is not None and row[0] <= 0:
+                conn.execute("DELETE FROM pdfs WHERE key = ?", (key,))
+                self._remove(self.path_for(key))
+
+    def refs(self, key: str) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT refs FROM pdfs WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def result(self, key: str, timeout: Optional[float] = None) -> Tuple[str, Any]:
+        """("ready", path), ("pending", None) or ("error", exception) for a submitted key"""
+        path = self.path_for(key)
+        with self._lock:
+            future = self._in_flight.get(key)
+        if future is None:
+            try:
+                os.utime(path)  # last use, for age and size eviction
+            except FileNotFoundError as e:
+                return "error", e
+            return "ready", path
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeout:
+            return "pending", None
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            return "error", e
+        with self._lock:
+            self._in_flight.pop(key, None)
+        return "ready", path
+
+
+_cache: Optional[PDFReportCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PDFReportCache:
+    """Process-wide PDF cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PDFReportCache()
+        return _cache
+
+
+def delete_session_pdfs(session: Dict[str, Any]) -> None:
+    """Give back a deleted session's summary PDF references"""
+    for key in session.get('pdf_keys') or []:
+        try:
+            get_pdf_cache().release(key)
+        except Exception as e:
+            print(f"Error deleting summary PDF {key}: {str(e)}")
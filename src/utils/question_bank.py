@@ -0,0 +1,222 @@
+"""Versioned bank of reviewed technical questions, indexed by skill and difficulty.
+
+``config/question_bank.json`` holds questions written or generated offline
+and reviewed before they are served. Each entry names the skills it tests;
+only entries with ``"reviewed": true`` are loaded, and skills are mapped to
+canonical ids through the skill taxonomy. Bump ``version`` whenever the file
+changes, so metrics and exports can tell bank revisions apart.
+
+An interview asks for one question per slot of ``QUESTION_DIFFICULTY_MIX``.
+``select`` fills each slot from the questions of that difficulty for the
+candidate's skills, picking at random with a weight that grows with the
+number of the candidate's skills a question covers and shrinks for skills
+that already have a question. Slots the bank cannot fill are left empty for
+the LLM, so common skill sets need no generation call at all.
+
+Report coverage, or draft questions for empty slots with the LLM (written
+with ``"reviewed": false`` for a reviewer to approve, leaving out rewordings
+of reviewed questions), with::
+
+    python -m utils.question_bank --coverage
+    python -m utils.question_bank --draft --output drafts.json
+"""
+import argparse
+import json
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from agent.schemas import TechnicalQuestion
+from config.settings import QUESTION_BANK_PATH, QUESTION_DIFFICULTY_MIX
+from utils.metrics import metrics
+from utils.question_dedup import NearDuplicateIndex
+from utils.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+
+# Skill id of questions that suit any candidate; used only for fallbacks
+GENERAL_SKILL = "general"
+
+
+@dataclass(frozen=True)
+class BankQuestion:
+    id: str
+    skills: Tuple[str, ...]  # canonical skill ids
+    difficulty: str
+    question: str
+
+
+class QuestionBank:
+    def __init__(self, data: Dict[str, Any], taxonomy: Optional[SkillTaxonomy] = None):
+        self.taxonomy = taxonomy or get_skill_taxonomy()
+        self.version = data.get("version", 1)
+        self._index: Dict[Tuple[str, str], List[BankQuestion]] = {}
+        self.size = 0
+        for entry in data["questions"]:
+            if not entry.get("reviewed"):
+                continue
+            question = BankQuestion(
+                id=entry["id"],
+                skills=tuple(self.taxonomy.canonicalize(entry["skills"])),
+                difficulty=entry["difficulty"],
+                question=entry["question"],
+            )
+            for skill_id in question.skills:
+                self._index.setdefault((skill_id, question.difficulty), []).append(question)
+            self.size += 1
+        metrics.set("talentscout_question_bank_version", "Version of the loaded question bank", self.version)
+
+    @classmethod
+    def load(cls, path: str = QUESTION_BANK_PATH) -> "QuestionBank":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _to_schema(self, question: BankQuestion, skill_ids: Iterable[str]) -> TechnicalQuestion:
+        skill_ids = set(skill_ids)
+        skill = next((s for s in question.skills if s in skill_ids), question.skills[0])
+        return TechnicalQuestion(question=question.question, difficulty=question.difficulty,
+                                 skill=self.taxonomy.name(skill))
+
+    def select(self, skills: Iterable[str], difficulties: Sequence[str] = QUESTION_DIFFICULTY_MIX,
+               rng: Optional[random.Random] = None) -> List[Optional[TechnicalQuestion]]:
+        """One question per difficulty slot; None where the bank has nothing suitable"""
+        rng = rng or random
+        skill_ids = [s for s in self.taxonomy.canonicalize(skills) if s != GENERAL_SKILL]
+        wanted = set(skill_ids)
+        asked: Counter = Counter()
+        used = set()
+        slots: List[Optional[TechnicalQuestion]] = []
+        for difficulty in difficulties:
+            candidates = {q.id: q for skill_id in skill_ids
+                          for q in self._index.get((skill_id, difficulty), ()) if q.id not in used}
+            if not candidates:
+                slots.append(None)
+                continue
+            pool = list(candidates.values())
+            weights = []
+            for q in pool:
+                covered = [s for s in q.skills if s in wanted]
+                # Favor questions spanning more of the candidate's skills, and skills not asked about yet
+                weights.append(len(covered) ** 2 * 0.5 ** sum(asked[s] for s in covered))
+            choice = rng.choices(pool, weights)[0]
+            used.add(choice.id)
+            asked.update(s for s in choice.skills if s in wanted)
+            slots.append(self._to_schema(choice, wanted))
+        return slots
+
+    def fallback(self, skills: Iterable[str], count: int,
+                 exclude: Iterable[str] = ()) -> List[TechnicalQuestion]:
+        """Questions to pad an interview with when generation fails: any difficulty, then general ones
+
+        ``exclude`` holds questions already asked, as plain text or as display text.
+        """
+        skill_ids = [s for s in self.taxonomy.canonicalize(skills) if s != GENERAL_SKILL] + [GENERAL_SKILL]
+        excluded = set(exclude)
+        found: List[TechnicalQuestion] = []
+        for skill_id in skill_ids:
+            for difficulty in ("Easy", "Medium", "Hard"):
+                for q in self._index.get((skill_id, difficulty), ()):
+                    question = self._to_schema(q, skill_ids)
+                    if len(found) < count and not excluded & {q.question, question.display_text()}:
+                        excluded.add(q.question)
+                        found.append(question)
+        return found
+
+    def coverage(self, skill_ids: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """Questions available per skill and difficulty"""
+        return {skill_id: {difficulty: len(self._index.get((skill_id, difficulty), ()))
+                           for difficulty in ("Easy", "Medium", "Hard")}
+                for skill_id in skill_ids}
+
+
+def record_selection(filled: int, total: int) -> None:
+    """Count a bank lookup; a fully filled interview avoided one generation call"""
+    result = "hit" if filled == total else "partial" if filled else "miss"
+    metrics.inc("talentscout_question_bank_requests_total", "Question bank lookups by outcome", result=result)
+    metrics.inc("talentscout_question_bank_questions_total", "Questions served from the question bank", filled)
+    if result == "hit":
+        metrics.inc("talentscout_question_generation_calls_avoided_total",
+                    "Question generation calls avoided by the question bank")
+
+
+def bank_stats() -> Dict[str, float]:
+    """Hit rate and generation calls avoided so far in this process"""
+    counts = {result: metrics.value("talentscout_question_bank_requests_total", result=result)
+              for result in ("hit", "partial", "miss")}
+    total = sum(counts.values())
+    return {
+        'requests': total,
+        'hit_rate': counts['hit'] / total if total else 0.0,
+        'partial_rate': counts['partial'] / total if total else 0.0,
+        'generation_calls_avoided': metrics.value("talentscout_question_generation_calls_avoided_total"),
+    }
+
+
+_bank: Optional[QuestionBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """Process-wide question bank"""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            _bank = QuestionBank.load()
+        return _bank
+
+
+def draft_missing(bank: QuestionBank, skill_ids: Iterable[str]) -> List[Dict[str, Any]]:
+    """Generate unreviewed entries for every empty skill/difficulty slot"""
+    from agent.conversation_handler import ConversationHandler
+    from agent.rate_limiter import Priority, request_priority
+
+    handler = ConversationHandler(question_cache=None)
+    # Reviewers should not see rewordings of reviewed questions or of each other
+    index = NearDuplicateIndex()
+    reviewed = {q.id: q.question for questions in bank._index.values() for q in questions}
+    for question in reviewed.values():
+        index.add(question)
+    drafts = []
+    with request_priority(Priority.BACKGROUND):
+        for skill_id, counts in bank.coverage(skill_ids).items():
+            missing = [difficulty for difficulty, count in counts.items() if not count]
+            if not missing:
+                continue
+            try:
+                questions = handler._request_questions([bank.taxonomy.name(skill_id)], missing)
+            except Exception as e:
+                print(f"Skipping {skill_id}: {str(e)}")
+                continue
+            for difficulty, question in zip(missing, questions):
+                _, duplicate_of = index.add(question.question)
+                if duplicate_of is not None:
+                    print(f"Dropping near-duplicate draft: {question.question}")
+                    continue
+                drafts.append({"id": f"draft-{skill_id}-{difficulty.lower()}", "skills": [skill_id],
+                               "difficulty": difficulty, "question": question.question, "reviewed": False})
+    return drafts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and extend the question bank")
+    parser.add_argument("--coverage", action="store_true", help="print questions per skill and difficulty")
+    parser.add_argument("--draft", action="store_true", help="draft questions for empty slots with the LLM")
+    parser.add_argument("--output", help="JSON file for drafted questions (default: print them)")
+    args = parser.parse_args()
+
+    bank = get_question_bank()
+    taxonomy = bank.taxonomy
+    skill_ids = [taxonomy.canonical_id(name) for names in taxonomy.form_options().values() for name in names]
+    if args.coverage:
+        print(f"Question bank v{bank.version}: {bank.size} reviewed questions")
+        for skill_id, counts in bank.coverage(skill_ids).items():
+            gaps = [difficulty for difficulty, count in counts.items() if not count]
+            print(f"{taxonomy.name(skill_id):<24} " + " ".join(f"{d}={c}" for d, c in counts.items())
+                  + (f"  missing: {', '.join(gaps)}" if gaps else ""))
+    if args.draft:
+        drafts = draft_missing(bank, skill_ids)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(drafts, f, indent=2, ensure_ascii=False)
+        else:
+            print(json.dumps(drafts, indent=2, ensure_ascii=False))
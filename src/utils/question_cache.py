@@ -0,0 +1,213 @@
+"""On-disk cache of generated technical question sets.
+
+Most candidates pick the same checkbox combinations in the tech-stack form, so
+question sets are cached in SQLite keyed on the sorted canonical skill ids of
+the skill set (see ``utils/skill_taxonomy.py``), so spelling variants share
+an entry.
+Each key keeps a small pool of variants; until the pool is full a lookup is a
+miss so new variants keep being generated, after that candidates get a random
+variant. Entries expire after a TTL and the least recently used skill sets are
+evicted once the cache holds more than ``max_entries`` of them.
+
+Warm the cache for the most requested combinations with::
+
+    python -m utils.question_cache --warm 20
+"""
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import (
+    QUESTION_CACHE_PATH, QUESTION_CACHE_TTL, QUESTION_CACHE_MAX_ENTRIES, QUESTION_CACHE_VARIANTS
+)
+from utils.skill_taxonomy import get_skill_taxonomy
+
+def canonicalize_skills(skills: Iterable[str]) -> Tuple[str, ...]:
+    """Sorted, deduplicated form of a skill set, with every skill mapped to its canonical id"""
+    return tuple(sorted(get_skill_taxonomy().canonicalize(skills)))
+
+
+def skill_set_key(skills: Iterable[str]) -> str:
+    """Cache key for a skill set"""
+    return "|".join(canonicalize_skills(skills))
+
+
+class QuestionCache:
+    def __init__(self, path: str = QUESTION_CACHE_PATH, ttl: float = QUESTION_CACHE_TTL,
+                 max_entries: int = QUESTION_CACHE_MAX_ENTRIES, variants: int = QUESTION_CACHE_VARIANTS):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.variants = variants
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS question_sets (
+                    skill_key TEXT NOT NULL,
+                    variant INTEGER NOT NULL,
+                    questions TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (skill_key, variant)
+                );
+                CREATE TABLE IF NOT EXISTS skill_sets (
+                    skill_key TEXT PRIMARY KEY,
+                    skills TEXT NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_skill_sets_last_used ON skill_sets (last_used);
+                CREATE INDEX IF NOT EXISTS idx_skill_sets_requests ON skill_sets (requests);
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, skills: List[str]) -> Optional[List[str]]:
+        """Return a cached variant, or None while the key's variant pool is still filling"""
+        key = skill_set_key(skills)
+        if not key:
+            return None
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO skill_sets (skill_key, skills, requests, last_used) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(skill_key) DO UPDATE SET requests = requests + 1, last_used = excluded.last_used",
+                (key, json.dumps(list(canonicalize_skills(skills))), now)
+            )
+            conn.execute(
+                "DELETE FROM question_sets WHERE skill_key = ? AND created_at < ?",
+                (key, now - self.ttl)
+            )
+            rows = conn.execute(
+                "SELECT questions FROM question_sets WHERE skill_key = ?", (key,)
+            ).fetchall()
+
+        if len(rows) < self.variants:
+            return None
+        return json.loads(random.choice(rows)[0])
+
+    def put(self, skills: List[str], questions: List[str]) -> None:
+        """Store a generated question set as a new variant for its skill set"""
+        key = skill_set_key(skills)
+        if not key or not questions:
+            return
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO skill_sets (skill_key, skills, requests, last_used) VALUES (?, ?, 0, ?) "
+                "ON CONFLICT(skill_key) DO UPDATE SET last_used = excluded.last_used",
+                (key, json.dumps(list(canonicalize_skills(skills))), now)
+            )
+            # Replace the oldest variant once the pool is full
+            rows = conn.execute(
+                "SELECT variant FROM question_sets WHERE skill_key = ? ORDER BY created_at", (key,)
+            ).fetchall()
+            used = {row[0] for row in rows}
+            if len(rows) >= self.variants:
+                variant = rows[0][0]
+            else:
+                variant = next(i for i in range(self.variants) if i not in used)
+            conn.execute(
+                "INSERT OR REPLACE INTO question_sets (skill_key, variant, questions, created_at) VALUES (?, ?, ?, ?)",
+                (key, variant, json.dumps(questions), now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop expired skill sets with their variants, then the least recently used beyond max_entries"""
+        expired = time.time() - self.ttl
+        conn.execute("DELETE FROM question_sets WHERE skill_key IN "
+                     "(SELECT skill_key FROM skill_sets WHERE last_used < ?)", (expired,))
+        conn.execute("DELETE FROM skill_sets WHERE last_used < ?", (expired,))
+        count = conn.execute("SELECT COUNT(DISTINCT skill_key) FROM question_sets").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Variants without a skill_sets row (left by older versions) rank as least recently used
+        conn.execute("""
+            DELETE FROM question_sets WHERE skill_key IN (
+                SELECT q.skill_key FROM question_sets q
+                LEFT JOIN skill_sets s ON s.skill_key = q.skill_key
+                GROUP BY q.skill_key
+                ORDER BY COALESCE(MAX(s.last_used), 0)
+                LIMIT ?
+            )
+        """, (count - self.max_entries,))
+
+    def missing_variants(self, skills: List[str]) -> int:
+        """Number of variants still needed to fill a skill set's pool"""
+        key = skill_set_key(skills)
+        with self._lock, self._connect() as conn:
+            count = conn.execute(
+                "SELECT COUNT(*) FROM question_sets WHERE skill_key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()[0]
+        return max(self.variants - count, 0)
+
+    def most_requested(self, limit: int) -> List[List[str]]:
+        """Skill sets ordered by how often candidates asked for them"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT skills FROM skill_sets ORDER BY requests DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+_cache: Optional[QuestionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_question_cache() -> QuestionCache:
+    """Process-wide question cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QuestionCache()
+        return _cache
+
+
+def warm_cache(limit: int, extra_combinations: Optional[List[List[str]]] = None) -> int:
+    """Fill the variant pools of the most requested skill sets; returns sets generated"""
+    from agent.conversation_handler import ConversationHandler
+    from agent.rate_limiter import Priority, request_priority
+
+    cache = get_question_cache()
+    handler = ConversationHandler()
+    taxonomy = get_skill_taxonomy()
+    generated = 0
+    with request_priority(Priority.BACKGROUND):
+        for skills in (extra_combinations or []) + cache.most_requested(limit):
+            # Stored skill sets hold canonical ids; prompt with the display names
+            skills = [taxonomy.name(skill) for skill in skills]
+            for _ in range(cache.missing_variants(skills)):
+                questions, complete = handler._generate_questions(skills)
+                if complete:
+                    cache.put(skills, questions)
+                    generated += 1
+    return generated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fill the technical question cache")
+    parser.add_argument("--warm", type=int, default=20, help="number of most requested skill sets to fill")
+    parser.add_argument("--combinations", help="JSON file with a list of skill lists to fill as well")
+    args = parser.parse_args()
+
+    extra = None
+    if args.combinations:
+        with open(args.combinations) as f:
+            extra = json.load(f)
+    print(f"Generated {warm_cache(args.warm, extra)} question sets")
@@ -0,0 +1,350 @@
+"""Near-duplicate index of question texts: MinHash signatures with LSH banding.
+
+Generated questions are often rewordings of one another ("How would you
+debug a slow Django view?" / "How do you debug a slow view in Django?").
+Every question is reduced to a MinHash signature over its 5-byte shingles
+(after dropping the difficulty prefix, case and punctuation), so the share of
+equal signature entries estimates the Jaccard similarity of two questions.
+
+Signatures are split into bands; questions sharing any band are candidates,
+and only candidates are compared, so a lookup touches a handful of entries
+however large the index grows. Questions at or above ``threshold`` are near
+duplicates; adding one merges its cluster with theirs (union-find), so
+chains of rewordings end up in one cluster.
+
+Memory is bounded: the index keeps the newest ``max_items`` questions in
+fixed-size NumPy arrays (16-bit signature entries, band keys and chain
+links) plus an open-addressing table of band keys that is rebuilt, without
+evicted questions, once it fills up. Texts are not stored; callers map the
+returned ids to their own data. Cluster labels are the id of the oldest
+question in the cluster and outlive its eviction.
+
+Report near-duplicate clusters among the cached question sets with::
+
+    python -m utils.question_dedup --cache
+"""
+import argparse
+import json
+import re
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import (
+    QUESTION_DEDUP_THRESHOLD, QUESTION_DEDUP_PERMUTATIONS, QUESTION_DEDUP_BANDS, QUESTION_DEDUP_MAX_ITEMS
+)
+from utils.metrics import metrics
+
+SHINGLE_SIZE = 5
+# Candidates followed per band; longer chains are one popular question asked many ways
+MAX_CHAIN = 16
+# Band table load that triggers a resize, or a rebuild once at full size
+TABLE_LOAD = 0.6
+
+_DIFFICULTY_PREFIX = re.compile(r"^\s*\[Difficulty: \w+\]\s*")
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+
+
+def normalize_question(text: str) -> str:
+    """Question text without the difficulty prefix, case and punctuation"""
+    text = _DIFFICULTY_PREFIX.sub("", text).lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+class MinHasher:
+    """MinHash signatures over byte shingles, with multiply-shift hash functions"""
+
+    def __init__(self, permutations: int = QUESTION_DEDUP_PERMUTATIONS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.permutations = permutations
+        self._a = (rng.integers(0, 2 ** 63, permutations, dtype=np.uint64) << np.uint64(1) | np.uint64(1))[:, None]
+        self._b = rng.integers(0, 2 ** 63, permutations, dtype=np.uint64)[:, None]
+
+    def signature(self, text: str) -> np.ndarray:
+        """16-bit minimum per hash function (b-bit MinHash)"""
+        data = normalize_question(text).encode().ljust(SHINGLE_SIZE)
+        raw = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+        count = len(raw) - SHINGLE_SIZE + 1
+        shingles = raw[:count].copy()
+        for i in range(1, SHINGLE_SIZE):
+            shingles |= raw[i:i + count] << np.uint64(8 * i)
+        # Multiplication wraps modulo 2**64; the high 32 bits are the hash
+        hashes = (self._a * shingles[None, :] + self._b) >> np.uint64(32)
+        return (hashes.min(axis=1) & np.uint64(0xFFFF)).astype(np.uint16)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def is_near_duplicate(question: str, others: Sequence[str], threshold: float = QUESTION_DEDUP_THRESHOLD,
+                      hasher: Optional[MinHasher] = None) -> bool:
+    """Whether ``question`` rewords any of ``others``; for small lists, without an index"""
+    if not others:
+        return False
+    hasher = hasher or get_question_index().hasher
+    signature = hasher.signature(question)
+    return any(similarity(signature, hasher.signature(other)) >= threshold for other in others)
+
+
+def _table_size(entries: float) -> int:
+    size = 1024
+    while size * TABLE_LOAD < entries:
+        size *= 2
+    return size
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = QUESTION_DEDUP_THRESHOLD,
+                 permutations: int = QUESTION_DEDUP_PERMUTATIONS, bands: int = QUESTION_DEDUP_BANDS,
+                 max_items: int = QUESTION_DEDUP_MAX_ITEMS, seed: int = 1):
+        if permutations % bands:
+            raise ValueError(f"{bands} bands do not divide {permutations} permutations")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        self.max_items = max_items
+        self.hasher = MinHasher(permutations, seed)
+        rng = np.random.default_rng(seed + 1)
+        self._band_mix = rng.integers(0, 2 ** 63, (bands, self.rows), dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+        self._band_salt = rng.integers(0, 2 ** 63, bands, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._count = 0  # questions ever added, and so the next id
+        self.duplicates = 0
+
+        # Per slot, where slot = id % max_items, so the newest max_items questions are kept.
+        # The loops over slots and table cells use stdlib arrays, which index faster than NumPy.
+        self._ids = array("q")
+        self._parents = array("q")  # parent id, for union-find
+        self._band_keys = array("I")  # slot * bands + band
+        self._next = array("i")  # older slot with the same band key, by slot * bands + band
+        self._signatures = np.zeros((0, permutations), dtype=np.uint16)
+
+        # Open addressing from band key to the newest slot holding it; key 0 marks an empty cell.
+        # At full size it holds the keys of max_items questions at 40% load.
+        self._max_table = _table_size(bands * max_items * 1.5)
+        self._table_keys = array("I", bytes(4 * 1024))
+        self._table_heads = array("i", bytes(4 * 1024))
+        self._table_used = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.max_items)
+
+    def _keys_for(self, signature: np.ndarray) -> List[int]:
+        rows = signature.reshape(self.bands, self.rows).astype(np.uint64)
+        mixed = (rows * self._band_mix).sum(axis=1) + self._band_salt
+        return (((mixed * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)) | np.uint64(1)).tolist()
+
+    def _cell(self, key: int) -> int:
+        keys = self._table_keys
+        mask = len(keys) - 1
+        cell = key & mask
+        while keys[cell] and keys[cell] != key:
+            cell = (cell + 1) & mask
+        return cell
+
+    def _head(self, key: int) -> int:
+        cell = self._cell(key)
+        return self._table_heads[cell] if self._table_keys[cell] else -1
+
+    def _set_head(self, key: int, slot: int) -> None:
+        cell = self._cell(key)
+        if not self._table_keys[cell]:
+            self._table_keys[cell] = key
+            self._table_used += 1
+        self._table_heads[cell] = slot
+
+    def _candidates(self, keys: List[int]) -> List[int]:
+        """Slots sharing a band with ``keys``"""
+        ids, band_keys, links, bands = self._ids, self._band_keys, self._next, self.bands
+        found = set()
+        for band, key in enumerate(keys):
+            slot, newer = self._head(key), self._count
+            for _ in range(MAX_CHAIN):
+                # A reused slot holds a newer question, which ends the chain
+                if slot < 0 or not 0 <= ids[slot] < newer or band_keys[slot * bands + band] != key:
+                    break
+                found.add(slot)
+                newer = ids[slot]
+                slot = links[slot * bands + band]
+        return sorted(found)
+
+    def _matches(self, signature: np.ndarray, keys: List[int]) -> List[Tuple[int, float]]:
+        """(id, similarity) of the indexed questions at or above the threshold, best first"""
+        slots = self._candidates(keys)
+        if not slots:
+            return []
+        scores = np.count_nonzero(self._signatures[slots] == signature, axis=1) / len(signature)
+        matches = [(self._ids[slot], score) for slot, score in zip(slots, scores.tolist()) if score >= self.threshold]
+        return sorted(matches, key=lambda match: -match[1])
+
+    def query(self, text: str) -> Optional[Tuple[int, float]]:
+        """Id and estimated similarity of the closest near duplicate of ``text``, if any"""
+        signature = self.hasher.signature(text)
+        keys = self._keys_for(signature)
+        with self._lock:
+            matches = self._matches(signature, keys)
+        return matches[0] if matches else None
+
+    def add(self, text: str) -> Tuple[int, Optional[int]]:
+        """Index a question; returns its id and the id of its closest near duplicate, if any"""
+        signature = self.hasher.signature(text)
+        keys = self._keys_for(signature)
+        with self._lock:
+            matches = self._matches(signature, keys)
+            item_id = self._count
+            slot = item_id % self.max_items
+            if slot >= len(self._ids):
+                self._grow()
+            base = slot * self.bands
+            for band, key in enumerate(keys):
+                cell = self._cell(key)
+                if self._table_keys[cell]:
+                    head = self._table_heads[cell]
+                else:
+                    head = -1
+                    self._table_keys[cell] = key
+                    self._table_used += 1
+                # The slot may be reused by a question with the same key: keep the evicted one's link
+                if head != slot:
+                    self._next[base + band] = head
+                self._band_keys[base + band] = key
+                self._table_heads[cell] = slot
+            self._ids[slot] = item_id
+            self._parents[slot] = item_id
+            self._signatures[slot] = signature
+            self._count += 1
+            for match_id, _ in matches:
+                self._union(item_id, match_id)
+            if matches:
+                self.duplicates += 1
+            if self._table_used > len(self._table_keys) * TABLE_LOAD:
+                self._rebuild_table()
+        return item_id, matches[0][0] if matches else None
+
+    def cluster(self, item_id: int) -> int:
+        """Cluster label of a question: the id of the oldest question it was merged with"""
+        with self._lock:
+            return self._find(item_id)
+
+    def _live_parent(self, item_id: int) -> int:
+        slot = item_id % self.max_items
+        if slot < len(self._ids) and self._ids[slot] == item_id:
+            return self._parents[slot]
+        # Evicted: the id still labels its cluster
+        return item_id
+
+    def _find(self, item_id: int) -> int:
+        while True:
+            parent = self._live_parent(item_id)
+            if parent == item_id:
+                return item_id
+            grandparent = self._live_parent(parent)
+            self._parents[item_id % self.max_items] = grandparent  # path halving
+            item_id = grandparent
+
+    def _union(self, a: int, b: int) -> None:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        for parent, node in ((min(a, b), max(a, b)), (max(a, b), min(a, b))):
+            # Only a question still in the index can be attached to another
+            slot = node % self.max_items
+            if slot < len(self._ids) and self._ids[slot] == node:
+                self._parents[slot] = parent
+                return
+
+    def _grow(self) -> None:
+        capacity = min(max(len(self._ids) * 2, 1024), self.max_items)
+        extra = capacity - len(self._ids)
+        self._ids.extend([-1] * extra)
+        self._parents.extend([0] * extra)
+        self._band_keys.extend([0] * (extra * self.bands))
+        self._next.extend([-1] * (extra * self.bands))
+        self._signatures = np.concatenate([self._signatures, np.zeros((extra, self._signatures.shape[1]), np.uint16)])
+
+    def _rebuild_table(self) -> None:
+        """Double the band table, or at full size rebuild it without evicted keys"""
+        size = min(len(self._table_keys) * 2, self._max_table)
+        self._table_keys = array("I", bytes(4 * size))
+        self._table_heads = array("i", bytes(4 * size))
+        self._table_used = 0
+        live = sorted((item_id, slot) for slot, item_id in enumerate(self._ids) if item_id >= 0)
+        for _, slot in live:
+            base = slot * self.bands
+            for band in range(self.bands):
+                key = self._band_keys[base + band]
+                self._next[base + band] = self._head(key)
+                self._set_head(key, slot)
+        metrics.inc("talentscout_question_dedup_rebuilds_total", "Band table rebuilds of the question index")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            arrays = (self._ids, self._parents, self._band_keys, self._next, self._table_keys, self._table_heads)
+            return {
+                'items': len(self),
+                'added': self._count,
+                'evicted': max(self._count - self.max_items, 0),
+                'near_duplicates': self.duplicates,
+                'table_load': self._table_used / len(self._table_keys),
+                'memory_mb': (sum(a.itemsize * len(a) for a in arrays) + self._signatures.nbytes) / 2 ** 20,
+            }
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_question_index() -> NearDuplicateIndex:
+    """Process-wide index of the questions generated so far"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
+
+
+def record_generated(question: str) -> bool:
+    """Index a generated question; True if it rewords one generated before"""
+    _, duplicate_of = get_question_index().add(question)
+    result = "near_duplicate" if duplicate_of is not None else "novel"
+    metrics.inc("talentscout_generated_questions_total", "Generated questions by novelty", result=result)
+    return duplicate_of is not None
+
+
+def cluster_questions(questions: Iterable[str], index: Optional[NearDuplicateIndex] = None) -> List[List[str]]:
+    """Groups of near-duplicate questions, largest first; unique questions are left out"""
+    index = index or NearDuplicateIndex()
+    added = [(index.add(question)[0], question) for question in questions]
+    clusters: Dict[int, List[str]] = {}
+    for item_id, question in added:
+        clusters.setdefault(index.cluster(item_id), []).append(question)
+    return sorted((group for group in clusters.values() if len(group) > 1), key=len, reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions")
+    parser.add_argument("--cache", action="store_true", help="cluster the questions in the question cache")
+    parser.add_argument("--input", help="JSON file with a list of questions to cluster")
+    args = parser.parse_args()
+
+    questions: List[str] = []
+    if args.cache:
+        from config.settings import QUESTION_CACHE_PATH
+        with sqlite3.connect(QUESTION_CACHE_PATH) as conn:
+            for (stored,) in conn.execute("SELECT questions FROM question_sets"):
+                questions.extend(json.loads(stored))
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            questions.extend(json.load(f))
+
+    clusters = cluster_questions(questions)
+    print(f"{len(questions)} questions, {sum(len(c) for c in clusters)} in {len(clusters)} near-duplicate clusters")
+    for group in clusters:
+        print(f"\n{len(group)} x")
+        for question in dict.fromkeys(group):
+            print(f"  {question}")
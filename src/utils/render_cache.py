@@ -0,0 +1,46 @@
+"""Process-wide cache of rendered HTML keyed by content hash.
+
+The completion page is re-run on every interaction, and rendering each
+evaluation means parsing it and building its HTML again. Responses are
+rendered once, when their evaluation arrives. The result is kept under a hash
+of the content, so every rerun, and every session showing the same content,
+reuses it. Least recently used entries are dropped beyond ``max_entries``.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from config.settings import RENDER_CACHE_SIZE
+
+
+def content_hash(*parts: Any) -> str:
+    """Stable hash of JSON-serializable content"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: str, render: Callable[[], str]) -> str:
+        """Return the cached HTML for ``key``, rendering and storing it on a miss"""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                return html
+        html = render()
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+
+render_cache = RenderCache()
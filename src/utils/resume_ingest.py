@@ -0,0 +1,223 @@
+"""Resume ingestion: store uploads on disk and extract their text off the script thread.
+
+Streamlit keeps an uploaded file in memory for as long as something holds the
+``UploadedFile``. The personal-info form hands the upload to ``ResumeIngestor``
+instead. On a worker pool, the ingestor streams it into the content-addressed
+resume store (``utils/blob_store.py``), enforcing ``RESUME_MAX_BYTES``, and
+extracts at most ``RESUME_TEXT_LIMIT`` characters of text. Text is cached
+by digest, so a file uploaded again is not extracted again. The session keeps
+only the extracted text and the resume's digest.
+
+Text extraction reads the file incrementally and stops at the limit:
+
+* PDF: page by page with ``pypdf`` (in requirements.txt). Without it, the
+  string operands of the text operators in each (ASCII85/Flate-encoded)
+  content stream are decoded one stream at a time, escapes included;
+* DOCX: ``word/document.xml`` is streamed through ``iterparse``;
+* DOC: printable ASCII and UTF-16 runs are collected chunk by chunk.
+"""
+import base64
+import mmap
+import os
+import re
+import threading
+import zipfile
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+from xml.etree import ElementTree
+
+from config.settings import RESUME_MAX_BYTES, RESUME_TEXT_LIMIT, RESUME_WORKERS
+from utils.blob_store import BlobStore, get_resume_store
+from utils.metrics import metrics
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+CHUNK_SIZE = 64 * 1024
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+SUPPORTED_EXTENSIONS = {".pdf", ".doc", ".docx"}
+
+# The body of a PDF literal string; an escaped character may be a parenthesis
+PDF_STRING = re.compile(rb"\(((?:[^\\)]|\\.)*)\)", re.DOTALL)
+# Tj shows one string, TJ an array of strings and kerning offsets
+TEXT_OPERATOR = re.compile(rb"\[((?:\((?:[^\\)]|\\.)*\)|[^\]()])*)\]\s*TJ|\(((?:[^\\)]|\\.)*)\)\s*Tj", re.DOTALL)
+# Escapes other than these and octal codes stand for the escaped character itself
+PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+               b"\n": b"", b"\r": b"", b"\r\n": b""}  # a backslash before a line break joins the lines
+
+
+@dataclass
+class IngestedResume:
+    digest: str  # SHA-256 of the file in the resume store
+    file_name: str
+    size: int
+    text: str
+
+
+def _unescape_pdf_string(literal: bytes) -> str:
+    """Text of a PDF literal string body, with its backslash escapes resolved"""
+    def replace(match: re.Match) -> bytes:
+        escape = match.group(1)
+        if escape[0] in b"01234567":
+            return bytes([int(escape, 8) & 0xFF])
+        return PDF_ESCAPES.get(escape, escape)
+
+    return re.sub(rb"\\([0-7]{1,3}|\r\n|.)", replace, literal, flags=re.DOTALL).decode("latin-1")
+
+
+def _pdf_text(path: str) -> Iterator[str]:
+    if PdfReader is not None:
+        for page in PdfReader(path).pages:
+            yield (page.extract_text() or "") + "\n"
+        return
+
+    # Without pypdf: decode the string operands of Tj/TJ in each content stream
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # A stream keyword follows its dictionary; this also skips the "stream" in "endstream"
+        for match in re.finditer(rb">>\s*stream\r?\n", data):
+            end = data.find(b"endstream", match.end())
+            if end < 0:
+                break
+            raw = data[match.end():end].strip()
+            if raw.endswith(b"~>"):
+                try:
+                    raw = base64.a85decode(raw if raw.startswith(b"<~") else b"<~" + raw, adobe=True)
+                except ValueError:
+                    continue
+            try:
+                raw = zlib.decompress(raw)
+            except zlib.error:
+                pass
+            for operator in TEXT_OPERATOR.finditer(raw):
+                array, string = operator.groups()
+                strings = PDF_STRING.findall(array) if array is not None else [string]
+                yield "".join(_unescape_pdf_string(string) for string in strings) + " "
+
+
+def _docx_text(path: str) -> Iterator[str]:
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document:
+        for event, element in ElementTree.iterparse(document, events=("end",)):
+            if element.tag == f"{WORD_NAMESPACE}t" and element.text:
+                yield element.text
+            elif element.tag == f"{WORD_NAMESPACE}p":
+                yield "\n"
+                element.clear()
+
+
+def _doc_text(path: str) -> Iterator[str]:
+    # Legacy Word files store text as runs of 8-bit or UTF-16LE characters
+    runs = re.compile(rb"(?:[\x20-\x7e\r\n\t]\x00){4,}|[\x20-\x7e\r\n\t]{4,}")
+    with open(path, "rb") as f:
+        carry = b""
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            data = carry + chunk
+            carry = b""
+            for match in runs.finditer(data):
+                run = match.group()
+                # A run touching the end of the chunk may continue in the next one. Only
+                # a bounded tail is carried over, so long runs are not re-copied per chunk
+                if chunk and match.end() == len(data):
+                    if len(run) > CHUNK_SIZE:
+                        # An even cut keeps UTF-16 runs aligned; the tail still matches on its own
+                        yield run[:-8].decode("utf-16-le" if b"\x00" in run else "ascii", "ignore")
+                        run = run[-8:]
+                    carry = run
+                    break
+                yield run.decode("utf-16-le" if b"\x00" in run else "ascii", "ignore") + " "
+            if not chunk:
+                break
+
+
+def extract_text(path: str, file_name: str, limit: int = RESUME_TEXT_LIMIT) -> str:
+    """Text of a PDF/DOC/DOCX file, read incrementally and truncated at ``limit`` characters"""
+    extension = os.path.splitext(file_name)[1].lower()
+    pieces = {".pdf": _pdf_text, ".docx": _docx_text, ".doc": _doc_text}.get(extension)
+    if pieces is None:
+        return ""
+    text = []
+    length = 0
+    for piece in pieces(path):
+        text.append(piece)
+        length += len(piece)
+        if length >= limit:
+            break
+    text = re.sub(r"[ \t]+", " ", "".join(text))
+    return re.sub(r"\s*\n\s*", "\n", text)[:limit].strip()
+
+
+class ResumeIngestor:
+    def __init__(self, workers: int = RESUME_WORKERS, store: Optional[BlobStore] = None):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-ingest")
+        self._store = store
+
+    def submit(self, upload) -> Future:
+        """Spool and extract an UploadedFile-like object; the Future yields an IngestedResume"""
+        return self._executor.submit(self.ingest, upload)
+
+    def ingest(self, upload) -> IngestedResume:
+        file_name = getattr(upload, "name", "resume")
+        extension = os.path.splitext(file_name)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported resume format: {extension or file_name}")
+        store = self._store or get_resume_store()
+        upload.seek(0)
+        digest, size = store.put(upload, RESUME_MAX_BYTES)
+        text = store.get_text(digest)
+        if text is not None:
+            metrics.inc("talentscout_resume_extract_cache_hits_total", "Resumes whose text was already extracted")
+            return IngestedResume(digest, file_name, size, text)
+
+        # The stored blob has no extension; the uploaded name picks the extractor
+        try:
+            text = extract_text(store.path(digest), file_name)
+        except Exception as e:
+            # Keep the file even when its text cannot be read
+            print(f"Error extracting resume text: {str(e)}")
+            text = ""
+        store.set_text(digest, text)
+        return IngestedResume(digest, file_name, size, text)
+
+
+_ingestor: Optional[ResumeIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def get_resume_ingestor() -> ResumeIngestor:
+    """Process-wide resume ingestor"""
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = ResumeIngestor()
+        return _ingestor
+
+
+def release_session_resume(session: Dict[str, Any]) -> None:
+    """Drop a deleted session's reference to its resume"""
+    digest = (session.get('personal_info') or {}).get('resume_digest')
+    if digest:
+        try:
+            get_resume_store().release(digest)
+        except Exception as e:
+            print(f"Error releasing resume {digest}: {str(e)}")
+
+
+def abandon_ingestion(job: Future) -> None:
+    """Cancel an ingestion nobody will collect, or give back its reference once it finishes"""
+    if job.cancel():
+        return  # never started, so it took no reference
+
+    def release(job: Future) -> None:
+        if job.cancelled() or job.exception() is not None:
+            return
+        digest = job.result().digest
+        try:
+            get_resume_store().release(digest)
+        except Exception as e:
+            print(f"Error releasing resume {digest}: {str(e)}")
+
+    job.add_done_callback(release)
@@ -1,44 +1,293 @@
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+import heapq
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple, TypeVar
+from datetime import datetime
 
-# Constants
-SESSION_TIMEOUT = 3600  # 1 hour timeout
+from config.settings import SESSION_TIMEOUT, MAX_SESSIONS, SESSION_SWEEP_INTERVAL, SESSION_SHARDS
+from utils.metrics import metrics
+from utils.session_store import SessionStore
+
+T = TypeVar("T")
+
+
+class _LiveCount:
+    """Sessions held in memory across all stripes"""
 
-class SessionManager:
     def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
-    
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.value += n
+
+
+class _SessionShard:
+    """One lock stripe: its sessions in LRU order plus their expiry heap"""
+
+    def __init__(self, timeout: float, live: _LiveCount,
+                 on_delete: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.timeout = timeout
+        self.live = live
+        self.on_delete = on_delete
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.used_at: Dict[str, float] = {}
+        self.expiry_heap: List[Tuple[float, str]] = []
+        self.expires_at: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.expired_count = 0
+        self.evicted_count = 0
+
+    def is_valid(self, session_id: str) -> bool:
+        """Check if session is valid and not expired; call with the lock held"""
+        if session_id not in self.sessions:
+            return False
+        if self.expires_at[session_id] <= time.monotonic():
+            self.remove_expired(session_id)
+            return False
+        return True
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        if session_id not in self.sessions:
+            self.live.add(1)
+        self.sessions[session_id] = data
+
+    def mark_used(self, session_id: str) -> None:
+        self.sessions.move_to_end(session_id)
+        self.used_at[session_id] = time.monotonic()
+
+    def touch(self, session_id: str) -> None:
+        """Push a new expiry time and mark the session most recently used"""
+        expires_at = time.monotonic() + self.timeout
+        self.expires_at[session_id] = expires_at
+        heapq.heappush(self.expiry_heap, (expires_at, session_id))
+        self.mark_used(session_id)
+        # Superseded entries are skipped lazily; rebuild when they dominate the heap
+        if len(self.expiry_heap) > 2 * len(self.sessions) + 64:
+            self.expiry_heap = [(t, sid) for sid, t in self.expires_at.items()]
+            heapq.heapify(self.expiry_heap)
+
+    def oldest_use(self) -> Optional[float]:
+        """Last use of the stripe's least recently used session"""
+        if not self.sessions:
+            return None
+        return self.used_at[next(iter(self.sessions))]
+
+    def evict_oldest(self) -> None:
+        evicted_id, evicted = self.sessions.popitem(last=False)
+        self._forget(evicted_id)
+        if self.on_delete:
+            self.on_delete(evicted)
+        self.evicted_count += 1
+        metrics.inc("talentscout_sessions_evicted_total", "Sessions evicted by the capacity cap")
+
+    def _forget(self, session_id: str) -> None:
+        del self.expires_at[session_id]
+        del self.used_at[session_id]
+        self.live.add(-1)
+
+    def remove_expired(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id)
+        self._forget(session_id)
+        if self.on_delete:
+            self.on_delete(session)
+        self.expired_count += 1
+        metrics.inc("talentscout_sessions_expired_total", "Sessions removed after the timeout")
+
+    def expire(self, now: float) -> int:
+        removed = 0
+        with self.lock:
+            while self.expiry_heap and self.expiry_heap[0][0] <= now:
+                expires_at, session_id = heapq.heappop(self.expiry_heap)
+                if self.expires_at.get(session_id) == expires_at:
+                    self.remove_expired(session_id)
+                    removed += 1
+        return removed
+
+
+class SessionManager:
+    """In-memory sessions with active expiry, a capacity cap and lock striping
+
+    Sessions are spread over ``shards`` independently locked stripes by a hash
+    of the session id, so sessions on different stripes never contend. Every
+    operation holds exactly one stripe lock, which makes ``update_session`` and
+    ``modify_session`` atomic and removes the check-then-delete race of expiry.
+
+    Within a stripe sessions are kept in least-recently-used order and every
+    create/update pushes the new expiry time onto a heap; ``expire_sessions``
+    pops expired entries in O(log n) each and skips entries made stale by a
+    later update.
+
+    ``max_sessions`` caps the sessions held in memory across all stripes.
+    Going over it evicts the least recently used session of the whole
+    manager: each stripe's oldest session is compared by its last use, so the
+    global LRU order is exact up to concurrent accesses during the scan.
+
+    With a ``SessionStore`` every change is also queued for write-behind, and a
+    session missing from memory (evicted, or created by another process before
+    a restart) is loaded from the store on first access. A session in memory
+    is reloaded when another process has saved a newer version of it.
+
+    ``on_delete`` is called with the data of every session deleted for good:
+    sessions the store deletes, or, without a store, sessions that expire or
+    are evicted from memory.
+    """
+
+    def __init__(self, timeout: float = SESSION_TIMEOUT, max_sessions: int = MAX_SESSIONS,
+                 shards: int = SESSION_SHARDS, store: Optional[SessionStore] = None,
+                 on_delete: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.timeout = timeout
+        self.max_sessions = max(max_sessions, 1)
+        self.store = store
+        self.on_delete = on_delete
+        shard_on_delete = on_delete if store is None else None
+        self._live = _LiveCount()
+        self._shards = [_SessionShard(timeout, self._live, shard_on_delete) for _ in range(shards)]
+        self._evict_lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _shard(self, session_id: str) -> _SessionShard:
+        # crc32 rather than hash() so the mapping is stable across processes
+        return self._shards[zlib.crc32(session_id.encode()) % len(self._shards)]
+
     def create_session(self, session_id: str) -> None:
         """Create a new session"""
-        self.sessions[session_id] = {
-            'created_at': datetime.now(),
-            'last_updated': datetime.now(),
-            'candidate_info': {},
-            'tech_stack': [],
-            'current_stage': 'greeting',
-            'responses': []
-        }
+        shard = self._shard(session_id)
+        shard.expire(time.monotonic())
+        with shard.lock:
+            shard.put(session_id, {
+                'created_at': datetime.now(),
+                'last_updated': datetime.now(),
+                'candidate_info': {},
+                'tech_stack': [],
+                'current_stage': 'greeting',
+                'responses': []
+            })
+            shard.touch(session_id)
+            if self.store:
+                self.store.write(session_id, shard.sessions[session_id])
+        self._enforce_cap()
+
+    def _enforce_cap(self) -> None:
+        """Evict least recently used sessions, across all stripes, while over ``max_sessions``"""
+        if self._live.value <= self.max_sessions:
+            return
+        # One evictor at a time, so concurrent creates do not each evict for the same overflow
+        with self._evict_lock:
+            while self._live.value > self.max_sessions:
+                oldest = None
+                for shard in self._shards:
+                    with shard.lock:
+                        used_at = shard.oldest_use()
+                    if used_at is not None and (oldest is None or used_at < oldest[0]):
+                        oldest = (used_at, shard)
+                if oldest is None:
+                    return
+                shard = oldest[1]
+                with shard.lock:
+                    if shard.sessions:
+                        shard.evict_oldest()
     
     def update_session(self, session_id: str, data: Dict[str, Any]) -> None:
         """Update an existing session"""
-        if session_id in self.sessions:
-            self.sessions[session_id].update(data)
-            self.sessions[session_id]['last_updated'] = datetime.now()
+        self.modify_session(session_id, lambda session: session.update(data))
+
+    def modify_session(self, session_id: str, fn: Callable[[Dict[str, Any]], T]) -> Optional[T]:
+        """Atomically apply ``fn`` to a session's data; returns its result, None if no session
+
+        ``fn`` runs with the stripe lock held, so it must not call back into the manager.
+        """
+        shard = self._load(session_id)
+        with shard.lock:
+            if not shard.is_valid(session_id):
+                return None
+            session = shard.sessions[session_id]
+            result = fn(session)
+            session['last_updated'] = datetime.now()
+            shard.touch(session_id)
+            if self.store:
+                self.store.write(session_id, session)
+            return result
     
     def get_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session data if session exists and is valid"""
-        if session_id in self.sessions:
-            if self._is_session_valid(session_id):
-                return self.sessions[session_id]
-        return None
+        """Get a snapshot of the session data if session exists and is valid"""
+        shard = self._load(session_id)
+        with shard.lock:
+            if not shard.is_valid(session_id):
+                return None
+            shard.mark_used(session_id)
+            return dict(shard.sessions[session_id])
     
+    def _load(self, session_id: str) -> _SessionShard:
+        """Return the session's shard, loading the session from the store if it is not in memory
+
+        A memory copy is replaced when another process has saved the session since.
+        """
+        shard = self._shard(session_id)
+        if self.store is None:
+            return shard
+        with shard.lock:
+            in_memory = shard.is_valid(session_id)
+        # Read outside the stripe lock so other sessions on the stripe are not blocked
+        if in_memory and not self.store.newer_in_store(session_id):
+            return shard
+        data = self.store.load(session_id, self.timeout)
+        if data is not None:
+            with shard.lock:
+                if in_memory and session_id in shard.sessions:
+                    shard.sessions[session_id] = data
+                    metrics.inc("talentscout_sessions_reloaded_total",
+                                "Sessions reloaded because another process saved them")
+                elif session_id not in shard.sessions:
+                    shard.put(session_id, data)
+                else:
+                    return shard
+                shard.touch(session_id)
+            self._enforce_cap()
+        return shard
+
     def _is_session_valid(self, session_id: str) -> bool:
         """Check if session is valid and not expired"""
-        if session_id not in self.sessions:
-            return False
-        
-        last_updated = self.sessions[session_id]['last_updated']
-        if datetime.now() - last_updated > timedelta(seconds=SESSION_TIMEOUT):
-            del self.sessions[session_id]
-            return False
-        return True 
\ No newline at end of file
+        shard = self._shard(session_id)
+        with shard.lock:
+            return shard.is_valid(session_id)
+
+    def expire_sessions(self) -> int:
+        """Remove every expired session; returns how many were removed"""
+        now = time.monotonic()
+        removed = sum(shard.expire(now) for shard in self._shards)
+        if self.store:
+            self.store.delete_expired(self.timeout, on_delete=self.on_delete)
+        metrics.set("talentscout_sessions_live", "Sessions held in memory", self.get_stats()['live'])
+        return removed
+
+    def start_sweeper(self, interval: float = SESSION_SWEEP_INTERVAL) -> None:
+        """Expire sessions every ``interval`` seconds from a daemon thread"""
+        if self._sweeper is not None:
+            return
+
+        def sweep_forever():
+            while not self._stop.wait(interval):
+                try:
+                    self.expire_sessions()
+                except Exception as e:
+                    print(f"Error expiring sessions: {str(e)}")
+
+        self._sweeper = threading.Thread(target=sweep_forever, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Live sessions and lifetime expired/evicted counts"""
+        stats = {'live': self._live.value, 'expired': 0, 'evicted': 0}
+        for shard in self._shards:
+            with shard.lock:
+                stats['expired'] += shard.expired_count
+                stats['evicted'] += shard.evicted_count
+        return stats
@@ -0,0 +1,245 @@
+"""Durable SQLite session store with batched write-behind.
+
+``SessionManager`` keeps live sessions in memory and hands every change to a
+``SessionStore``. Changes are serialized immediately but written later: a
+flusher thread writes all sessions changed since the last flush in one
+transaction every ``SESSION_FLUSH_INTERVAL`` seconds, or sooner once
+``SESSION_FLUSH_BATCH`` sessions are waiting. Only the latest state of a
+session is kept between flushes, so a busy session costs one row write per
+flush no matter how often it changes.
+
+The database runs in WAL mode, so several Streamlit processes on one host can
+share it: a candidate whose process restarted, or who lands on another
+replica, resumes by session id and the session is loaded lazily on first
+access. Every row carries a version that each write increments. A process
+remembers the version it last read or wrote, and:
+
+* on access, ``newer_in_store`` tells the manager to drop its memory copy
+  when another process has saved the session since, so a candidate who
+  moved to another replica and back does not see stale state;
+* on flush, a row is only updated if its version is still the remembered
+  one (compare-and-swap). A stale write is discarded and counted in
+  ``talentscout_session_write_conflicts_total`` instead of silently
+  overwriting newer progress.
+
+Sessions that reached the completion stage are kept for
+``INTERVIEW_RETENTION`` rather than the session timeout, so recruiters can
+export them later (see ``utils/bulk_export.py``).
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from config.settings import SESSION_STORE_PATH, SESSION_FLUSH_INTERVAL, SESSION_FLUSH_BATCH, INTERVIEW_RETENTION
+from utils.metrics import metrics
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(item: Dict[str, Any]) -> Any:
+    if set(item) == {"__datetime__"}:
+        return datetime.fromisoformat(item["__datetime__"])
+    return item
+
+
+class SessionStore:
+    def __init__(self, path: str = SESSION_STORE_PATH, flush_interval: float = SESSION_FLUSH_INTERVAL,
+                 batch_size: int = SESSION_FLUSH_BATCH):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Dict[str, Tuple[str, bool]] = {}
+        self._versions: Dict[str, int] = {}  # version last read or written by this process
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at);
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+            if 'completed' not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN completed INTEGER NOT NULL DEFAULT 0")
+            if 'version' not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def write(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Queue the session's current state for the next flush"""
+        serialized = json.dumps(data, default=_encode)
+        completed = data.get('current_stage') == 'completed'
+        with self._pending_lock:
+            self._pending[session_id] = (serialized, completed)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def load(self, session_id: str, max_age: float) -> Optional[Dict[str, Any]]:
+        """Load a session updated within ``max_age`` seconds, None if there is none"""
+        with self._pending_lock:
+            serialized = self._pending.get(session_id, (None, False))[0]
+        if serialized is None:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT data, version FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                    (session_id, time.time() - max_age)
+                ).fetchone()
+            if row is None:
+                return None
+            serialized = row[0]
+            with self._pending_lock:
+                self._versions[session_id] = row[1]
+        return json.loads(serialized, object_hook=_decode)
+
+    def newer_in_store(self, session_id: str) -> bool:
+        """Whether another process saved the session after this one last read or wrote it
+
+        If so, this process's unflushed state of the session is discarded: the
+        caller should reload the session with ``load``.
+        """
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            row = self._reader.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        with self._pending_lock:
+            if row is None or row[0] <= self._versions.get(session_id, 0):
+                return False
+            if self._pending.pop(session_id, None) is not None:
+                metrics.inc("talentscout_session_write_conflicts_total",
+                            "Session writes discarded because another process saved the session first")
+        return True
+
+    def flush(self) -> int:
+        """Write every queued session in one transaction; returns how many were written"""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            now = time.time()
+            with self._pending_lock:
+                known = {session_id: self._versions.get(session_id) for session_id in batch}
+            written: Dict[str, int] = {}
+            conflicts = 0
+            try:
+                with self._connect() as conn:
+                    for session_id, (data, completed) in batch.items():
+                        version = known[session_id]
+                        # Compare-and-swap on the version this process last saw
+                        updated = version is not None and conn.execute(
+                            "UPDATE sessions SET data = ?, updated_at = ?, completed = ?, version = version + 1 "
+                            "WHERE session_id = ? AND version = ?",
+                            (data, now, int(completed), session_id, version)
+                        ).rowcount
+                        # New here, or deleted from the store meanwhile: insert unless another process did
+                        inserted = not updated and conn.execute(
+                            "INSERT INTO sessions (session_id, data, updated_at, completed, version) "
+                            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(session_id) DO NOTHING",
+                            (session_id, data, now, int(completed), (version or 0) + 1)
+                        ).rowcount
+                        if updated or inserted:
+                            written[session_id] = (version or 0) + 1
+                        else:
+                            conflicts += 1
+                    # Before the commit, so newer_in_store never takes this write for another process's
+                    with self._pending_lock:
+                        self._versions.update(written)
+            except sqlite3.Error:
+                # Put the batch back unless a newer state was queued meanwhile
+                with self._pending_lock:
+                    for session_id in written:
+                        if known[session_id] is None:
+                            self._versions.pop(session_id, None)
+                        else:
+                            self._versions[session_id] = known[session_id]
+                    for session_id, data in batch.items():
+                        self._pending.setdefault(session_id, data)
+                raise
+        if conflicts:
+            # The session is reloaded from the store on its next access (see newer_in_store)
+            metrics.inc("talentscout_session_write_conflicts_total",
+                        "Session writes discarded because another process saved the session first", conflicts)
+        metrics.inc("talentscout_session_flushes_total", "Write-behind flushes of the session store")
+        metrics.inc("talentscout_session_rows_written_total", "Session rows written by the store", len(written))
+        return len(written)
+
+    def delete_expired(self, max_age: float, retention: float = INTERVIEW_RETENTION,
+                       on_delete: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """Delete unfinished sessions idle for ``max_age`` seconds and completed ones past ``retention``
+
+        ``on_delete`` is called with the data of every deleted session.
+        """
+        now = time.time()
+        query = "DELETE FROM sessions WHERE (completed = 0 AND updated_at < ?) OR updated_at < ? RETURNING session_id"
+        params = (now - max_age, now - retention)
+        with self._connect() as conn:
+            deleted = conn.execute(query + (", data" if on_delete else ""), params).fetchall()
+        with self._pending_lock:
+            for row in deleted:
+                self._versions.pop(row[0], None)
+        if on_delete is not None:
+            for _, serialized in deleted:
+                on_delete(json.loads(serialized, object_hook=_decode))
+        return len(deleted)
+
+    def iter_completed(self, since: Optional[float] = None,
+                       session_ids: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (session_id, data) for completed interviews, oldest first, without loading them all"""
+        query = "SELECT session_id, data FROM sessions WHERE completed = 1 AND updated_at >= ?"
+        params: list = [since or 0]
+        if session_ids is not None:
+            ids = list(session_ids)
+            query += f" AND session_id IN ({','.join('?' * len(ids))})"
+            params += ids
+        with self._connect() as conn:
+            for session_id, serialized in conn.execute(query + " ORDER BY updated_at", params):
+                yield session_id, json.loads(serialized, object_hook=_decode)
+
+    def start(self) -> None:
+        """Start the flusher thread and flush once more at interpreter exit"""
+        if self._flusher is not None:
+            return
+
+        def flush_forever():
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except sqlite3.Error as e:
+                    print(f"Error flushing sessions: {str(e)}")
+
+        self._flusher = threading.Thread(target=flush_forever, name="session-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
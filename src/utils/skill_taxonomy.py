@@ -0,0 +1,215 @@
+"""Skill taxonomy: canonical skill ids with alias and fuzzy lookup.
+
+The taxonomy is loaded from ``config/skills.json`` and compiled once per
+process. Every skill has a canonical id (the key used by the question cache
+and anything else keyed on skills), a display name and aliases. Names and
+aliases are compacted (lowercased, with spaces, dots, hyphens, underscores
+and slashes removed), so "Node.js", "nodejs" and "node js" are one key:
+
+* ``canonical_id`` maps a single term, such as a checkbox label or one entry
+  of the "other skills" box. An exact alias hit is a dict lookup. A miss
+  falls back to a bounded edit-distance search, so "Pyhton" or "Kubernets"
+  still resolve: every alias is indexed under all its deletions of up to
+  ``SKILL_FUZZY_MAX_DISTANCE`` characters, the term's own deletions select
+  the candidates, and only those are checked with a bounded edit distance
+  (transpositions count as one edit). Fuzzy results are memoized.
+* ``find_in_text`` scans free text such as a position title or a resume. A
+  set of alias prefixes works as a flattened trie over consecutive words, so
+  the longest alias ("ruby on rails" before "ruby") is found with a few set
+  lookups per word. Free text never uses fuzzy matching, so prose does not
+  produce near-miss skills.
+
+``term_aliases`` in the data file are aliases that are common words ("node",
+"express", "rest") and are only recognized as a whole term, never inside free
+text. Skills with ``"scan": false`` (one-letter names, "Go") are not looked
+for in free text at all. Categories with ``"form": false`` are recognized
+but not offered as checkboxes.
+"""
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from config.settings import SKILL_TAXONOMY_PATH, SKILL_FUZZY_MAX_DISTANCE, SKILL_LOOKUP_CACHE_SIZE
+
+_SEPARATORS = str.maketrans("", "", ".-_/")
+# Words as they appear in prose: "node.js", ".net", "c++", "c#", "python3"
+_WORD = re.compile(r"\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9][a-z0-9+#]*)*")
+
+
+def compact(term: str) -> str:
+    """Lookup key of a term: lowercase without separators"""
+    return "".join(term.lower().split()).translate(_SEPARATORS)
+
+
+def _deletions(key: str, max_distance: int) -> Set[str]:
+    """``key`` with every combination of up to ``max_distance`` characters removed"""
+    found = {key}
+    layer = {key}
+    for _ in range(max_distance):
+        layer = {word[:i] + word[i + 1:] for word in layer for i in range(len(word))}
+        found |= layer
+    return found
+
+
+def _within_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """Edit distance of ``a`` and ``b`` if it is at most ``max_distance``
+
+    Adjacent transpositions ("pyhton") count as one edit (optimal string alignment).
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        row = [i]
+        for j, other in enumerate(b, 1):
+            cost = min(row[j - 1] + 1, previous[j] + 1, previous[j - 1] + (char != other))
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == other:
+                cost = min(cost, before[j - 2] + 1)
+            row.append(cost)
+        if min(row) > max_distance:
+            return None
+        before, previous = previous, row
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+class SkillTaxonomy:
+    def __init__(self, data: Dict[str, Any], max_distance: int = SKILL_FUZZY_MAX_DISTANCE,
+                 cache_size: int = SKILL_LOOKUP_CACHE_SIZE):
+        self.version = data.get("version", 1)
+        self.max_distance = max_distance
+        self._names: Dict[str, str] = {}
+        self._categories: Dict[str, List[str]] = {}
+        self._terms: Dict[str, str] = {}  # compact alias -> id, for whole terms
+        self._scan: Dict[str, str] = {}  # compact alias -> id, for free text
+        self._scan_prefixes: Set[str] = set()  # every prefix of a free-text alias
+        self._deletions: Dict[str, Set[str]] = {}  # alias with characters deleted -> aliases
+
+        for category in data["categories"]:
+            if category.get("form", True):
+                self._categories[category["name"]] = [skill["name"] for skill in category["skills"]]
+            for skill in category["skills"]:
+                skill_id = skill["id"]
+                self._names[skill_id] = skill["name"]
+                text_aliases = [skill_id, skill["name"]] + skill.get("aliases", [])
+                for alias in text_aliases + skill.get("term_aliases", []):
+                    self._add_term(compact(alias), skill_id)
+                if skill.get("scan", True):
+                    for alias in text_aliases:
+                        key = compact(alias)
+                        self._scan[key] = skill_id
+                        self._scan_prefixes.update(key[:i] for i in range(1, len(key) + 1))
+
+        self._fuzzy = lru_cache(maxsize=cache_size)(self._fuzzy)
+
+    def _add_term(self, key: str, skill_id: str) -> None:
+        owner = self._terms.setdefault(key, skill_id)
+        if owner != skill_id:
+            raise ValueError(f"Skill alias {key!r} is claimed by both {owner!r} and {skill_id!r}")
+        for deleted in _deletions(key, self.max_distance):
+            self._deletions.setdefault(deleted, set()).add(key)
+
+    @classmethod
+    def load(cls, path: str = SKILL_TAXONOMY_PATH) -> "SkillTaxonomy":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def canonical_id(self, term: str) -> Optional[str]:
+        """Canonical id of a single skill term, None if it matches no skill"""
+        key = compact(term)
+        if not key:
+            return None
+        skill_id = self._terms.get(key)
+        if skill_id is not None:
+            return skill_id
+        # Short keys are too easily one edit away from another skill
+        distance = min(self.max_distance, 0 if len(key) < 4 else 1 if len(key) < 8 else 2)
+        return self._fuzzy(key, distance) if distance else None
+
+    def _fuzzy(self, key: str, max_distance: int) -> Optional[str]:
+        """Closest alias within ``max_distance`` edits; None if there is none or it is ambiguous
+
+        Memoized per instance (see ``__init__``), since typos repeat across candidates.
+        """
+        # Two strings within d edits share a string reachable from both by at most d deletions
+        candidates: Set[str] = set()
+        for deleted in _deletions(key, max_distance):
+            candidates |= self._deletions.get(deleted, set())
+
+        best_distance = max_distance + 1
+        best: Set[str] = set()
+        for alias in candidates:
+            distance = _within_distance(key, alias, min(best_distance, max_distance))
+            if distance is None:
+                continue
+            if distance < best_distance:
+                best_distance, best = distance, set()
+            best.add(self._terms[alias])
+        return next(iter(best)) if len(best) == 1 else None
+
+    def canonicalize(self, terms: Iterable[str]) -> List[str]:
+        """Canonical ids of skill terms, deduplicated in input order; unknown terms are kept normalized"""
+        ids = []
+        for term in terms:
+            term = " ".join(str(term).lower().split())
+            if term:
+                skill_id = self.canonical_id(term) or term
+                if skill_id not in ids:
+                    ids.append(skill_id)
+        return ids
+
+    def display_names(self, terms: Iterable[str]) -> List[str]:
+        """Display names of skill terms, deduplicated; unknown terms keep the candidate's spelling"""
+        names: Dict[str, str] = {}
+        for term in terms:
+            term = term.strip()
+            if term:
+                skill_id = self.canonical_id(term)
+                names.setdefault(skill_id or term.lower(), self._names.get(skill_id, term))
+        return list(names.values())
+
+    def find_in_text(self, text: str) -> List[str]:
+        """Canonical ids of the skills mentioned in free text, in order of first mention"""
+        words = [word.translate(_SEPARATORS) for word in _WORD.findall(text.lower())]
+        prefixes, scan = self._scan_prefixes, self._scan
+        found: List[str] = []
+        i = 0
+        while i < len(words):
+            # Extend across words while the joined text is still the start of an alias,
+            # remembering the longest complete alias: "ruby on rails" before "ruby"
+            key, end, match = "", i, None
+            while end < len(words) and key + words[end] in prefixes:
+                key += words[end]
+                end += 1
+                if key in scan:
+                    match = (scan[key], end)
+            if match is None:
+                i += 1
+                continue
+            if match[0] not in found:
+                found.append(match[0])
+            i = match[1]
+        return found
+
+    def name(self, skill_id: str) -> str:
+        """Display name of a skill id (the id itself for skills outside the taxonomy)"""
+        return self._names.get(skill_id, skill_id)
+
+    def form_options(self) -> Dict[str, List[str]]:
+        """Checkbox labels offered on the tech-stack form, by category"""
+        return {category: list(names) for category, names in self._categories.items()}
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Process-wide taxonomy, compiled on first use"""
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            _taxonomy = SkillTaxonomy.load()
+        return _taxonomy